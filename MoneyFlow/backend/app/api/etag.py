@@ -0,0 +1,25 @@
+from fastapi import HTTPException, Request, Response
+
+from app import ledger
+from app.database import current_ledger_id
+
+
+def ledger_etag() -> str:
+    # Ответы статистики зависят только от данных журнала, поэтому его версии
+    # достаточно, чтобы понять, изменилось ли что-то с прошлого запроса.
+    # Версия живет в памяти процесса: пока сервер работает, никто другой
+    # базу не меняет (app.server_lock), а после перезапуска меняется epoch
+    return f'W/"{ledger.version_tag(ledger.current_version(), current_ledger_id())}"'
+
+
+def check_ledger_etag(request: Request, response: Response) -> None:
+    # Зависимость маршрута: при совпадении If-None-Match отвечаем 304
+    # до обращения к БД, иначе добавляем ETag к обычному ответу
+    etag = ledger_etag()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {value.strip() for value in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
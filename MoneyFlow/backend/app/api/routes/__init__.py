@@ -1,10 +1,20 @@
 from fastapi import APIRouter
-from app.api.routes import transactions, statistics
+from app.config import settings
+from app.api.routes import transactions, statistics, balance, events, ledgers
 
 api_router = APIRouter()
 
-api_router.include_router(transactions.router, prefix="/transactions", tags=["transactions"])
-api_router.include_router(statistics.router, prefix="/statistics", tags=["statistics"])
-
+# В асинхронном режиме основные маршруты обслуживаются async-обработчиками;
+# они подключаются первыми, остальные пути (импорт, экспорт) берутся из
+# синхронных роутеров
+if settings.async_database:
+    from app.api.routes import async_transactions, async_statistics
 
+    api_router.include_router(async_transactions.router, prefix="/transactions", tags=["transactions"])
+    api_router.include_router(async_statistics.router, prefix="/statistics", tags=["statistics"])
 
+api_router.include_router(transactions.router, prefix="/transactions", tags=["transactions"])
+api_router.include_router(statistics.router, prefix="/statistics", tags=["statistics"])
+api_router.include_router(balance.router, prefix="/balance", tags=["balance"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(ledgers.router, prefix="/ledgers", tags=["ledgers"])
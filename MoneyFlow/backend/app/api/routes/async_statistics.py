@@ -0,0 +1,134 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Optional
+
+from app.database import get_async_db
+from app.api.etag import check_ledger_etag
+from app.services.async_statistics_service import AsyncStatisticsService
+from app.schemas.period import (
+    StatisticsResponse,
+    SeriesResponse,
+    BatchStatisticsRequest,
+    BatchStatisticsResponse,
+)
+from app.schemas.category import CategoryStatisticsResponse
+from app.metrics import TimedRoute
+from app.search import SEARCH_QUERY_PATTERN, SEARCH_QUERY_DESCRIPTION
+from app.columnar_format import FORMAT_PATTERN, FORMAT_DESCRIPTION, format_response
+
+# Асинхронные версии маршрутов statistics.py
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/period", response_model=StatisticsResponse, dependencies=[Depends(check_ledger_etag)])
+async def get_statistics_by_period(
+    response: Response,
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200, pattern=SEARCH_QUERY_PATTERN, description=SEARCH_QUERY_DESCRIPTION
+    ),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncStatisticsService(db, q)
+    return format_response(await service.get_statistics_by_period(start_date, end_date), format, response)
+
+
+@router.get("/daily", response_model=StatisticsResponse, dependencies=[Depends(check_ledger_etag)])
+async def get_daily_statistics(
+    response: Response,
+    date: date = Query(..., description="Date for daily statistics"),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncStatisticsService(db)
+    return format_response(await service.get_daily_statistics(date), format, response)
+
+
+@router.get("/weekly", response_model=StatisticsResponse, dependencies=[Depends(check_ledger_etag)])
+async def get_weekly_statistics(
+    response: Response,
+    date: date = Query(..., description="Any date within the week"),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncStatisticsService(db)
+    return format_response(await service.get_weekly_statistics(date), format, response)
+
+
+@router.get("/monthly", response_model=StatisticsResponse, dependencies=[Depends(check_ledger_etag)])
+async def get_monthly_statistics(
+    response: Response,
+    date: date = Query(..., description="Any date within the month"),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncStatisticsService(db)
+    return format_response(await service.get_monthly_statistics(date), format, response)
+
+
+@router.get("/summary", response_model=StatisticsResponse, dependencies=[Depends(check_ledger_etag)])
+async def get_summary(
+    response: Response,
+    start_date: date = Query(None),
+    end_date: date = Query(None),
+    granularity: str = Query("day", pattern="^(day|week|month|quarter|year)$"),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200, pattern=SEARCH_QUERY_PATTERN, description=SEARCH_QUERY_DESCRIPTION
+    ),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncStatisticsService(db, q)
+    if start_date and end_date:
+        statistics = await service.get_statistics_by_period(start_date, end_date, granularity)
+        return format_response(statistics, format, response)
+    # Если даты не указаны, возвращаем статистику за все время
+    return format_response(await service.get_all_time_statistics(granularity), format, response)
+
+
+@router.get("/series", response_model=SeriesResponse, dependencies=[Depends(check_ledger_etag)])
+async def get_series(
+    response: Response,
+    start_date: date = Query(None),
+    end_date: date = Query(None),
+    granularity: str = Query("month", pattern="^(day|week|month|quarter|year)$"),
+    fill_gaps: bool = Query(True, description="Include empty buckets with zero totals"),
+    window: Optional[int] = Query(None, ge=2, le=366, description="Rolling average of net over this many buckets"),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200, pattern=SEARCH_QUERY_PATTERN, description=SEARCH_QUERY_DESCRIPTION
+    ),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncStatisticsService(db, q)
+    series = await service.get_series(start_date, end_date, granularity, fill_gaps, window)
+    return format_response(series, format, response)
+
+
+@router.post("/batch", response_model=BatchStatisticsResponse)
+async def get_statistics_batch(
+    request: BatchStatisticsRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Несколько именованных периодов за один запрос и одно чтение агрегатов
+    service = AsyncStatisticsService(db)
+    return BatchStatisticsResponse(periods=await service.get_statistics_batch(request.periods))
+
+
+@router.get("/categories", response_model=CategoryStatisticsResponse, dependencies=[Depends(check_ledger_etag)])
+async def get_category_statistics(
+    start_date: date = Query(None),
+    end_date: date = Query(None),
+    type: str = Query("expense", pattern="^(income|expense|adjustment)$"),
+    top: Optional[int] = Query(None, ge=1, description="Keep the N largest categories, fold the rest into one"),
+    pivot: bool = Query(False, description="Add month-by-category totals"),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200, pattern=SEARCH_QUERY_PATTERN, description=SEARCH_QUERY_DESCRIPTION
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncStatisticsService(db, q)
+    return await service.get_category_statistics(start_date, end_date, type, top, pivot)
@@ -0,0 +1,125 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import date
+
+from app.database import get_async_db
+from app.pagination import encode_cursor, decode_cursor
+from app.services.async_transaction_service import AsyncTransactionService
+from app.services.write_batcher import write_batcher
+from app.schemas.transaction import (
+    TransactionCreate,
+    TransactionUpdate,
+    TransactionResponse,
+)
+from app.metrics import TimedRoute
+from app.search import SEARCH_QUERY_PATTERN, SEARCH_QUERY_DESCRIPTION
+from app.columnar_format import FORMAT_PATTERN, FORMAT_DESCRIPTION
+
+# Асинхронные версии основных маршрутов transactions.py. Подключаются перед
+# синхронным роутером, поэтому пути с ID ограничены конвертером :int -
+# иначе они перехватили бы /export и /import
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.post("/", response_model=TransactionResponse, status_code=201)
+async def create_transaction(
+    transaction: TransactionCreate, db: AsyncSession = Depends(get_async_db)
+):
+    # В режиме групповой фиксации запись идет через общий поток-писатель
+    if write_batcher is not None:
+        return await write_batcher.run_async(
+            lambda service: service.create_transaction(transaction)
+        )
+    service = AsyncTransactionService(db)
+    return await service.create_transaction(transaction)
+
+
+@router.get("/", response_model=List[TransactionResponse])
+async def get_transactions(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    type: Optional[str] = Query(None, pattern="^(income|expense|adjustment)$"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200, pattern=SEARCH_QUERY_PATTERN, description=SEARCH_QUERY_DESCRIPTION
+    ),
+    order: str = Query("date", pattern="^(date|relevance)$"),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if order == "relevance" and not q:
+        raise HTTPException(status_code=400, detail="order=relevance requires q")
+    if order == "relevance" and after:
+        raise HTTPException(status_code=400, detail="Cursor is not supported with order=relevance, use skip")
+
+    # Быстрый путь: JSON собирается прямо из строк БД, без TransactionResponse
+    # на каждую строку; response_model остается для документации OpenAPI
+    service = AsyncTransactionService(db)
+    # Версия читается до списка: изменения, попавшие между чтениями, клиент
+    # получит повторно через /changes, а не потеряет
+    version = await service.get_sync_version()
+    content, next_key = await service.get_transactions_json(
+        skip=skip,
+        limit=limit,
+        start_date=start_date,
+        end_date=end_date,
+        transaction_type=type,
+        after=after,
+        q=q,
+        order=order,
+        columnar=format == "columnar",
+    )
+    response = Response(content=content, media_type="application/json")
+    response.headers["X-Ledger-Version"] = str(version)
+    # Курсор следующей страницы передаем в заголовке, чтобы не менять формат ответа
+    if next_key and order == "date":
+        response.headers["X-Next-Cursor"] = encode_cursor(*next_key)
+    return response
+
+
+@router.get("/{transaction_id:int}", response_model=TransactionResponse)
+async def get_transaction(transaction_id: int, db: AsyncSession = Depends(get_async_db)):
+    service = AsyncTransactionService(db)
+    transaction = await service.get_transaction(transaction_id)
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return transaction
+
+
+@router.put("/{transaction_id:int}", response_model=TransactionResponse)
+async def update_transaction(
+    transaction_id: int,
+    transaction: TransactionUpdate,
+    db: AsyncSession = Depends(get_async_db),
+):
+    if write_batcher is not None:
+        updated = await write_batcher.run_async(
+            lambda service: service.update_transaction(transaction_id, transaction)
+        )
+    else:
+        service = AsyncTransactionService(db)
+        updated = await service.update_transaction(transaction_id, transaction)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return updated
+
+
+@router.delete("/{transaction_id:int}", status_code=204)
+async def delete_transaction(transaction_id: int, db: AsyncSession = Depends(get_async_db)):
+    if write_batcher is not None:
+        success = await write_batcher.run_async(
+            lambda service: service.delete_transaction(transaction_id)
+        )
+    else:
+        service = AsyncTransactionService(db)
+        success = await service.delete_transaction(transaction_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return None
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import date
+
+from app.database import get_read_db
+from app.api.etag import check_ledger_etag
+from app.services.statistics_service import StatisticsService
+from app.schemas.balance import BalanceResponse
+from app.metrics import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/", response_model=BalanceResponse, dependencies=[Depends(check_ledger_etag)])
+def get_balance(
+    as_of: Optional[date] = Query(None, description="Balance at the end of this date, all-time if omitted"),
+    db: Session = Depends(get_read_db),
+):
+    service = StatisticsService(db)
+    return service.get_balance(as_of)
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from datetime import date
+from typing import List, Optional
+
+from app.services.event_broker import Subscriber, event_broker
+from app.metrics import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+MAX_PERIODS = 10
+
+
+class EventStreamResponse(StreamingResponse):
+    # Подписка снимается, чем бы ни закончился ответ. finally генератора
+    # событий для этого мало: генератор не запускается, если клиент ушел
+    # до начала ответа, а background-задачу Starlette пропускает при обрыве
+    # соединения - слот клиента оставался бы занятым навсегда
+    def __init__(self, subscriber: Subscriber, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.subscriber = subscriber
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            event_broker.unsubscribe(self.subscriber)
+
+
+@router.get("/")
+async def stream_events(
+    request: Request,
+    period: List[str] = Query(
+        [], description="Push totals of this period on relevant changes, YYYY-MM-DD/YYYY-MM-DD"
+    ),
+    last_event_id: Optional[str] = Query(
+        None, description="Resume after this event id; EventSource sends the Last-Event-ID header on reconnect"
+    ),
+):
+    # Server-Sent Events: клиент получает изменения журнала после commit
+    # и перечитывает данные только тогда, когда они его касаются
+    if len(period) > MAX_PERIODS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PERIODS} periods per stream")
+    periods = []
+    for value in dict.fromkeys(period):
+        # Период подписки на итоги: начало и конец через "/" (интервал ISO 8601)
+        try:
+            start_date, end_date = (date.fromisoformat(part) for part in value.split("/"))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid period {value}: {e}")
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail=f"Invalid period {value}: start is after end")
+        periods.append((start_date, end_date))
+
+    subscriber, missed = event_broker.subscribe(request.headers.get("last-event-id") or last_event_id)
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Too many event stream clients")
+    return EventStreamResponse(
+        subscriber,
+        event_broker.stream(subscriber, missed, periods),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx не копит события в буфере
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException, Response
+
+from app.shards import InvalidLedgerError, check_ledger_id, shard_registry
+from app.schemas.ledger import LedgerResponse
+from app.metrics import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.put("/{ledger_id}", response_model=LedgerResponse)
+def create_ledger(ledger_id: str, response: Response):
+    # Повторный вызов для существующего журнала ничего не меняет (200)
+    try:
+        check_ledger_id(ledger_id)
+    except InvalidLedgerError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    created = shard_registry.create(ledger_id)
+    if created:
+        response.status_code = 201
+    return LedgerResponse(id=ledger_id, created=created)
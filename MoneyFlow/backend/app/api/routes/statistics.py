@@ -1,91 +1,141 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 from datetime import date
+from typing import Optional
 
-from app.database import get_db
+from app.database import get_read_db
+from app.api.etag import check_ledger_etag
 from app.services.statistics_service import StatisticsService
-from app.schemas.period import StatisticsResponse, PeriodRequest
+from app.services.statistics_cache import statistics_cache
+from app.schemas.period import (
+    StatisticsResponse,
+    PeriodRequest,
+    SeriesResponse,
+    BatchStatisticsRequest,
+    BatchStatisticsResponse,
+)
+from app.schemas.category import CategoryStatisticsResponse
+from app.metrics import TimedRoute
+from app.search import SEARCH_QUERY_PATTERN, SEARCH_QUERY_DESCRIPTION
+from app.columnar_format import FORMAT_PATTERN, FORMAT_DESCRIPTION, format_response
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
-@router.get("/period", response_model=StatisticsResponse)
+@router.get("/period", response_model=StatisticsResponse, dependencies=[Depends(check_ledger_etag)])
 def get_statistics_by_period(
+    response: Response,
     start_date: date = Query(...),
     end_date: date = Query(...),
-    db: Session = Depends(get_db),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200, pattern=SEARCH_QUERY_PATTERN, description=SEARCH_QUERY_DESCRIPTION
+    ),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: Session = Depends(get_read_db),
 ):
-    service = StatisticsService(db)
-    return service.get_statistics_by_period(start_date, end_date)
+    service = StatisticsService(db, q)
+    return format_response(service.get_statistics_by_period(start_date, end_date), format, response)
 
 
-@router.get("/daily", response_model=StatisticsResponse)
+@router.get("/daily", response_model=StatisticsResponse, dependencies=[Depends(check_ledger_etag)])
 def get_daily_statistics(
+    response: Response,
     date: date = Query(..., description="Date for daily statistics"),
-    db: Session = Depends(get_db),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: Session = Depends(get_read_db),
 ):
     service = StatisticsService(db)
-    return service.get_daily_statistics(date)
+    return format_response(service.get_daily_statistics(date), format, response)
 
 
-@router.get("/weekly", response_model=StatisticsResponse)
+@router.get("/weekly", response_model=StatisticsResponse, dependencies=[Depends(check_ledger_etag)])
 def get_weekly_statistics(
+    response: Response,
     date: date = Query(..., description="Any date within the week"),
-    db: Session = Depends(get_db),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: Session = Depends(get_read_db),
 ):
     service = StatisticsService(db)
-    return service.get_weekly_statistics(date)
+    return format_response(service.get_weekly_statistics(date), format, response)
 
 
-@router.get("/monthly", response_model=StatisticsResponse)
+@router.get("/monthly", response_model=StatisticsResponse, dependencies=[Depends(check_ledger_etag)])
 def get_monthly_statistics(
+    response: Response,
     date: date = Query(..., description="Any date within the month"),
-    db: Session = Depends(get_db),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: Session = Depends(get_read_db),
 ):
     service = StatisticsService(db)
-    return service.get_monthly_statistics(date)
+    return format_response(service.get_monthly_statistics(date), format, response)
 
 
-@router.get("/summary", response_model=StatisticsResponse)
+@router.get("/summary", response_model=StatisticsResponse, dependencies=[Depends(check_ledger_etag)])
 def get_summary(
+    response: Response,
     start_date: date = Query(None),
     end_date: date = Query(None),
-    db: Session = Depends(get_db),
+    granularity: str = Query("day", pattern="^(day|week|month|quarter|year)$"),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200, pattern=SEARCH_QUERY_PATTERN, description=SEARCH_QUERY_DESCRIPTION
+    ),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: Session = Depends(get_read_db),
 ):
-    service = StatisticsService(db)
+    service = StatisticsService(db, q)
     if start_date and end_date:
-        return service.get_statistics_by_period(start_date, end_date)
-    else:
-        # Если даты не указаны, возвращаем статистику за все время
-        # Для этого нужно получить первую и последнюю транзакцию
-        from app.repositories.transaction_repository import TransactionRepository
-        repo = TransactionRepository(db)
-        transactions = repo.get_all(limit=1)
-        if not transactions:
-            # Если транзакций нет, возвращаем пустую статистику
-            return StatisticsResponse(
-                period_start=date.today(),
-                period_end=date.today(),
-                total_income=0.0,
-                total_expense=0.0,
-                balance=0.0,
-                daily_statistics=[],
-            )
-        
-        # Получаем все транзакции для определения диапазона дат
-        all_transactions = repo.get_all(limit=10000)
-        if all_transactions:
-            dates = [t.date for t in all_transactions]
-            return service.get_statistics_by_period(min(dates), max(dates))
-        else:
-            return StatisticsResponse(
-                period_start=date.today(),
-                period_end=date.today(),
-                total_income=0.0,
-                total_expense=0.0,
-                balance=0.0,
-                daily_statistics=[],
-            )
+        statistics = service.get_statistics_by_period(start_date, end_date, granularity)
+        return format_response(statistics, format, response)
+    # Если даты не указаны, возвращаем статистику за все время
+    return format_response(service.get_all_time_statistics(granularity), format, response)
+
+
+@router.get("/series", response_model=SeriesResponse, dependencies=[Depends(check_ledger_etag)])
+def get_series(
+    response: Response,
+    start_date: date = Query(None),
+    end_date: date = Query(None),
+    granularity: str = Query("month", pattern="^(day|week|month|quarter|year)$"),
+    fill_gaps: bool = Query(True, description="Include empty buckets with zero totals"),
+    window: Optional[int] = Query(None, ge=2, le=366, description="Rolling average of net over this many buckets"),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200, pattern=SEARCH_QUERY_PATTERN, description=SEARCH_QUERY_DESCRIPTION
+    ),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: Session = Depends(get_read_db),
+):
+    service = StatisticsService(db, q)
+    series = service.get_series(start_date, end_date, granularity, fill_gaps, window)
+    return format_response(series, format, response)
+
 
+@router.post("/batch", response_model=BatchStatisticsResponse)
+def get_statistics_batch(
+    request: BatchStatisticsRequest,
+    db: Session = Depends(get_read_db),
+):
+    # Несколько именованных периодов за один запрос и одно чтение агрегатов
+    service = StatisticsService(db)
+    return BatchStatisticsResponse(periods=service.get_statistics_batch(request.periods))
+
+
+@router.get("/categories", response_model=CategoryStatisticsResponse, dependencies=[Depends(check_ledger_etag)])
+def get_category_statistics(
+    start_date: date = Query(None),
+    end_date: date = Query(None),
+    type: str = Query("expense", pattern="^(income|expense|adjustment)$"),
+    top: Optional[int] = Query(None, ge=1, description="Keep the N largest categories, fold the rest into one"),
+    pivot: bool = Query(False, description="Add month-by-category totals"),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200, pattern=SEARCH_QUERY_PATTERN, description=SEARCH_QUERY_DESCRIPTION
+    ),
+    db: Session = Depends(get_read_db),
+):
+    service = StatisticsService(db, q)
+    return service.get_category_statistics(start_date, end_date, type, top, pivot)
 
 
+@router.get("/cache")
+def get_cache_stats():
+    # Счетчики попаданий и промахов кэша статистики этого процесса
+    return statistics_cache.stats()
@@ -1,27 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_read_db, ReadSessionLocal
+from app.pagination import encode_cursor, decode_cursor
 from app.services.transaction_service import TransactionService
+from app.services.import_service import ImportService, create_parser
+from app.services.export_service import ExportService, EXPORT_MEDIA_TYPES
+from app.services.write_batcher import write_batcher
 from app.schemas.transaction import (
     TransactionCreate,
     TransactionUpdate,
     TransactionResponse,
+    TransactionChangesResponse,
 )
+from app.schemas.transaction_import import ImportResponse
+from app.schemas.transaction_bulk import TransactionBulkRequest, TransactionBulkResponse
+from app.metrics import TimedRoute
+from app.search import SEARCH_QUERY_PATTERN, SEARCH_QUERY_DESCRIPTION
+from app.columnar_format import FORMAT_PATTERN, FORMAT_DESCRIPTION
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/", response_model=TransactionResponse, status_code=201)
 def create_transaction(
     transaction: TransactionCreate, db: Session = Depends(get_db)
 ):
+    if write_batcher is not None:
+        return write_batcher.run(lambda service: service.create_transaction(transaction))
     service = TransactionService(db)
     return service.create_transaction(transaction)
 
 
+@router.post("/bulk", response_model=TransactionBulkResponse)
+def bulk_transactions(request: TransactionBulkRequest, db: Session = Depends(get_db)):
+    # Все операции запроса фиксируются вместе или не фиксируются вовсе;
+    # отсутствующий id - не ошибка, а статус not_found у элемента
+    if request.operation_count() > settings.bulk_max_operations:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many operations, at most {settings.bulk_max_operations} per request",
+        )
+    if write_batcher is not None:
+        return write_batcher.run(lambda service: service.bulk(request))
+    service = TransactionService(db)
+    return service.bulk(request)
+
+
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+@router.post("/import", response_model=ImportResponse)
+async def import_transactions(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    import_format = format or IMPORT_CONTENT_TYPES.get(content_type)
+    if not import_format:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv or application/x-ndjson, or pass format=csv|ndjson",
+        )
+
+    # Тело читается потоком и вставляется пакетами, каждый в своей транзакции
+    # БД: память не зависит от размера файла, а писатель журнала не ждет,
+    # пока клиент догрузит тело
+    parser = create_parser(import_format)
+    service = ImportService(max_errors=settings.import_max_errors)
+    chunk_size = settings.import_chunk_size
+    pending = []
+    async for chunk in request.stream():
+        pending.extend(parser.feed(chunk))
+        while len(pending) >= chunk_size:
+            await run_in_threadpool(service.import_chunk, pending[:chunk_size])
+            pending = pending[chunk_size:]
+    pending.extend(parser.close())
+    if pending:
+        await run_in_threadpool(service.import_chunk, pending)
+    return service.report()
+
+
 @router.get("/", response_model=List[TransactionResponse])
 def get_transactions(
     skip: int = Query(0, ge=0),
@@ -29,20 +98,95 @@ def get_transactions(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     type: Optional[str] = Query(None, pattern="^(income|expense|adjustment)$"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200, pattern=SEARCH_QUERY_PATTERN, description=SEARCH_QUERY_DESCRIPTION
+    ),
+    order: str = Query("date", pattern="^(date|relevance)$"),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description=FORMAT_DESCRIPTION),
+    db: Session = Depends(get_read_db),
 ):
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if order == "relevance" and not q:
+        raise HTTPException(status_code=400, detail="order=relevance requires q")
+    if order == "relevance" and after:
+        raise HTTPException(status_code=400, detail="Cursor is not supported with order=relevance, use skip")
+
+    # Быстрый путь: JSON собирается прямо из строк БД, без TransactionResponse
+    # на каждую строку; response_model остается для документации OpenAPI
     service = TransactionService(db)
-    return service.get_transactions(
+    # Версия читается до списка: изменения, попавшие между чтениями, клиент
+    # получит повторно через /changes, а не потеряет
+    version = service.get_sync_version()
+    content, next_key = service.get_transactions_json(
         skip=skip,
         limit=limit,
         start_date=start_date,
         end_date=end_date,
         transaction_type=type,
+        after=after,
+        q=q,
+        order=order,
+        columnar=format == "columnar",
+    )
+    response = Response(content=content, media_type="application/json")
+    response.headers["X-Ledger-Version"] = str(version)
+    # Курсор следующей страницы передаем в заголовке, чтобы не менять формат ответа
+    if next_key and order == "date":
+        response.headers["X-Next-Cursor"] = encode_cursor(*next_key)
+    return response
+
+
+@router.get("/changes", response_model=TransactionChangesResponse)
+def get_changes(
+    since: int = Query(0, ge=0, description="Ledger version from X-Ledger-Version or a previous sync"),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_read_db),
+):
+    # Изменения и удаления после версии since: клиент применяет их к своему
+    # списку вместо повторной загрузки всего журнала
+    service = TransactionService(db)
+    return service.get_changes(since, limit)
+
+
+@router.get("/export")
+def export_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    type: Optional[str] = Query(None, pattern="^(income|expense|adjustment)$"),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200, pattern=SEARCH_QUERY_PATTERN, description=SEARCH_QUERY_DESCRIPTION
+    ),
+):
+    # Сессия принадлежит генератору и закрывается после отправки последней
+    # пачки, а не при выходе из обработчика
+    def stream():
+        db = ReadSessionLocal()
+        try:
+            service = ExportService(db, chunk_size=settings.export_chunk_size)
+            yield from service.stream(
+                format,
+                start_date=start_date,
+                end_date=end_date,
+                transaction_type=type,
+                q=q,
+            )
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'},
     )
 
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
-def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
+def get_transaction(transaction_id: int, db: Session = Depends(get_read_db)):
     service = TransactionService(db)
     transaction = service.get_transaction(transaction_id)
     if not transaction:
@@ -56,8 +200,13 @@ def update_transaction(
     transaction: TransactionUpdate,
     db: Session = Depends(get_db),
 ):
-    service = TransactionService(db)
-    updated = service.update_transaction(transaction_id, transaction)
+    if write_batcher is not None:
+        updated = write_batcher.run(
+            lambda service: service.update_transaction(transaction_id, transaction)
+        )
+    else:
+        service = TransactionService(db)
+        updated = service.update_transaction(transaction_id, transaction)
     if not updated:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return updated
@@ -65,8 +214,11 @@ def update_transaction(
 
 @router.delete("/{transaction_id}", status_code=204)
 def delete_transaction(transaction_id: int, db: Session = Depends(get_db)):
-    service = TransactionService(db)
-    success = service.delete_transaction(transaction_id)
+    if write_batcher is not None:
+        success = write_batcher.run(lambda service: service.delete_transaction(transaction_id))
+    else:
+        service = TransactionService(db)
+        success = service.delete_transaction(transaction_id)
     if not success:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return None
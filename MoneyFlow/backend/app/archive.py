@@ -0,0 +1,193 @@
+import os
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import current_ledger_id
+from app.models.transaction import Transaction
+
+# Архив закрытых лет. Команда archive seal переносит записи за годы до
+# указанного включительно из transactions в отдельный файл SQLite рядом
+# с основной базой: в нем та же таблица с индексами, индекс поиска и дневные
+# агрегаты этих лет. Файл подключается к каждому соединению через ATTACH
+# только для чтения под именем archive_<id>, и репозитории читают его теми же
+# запросами через schema_translate_map. Архивные годы больше не меняются
+
+ARCHIVE_SCHEMA_PREFIX = "archive_"
+# SQLite подключает к соединению не больше 10 баз (SQLITE_MAX_ATTACHED),
+# поэтому один запуск seal пишет один файл на все запечатываемые годы
+MAX_ARCHIVES = 10
+REGISTRY_TABLE = "archive_partitions"
+
+
+class ArchivedYearError(ValueError):
+    # Изменение затрагивает архивный год или архивную запись (HTTP 409)
+    pass
+
+
+@dataclass(frozen=True)
+class Partition:
+    id: int
+    path: str
+    first_year: int
+    last_year: int
+    row_count: int
+    min_id: int
+    max_id: int
+
+    @property
+    def schema(self) -> str:
+        return f"{ARCHIVE_SCHEMA_PREFIX}{self.id}"
+
+    def overlaps(self, start_date: Optional[date], end_date: Optional[date]) -> bool:
+        if start_date is not None and start_date.year > self.last_year:
+            return False
+        if end_date is not None and end_date.year < self.first_year:
+            return False
+        return True
+
+
+# Реестр читается один раз на процесс, при первом соединении с базой.
+# Пока сервер работает, archive seal не запускается (app.server_lock),
+# поэтому реестр не устаревает
+_partitions: Optional[Tuple[Partition, ...]] = None
+# Следующий id для новых записей основной базы, когда есть архивы
+_next_id: Optional[int] = None
+_lock = threading.Lock()
+
+
+def database_path() -> Optional[str]:
+    # Путь к файлу основной базы, рядом с ним лежат архивы; None - база в памяти
+    database = make_url(settings.sync_database_url).database
+    if not database or database == ":memory:":
+        return None
+    return os.path.abspath(database)
+
+
+def _read_registry(cursor) -> Tuple[Partition, ...]:
+    if database_path() is None:
+        return ()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (REGISTRY_TABLE,))
+    if cursor.fetchone() is None:
+        return ()
+    cursor.execute(
+        "SELECT id, file, first_year, last_year, row_count, min_id, max_id "
+        f"FROM {REGISTRY_TABLE} ORDER BY last_year"
+    )
+    directory = os.path.dirname(database_path())
+    return tuple(
+        Partition(row[0], os.path.join(directory, row[1]), *row[2:]) for row in cursor.fetchall()
+    )
+
+
+def attach_archives(dbapi_connection) -> None:
+    # Вызывается для каждого нового соединения (database.configure_sqlite)
+    global _partitions
+    cursor = dbapi_connection.cursor()
+    try:
+        if _partitions is None:
+            with _lock:
+                if _partitions is None:
+                    _partitions = _read_registry(cursor)
+        for partition in _partitions:
+            cursor.execute(
+                f"ATTACH DATABASE ? AS {partition.schema}",
+                (f"file:{quote(partition.path)}?mode=ro",),
+            )
+    finally:
+        cursor.close()
+
+
+def partitions() -> Tuple[Partition, ...]:
+    # Архивы по возрастанию лет. Архивы есть только у основной базы: файлы
+    # отдельных журналов (app.shards) их не подключают
+    if current_ledger_id() is not None:
+        return ()
+    if _partitions is None:
+        # Реестр еще не прочитан - его загрузит первое соединение
+        from app.database import read_engine
+
+        with read_engine.connect():
+            pass
+    return _partitions or ()
+
+
+def schemas(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    newest_first: bool = True,
+) -> List[Optional[str]]:
+    # Где лежат записи периода: None - живая таблица, затем архивы, которые
+    # пересекаются с периодом. newest_first - от новых записей к старым
+    # (список), иначе от старых к новым (экспорт, колоночный снимок)
+    archived = [partition.schema for partition in partitions() if partition.overlaps(start_date, end_date)]
+    if newest_first:
+        return [None] + archived[::-1]
+    return archived + [None]
+
+
+def schemas_for_id(transaction_id: int) -> List[str]:
+    return [
+        partition.schema
+        for partition in partitions()
+        if partition.min_id <= transaction_id <= partition.max_id
+    ]
+
+
+def schema_options(schema: Optional[str]) -> dict:
+    # Параметры выполнения, направляющие запрос к таблицам архива
+    if schema is None:
+        return {}
+    return {"schema_translate_map": {None: schema}}
+
+
+def sealed_through() -> Optional[int]:
+    # Последний архивный год; записи за него и раньше только читаются
+    return max((partition.last_year for partition in partitions()), default=None)
+
+
+def is_sealed(value: date) -> bool:
+    through = sealed_through()
+    return through is not None and value.year <= through
+
+
+def check_dates(dates: Iterable[date]) -> None:
+    through = sealed_through()
+    if through is None:
+        return
+    for value in dates:
+        if value.year <= through:
+            raise ArchivedYearError(
+                f"Year {value.year} is archived, transactions up to {through} are read-only"
+            )
+
+
+def archived_record_error(transaction_id: int) -> ArchivedYearError:
+    return ArchivedYearError(f"Transaction {transaction_id} is archived and read-only")
+
+
+def reserve_ids(db: Session, count: int) -> Optional[int]:
+    # SQLite выдает новой записи max(id) + 1 по живой таблице. Если записи
+    # с наибольшими id ушли в архив (или удалены после переноса), новые id
+    # совпали бы с архивными - поэтому при архивах id назначаются явно.
+    # Наибольший id читается из БД один раз, дальше счетчик ведется в памяти:
+    # другие процессы в базу не пишут, пока работает сервер. Возвращает первый
+    # из count id подряд; откат транзакции оставляет в них пропуск
+    global _next_id
+    floor = max((partition.max_id for partition in partitions()), default=0)
+    if not floor:
+        return None
+    with _lock:
+        if _next_id is None:
+            live_max = db.execute(select(func.max(Transaction.id))).scalar() or 0
+            _next_id = max(live_max, floor) + 1
+        first_id = _next_id
+        _next_id += count
+    return first_id
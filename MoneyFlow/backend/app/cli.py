@@ -0,0 +1,139 @@
+import argparse
+import os
+import sys
+
+from app import server_lock
+from app.database import SessionLocal, init_db, use_ledger
+from app.repositories.rollup_repository import RollupRepository
+from app.search import rebuild_search_index
+from app.services.archive_service import ArchiveService
+from app.shards import InvalidLedgerError, check_ledger_id, ledger_path, shard_registry
+
+
+def rollup_rebuild(args) -> int:
+    # Кэш статистики и ETag сервера не узнали бы о пересборке, поэтому она
+    # выполняется только при остановленном сервере
+    with server_lock.exclusive("rebuilding rollups"), SessionLocal() as db:
+        days = RollupRepository(db).rebuild()
+    print(f"Rollup rebuilt: {days} days")
+    return 0
+
+
+def rollup_verify(args) -> int:
+    db = SessionLocal()
+    try:
+        drift = RollupRepository(db).verify()
+        if not drift:
+            print("Rollup is consistent with transactions")
+            return 0
+
+        for item in drift:
+            print(f"{item['date']}: expected={item['expected']} actual={item['actual']}")
+        print(f"Rollup drift detected on {len(drift)} days, run 'rollup rebuild' to fix it")
+        return 1
+    finally:
+        db.close()
+
+
+def search_rebuild(args) -> int:
+    # Заполняет индекс поиска заново по всем записям, например после
+    # восстановления базы из копии без индекса. Статистика с q зависит от
+    # индекса, поэтому, как и rollup rebuild, - при остановленном сервере
+    with server_lock.exclusive("rebuilding the search index"), SessionLocal.begin() as db:
+        rows = rebuild_search_index(db.connection())
+    print(f"Search index rebuilt: {rows} transactions")
+    return 0
+
+
+def archive_seal(args) -> int:
+    # Переносит закрытые годы по --through включительно в архивный файл.
+    # Выполняется только при остановленном сервере
+    try:
+        partition = ArchiveService().seal(args.through, vacuum=args.vacuum)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if partition is None:
+        print(f"No transactions up to {args.through} to archive")
+        return 0
+    print(
+        f"Archived {partition.row_count} transactions of {partition.first_year}-{partition.last_year} "
+        f"into {partition.file}"
+    )
+    return 0
+
+
+def archive_list(args) -> int:
+    partitions = ArchiveService().list()
+    if not partitions:
+        print("No archives")
+    for partition in partitions:
+        print(
+            f"archive_{partition.id}: {partition.first_year}-{partition.last_year}, "
+            f"{partition.row_count} transactions, {partition.file}"
+        )
+    return 0
+
+
+def _in_ledger(args) -> int:
+    # Команды обслуживания по --ledger выполняются над файлом журнала
+    # (см. app.shards), без него - над основной базой
+    try:
+        check_ledger_id(args.ledger)
+    except InvalidLedgerError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not os.path.exists(ledger_path(args.ledger)):
+        print(f"Error: ledger {args.ledger} not found in {ledger_path(args.ledger)}", file=sys.stderr)
+        return 1
+    try:
+        shard_registry.get(args.ledger)
+        with use_ledger(args.ledger):
+            return args.handler(args)
+    finally:
+        shard_registry.close_all()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    # Архивы есть только у основной базы, поэтому --ledger у rollup и search
+    ledger_option = argparse.ArgumentParser(add_help=False)
+    ledger_option.add_argument("--ledger", default=None, help="Ledger id, the main database by default")
+
+    rollup = commands.add_parser("rollup", help="Daily rollup maintenance")
+    rollup_commands = rollup.add_subparsers(dest="action", required=True)
+    rollup_commands.add_parser(
+        "rebuild", help="Recompute daily_totals from transactions", parents=[ledger_option]
+    ).set_defaults(handler=rollup_rebuild)
+    rollup_commands.add_parser(
+        "verify", help="Compare daily_totals with transactions", parents=[ledger_option]
+    ).set_defaults(handler=rollup_verify)
+
+    search = commands.add_parser("search", help="Full-text search index maintenance")
+    search_commands = search.add_subparsers(dest="action", required=True)
+    search_commands.add_parser(
+        "rebuild", help="Rebuild the FTS5 index from transactions", parents=[ledger_option]
+    ).set_defaults(handler=search_rebuild)
+
+    archive = commands.add_parser("archive", help="Read-only archives of closed years")
+    archive_commands = archive.add_subparsers(dest="action", required=True)
+    seal = archive_commands.add_parser("seal", help="Move transactions of closed years into an archive file")
+    seal.add_argument("--through", type=int, required=True, help="Last year to archive")
+    seal.add_argument("--vacuum", action="store_true", help="Compact the live database afterwards")
+    seal.set_defaults(handler=archive_seal)
+    archive_commands.add_parser("list", help="List archive files").set_defaults(handler=archive_list)
+
+    args = parser.parse_args(argv)
+    try:
+        if getattr(args, "ledger", None):
+            return _in_ledger(args)
+        init_db()
+        return args.handler(args)
+    except server_lock.DatabaseInUseError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,75 @@ from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
+    # sqlite+aiosqlite:///./moneyflow.db включает асинхронный стек. С базой
+    # работает один процесс сервера (app.server_lock): без --workers
     database_url: str = "sqlite:///./moneyflow.db"
     api_title: str = "MoneyFlow API"
     api_version: str = "1.0.0"
-    
+    # Импорт: размер пакета вставки и сколько ошибок строк возвращать в ответе
+    import_chunk_size: int = 1000
+    import_max_errors: int = 1000
+    # Экспорт: сколько строк читать из БД и отдавать клиенту за один раз
+    export_chunk_size: int = 1000
+    # Пакетные изменения: сколько операций принимает один запрос /bulk
+    bulk_max_operations: int = 10000
+    # SQLite: прагмы, применяемые к каждому соединению
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_cache_size: int = -20000  # отрицательное значение - размер в КиБ
+    sqlite_mmap_size: int = 268435456
+    sqlite_busy_timeout: int = 5000  # мс
+    # Пул соединений только для чтения (список, статистика) и единственное
+    # соединение-писатель, через которое проходят все изменения
+    read_pool_size: int = 8
+    write_pool_timeout: float = 30.0
+    # Сколько ответов статистики держать в кэше процесса (0 - кэш выключен)
+    statistics_cache_size: int = 256
+    # Сколько интервалов отдает /statistics/series с fill_gaps (больше - 422)
+    series_max_points: int = 10000
+    # Источник данных статистики: sql - агрегаты в SQLite, numpy - колоночный
+    # снимок журнала в памяти процесса (нужен пакет numpy)
+    statistics_engine: str = "sql"
+    # Заголовок Server-Timing с разбивкой времени ответа (db, validate,
+    # app, serialize); метрики /metrics собираются всегда
+    server_timing: bool = False
+    # Групповая фиксация записей: создания, изменения и удаления из параллельных
+    # запросов копятся в очереди и фиксируются одним commit на пакет - пакет
+    # закрывается по размеру или через write_batch_max_delay_ms после первой операции
+    write_batch_enabled: bool = False
+    write_batch_max_size: int = 64
+    write_batch_max_delay_ms: float = 2.0
+    # Поток событий /api/events: сколько последних изменений помнить для
+    # возобновления по Last-Event-ID, длина очереди одного клиента, число
+    # одновременных клиентов и интервал heartbeat в секундах
+    events_history_size: int = 1000
+    events_client_buffer: int = 256
+    events_max_clients: int = 100
+    events_heartbeat_seconds: float = 15.0
+    # Сжатие ответов (gzip, br при установленном пакете brotli): ответы
+    # короче compression_minimum_size байт отдаются без сжатия
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 5
+    compression_brotli_quality: int = 4
+    # Отдельные журналы (/api/ledgers/{ledger_id}/..., заголовок X-Ledger-Id):
+    # каталог их файлов SQLite, сколько журналов держать открытыми, через
+    # сколько секунд без запросов закрывать журнал и пул читателей журнала
+    ledgers_dir: str = "./ledgers"
+    ledger_max_open: int = 32
+    ledger_idle_seconds: float = 300.0
+    ledger_read_pool_size: int = 2
+
+    @property
+    def async_database(self) -> bool:
+        return "+aiosqlite" in self.database_url
+
+    @property
+    def sync_database_url(self) -> str:
+        # Синхронный движок нужен и в асинхронном режиме: создание схемы,
+        # команды обслуживания, импорт и экспорт
+        return self.database_url.replace("+aiosqlite", "")
+
     class Config:
         env_file = ".env"
 
@@ -1,17 +1,295 @@
-from sqlalchemy import create_engine
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.config import settings
 
-engine = create_engine(
-    settings.database_url, connect_args={"check_same_thread": False}
+# Журнал (ledger) текущего запроса: None - основная база moneyflow.db, иначе
+# id отдельного журнала со своим файлом SQLite (см. app.shards). Выставляется
+# LedgerMiddleware и копируется вместе с контекстом в пул потоков
+ledger_context: ContextVar[Optional[str]] = ContextVar("ledger_id", default=None)
+
+# Ключ в Session.info: какой движок журнала нужен сессии
+ENGINE_ROLE_KEY = "engine_role"
+
+
+def current_ledger_id() -> Optional[str]:
+    return ledger_context.get()
+
+
+@contextmanager
+def use_ledger(ledger_id: Optional[str]) -> Iterator[None]:
+    # Для кода вне запроса: поток групповой фиксации, команды CLI
+    token = ledger_context.set(ledger_id)
+    try:
+        yield
+    finally:
+        ledger_context.reset(token)
+
+
+class WriterBusyError(RuntimeError):
+    # Очередь к писателю журнала не подошла за write_pool_timeout (HTTP 503)
+    pass
+
+
+# Очередь к единственному соединению-писателю: у каждого журнала своя
+# блокировка процесса. Ее держат только на время транзакции изменения, и
+# освобождает ее тот же поток сразу после commit. Ожидание соединения в пуле
+# тут не годится: соединение, не возвращенное до завершения зависимости
+# get_db, держит очередь, пока потоки пула заняты ожидающими запросами
+_writer_locks: Dict[Optional[str], threading.Lock] = {}
+_writer_locks_guard = threading.Lock()
+# Асинхронные записи (aiosqlite) встают в свою очередь: блокировка потока
+# в цикле событий остановила бы все запросы, пока ждет писателя
+_async_writer_locks: Dict[Optional[str], asyncio.Lock] = {}
+
+
+def _writer_lock() -> threading.Lock:
+    ledger_id = ledger_context.get()
+    with _writer_locks_guard:
+        lock = _writer_locks.get(ledger_id)
+        if lock is None:
+            lock = _writer_locks[ledger_id] = threading.Lock()
+        return lock
+
+
+def drop_writer_locks(ledger_id: Optional[str]) -> None:
+    # Слушатель закрытия журнала (app.shards): закрытый журнал без запросов
+    # не держит блокировок, занятую оставляем ее владельцу
+    with _writer_locks_guard:
+        for locks in (_writer_locks, _async_writer_locks):
+            lock = locks.get(ledger_id)
+            if lock is not None and not lock.locked():
+                del locks[ledger_id]
+
+
+@contextmanager
+def write_transaction(db: Session) -> Iterator[Session]:
+    # Изменение целиком, от первого чтения до commit, под блокировкой писателя
+    # журнала текущего контекста. Сессия не должна начинать транзакцию раньше:
+    # соединение писателя берется из пула уже под блокировкой и возвращается
+    # при commit или откате
+    lock = _writer_lock()
+    if not lock.acquire(timeout=settings.write_pool_timeout):
+        raise WriterBusyError("Database writer is busy, retry later")
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        lock.release()
+
+
+@asynccontextmanager
+async def async_write_transaction(db) -> AsyncIterator[None]:
+    # То же, что write_transaction, для AsyncSession: изменение выполняется
+    # внутри через run_sync без commit, фиксирует его эта обертка
+    ledger_id = ledger_context.get()
+    lock = _async_writer_locks.get(ledger_id)
+    if lock is None:
+        lock = _async_writer_locks[ledger_id] = asyncio.Lock()
+    try:
+        await asyncio.wait_for(lock.acquire(), settings.write_pool_timeout)
+    except asyncio.TimeoutError:
+        raise WriterBusyError("Database writer is busy, retry later")
+    try:
+        yield
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        lock.release()
+
+
+def _sqlite_pragmas(read_only: bool) -> list:
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout)}",
+        f"PRAGMA synchronous = {settings.sqlite_synchronous}",
+        f"PRAGMA cache_size = {int(settings.sqlite_cache_size)}",
+        f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # Режим журнала хранится в самом файле БД, его выставляет писатель
+        pragmas.insert(0, f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+    return pragmas
+
+
+def configure_sqlite(
+    target_engine, read_only: bool = False, explicit_begin: bool = False, archives: bool = True
+) -> None:
+    if target_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(target_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in _sqlite_pragmas(read_only):
+            cursor.execute(pragma)
+        cursor.close()
+        if archives:
+            # Архивы закрытых лет подключаются к каждому соединению, до первой
+            # транзакции: внутри нее ATTACH запрещен
+            from app.archive import attach_archives
+
+            attach_archives(dbapi_connection)
+        if explicit_begin:
+            # pysqlite сам открывает транзакцию только перед DML, и SAVEPOINT
+            # в начале сессии зафиксировался бы отдельно. Поэтому транзакцией
+            # управляет SQLAlchemy: BEGIN в начале каждой транзакции сессии
+            dbapi_connection.isolation_level = None
+
+    if explicit_begin:
+        @event.listens_for(target_engine, "begin")
+        def begin_transaction(connection):
+            connection.exec_driver_sql("BEGIN")
+
+
+def create_write_engine(url: str, archives: bool = True):
+    # Писатель: одно соединение, поэтому изменения выполняются строго по очереди
+    # и не получают "database is locked" друг от друга
+    target = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.write_pool_timeout,
+    )
+    configure_sqlite(target, explicit_begin=True, archives=archives)
+    return target
+
+
+def create_read_engine(url: str, pool_size: int, archives: bool = True):
+    # Читатели: пул соединений только для чтения; в режиме WAL они не ждут писателя
+    target = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=pool_size,
+        max_overflow=0,
+    )
+    configure_sqlite(target, read_only=True, archives=archives)
+    return target
+
+
+def create_async_database_engine(url: str, archives: bool = True, pooled: bool = True):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    # Без пула соединения aiosqlite закрываются после каждой сессии, и движок
+    # можно освободить из любого потока, не дожидаясь цикла событий
+    target = create_async_engine(url) if pooled else create_async_engine(url, poolclass=NullPool)
+    configure_sqlite(target.sync_engine, archives=archives)
+    return target
+
+
+class RoutedSession(Session):
+    # Сессия выбирает движок по журналу текущего запроса: основная база
+    # или файл отдельного журнала из реестра app.shards
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        ledger_id = ledger_context.get()
+        if ledger_id is None or ENGINE_ROLE_KEY not in self.info:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        from app.shards import shard_registry
+
+        return shard_registry.get(ledger_id).bind_for(self.info[ENGINE_ROLE_KEY])
+
+
+engine = create_write_engine(settings.sync_database_url)
+# expire_on_commit=False: ответ собирается из объектов, загруженных до commit,
+# без нового чтения через соединение писателя после него
+SessionLocal = sessionmaker(
+    class_=RoutedSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+    info={ENGINE_ROLE_KEY: "write"},
+)
+
+read_engine = create_read_engine(settings.sync_database_url, settings.read_pool_size)
+ReadSessionLocal = sessionmaker(
+    class_=RoutedSession, autocommit=False, autoflush=False, bind=read_engine, info={ENGINE_ROLE_KEY: "read"}
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Асинхронный движок (aiosqlite) создается, только если он выбран в database_url
+async_engine = None
+AsyncSessionLocal = None
+if settings.async_database:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = create_async_database_engine(settings.database_url)
+    # expire_on_commit=False, как у SessionLocal: ответ собирается из объектов
+    # после commit, а ленивая загрузка вне run_sync в async невозможна
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        sync_session_class=RoutedSession,
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        info={ENGINE_ROLE_KEY: "async"},
+    )
 
 Base = declarative_base()
 
 
+def _add_missing_columns(target_engine) -> None:
+    # create_all не меняет существующие таблицы: новые столбцы добавляем через
+    # ALTER TABLE ADD COLUMN. SQLite допускает в нем только постоянное значение
+    # по умолчанию, поэтому столбцы вроде updated_at у старых строк остаются NULL
+    with target_engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(target_engine.dialect)}"
+                default = column.server_default
+                if default is not None and isinstance(default.arg, str):
+                    ddl += f" DEFAULT '{default.arg}'"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                connection.execute(text(ddl))
+
+
+# Индексы старых версий схемы, которые перекрыты составными: планировщик
+# выбирал одностолбцовый ix_transactions_date вместо (date, id)
+OBSOLETE_INDEXES = ("ix_transactions_date",)
+
+
+def init_db(target_engine=None):
+    # Модели регистрируются в Base.metadata при импорте
+    import app.models  # noqa: F401
+
+    # По умолчанию - основная база; файлы журналов создаются тем же путем
+    target_engine = target_engine or engine
+    # create_all не добавляет индексы и столбцы в уже существующие таблицы,
+    # поэтому недостающие создаем отдельно
+    Base.metadata.create_all(bind=target_engine)
+    _add_missing_columns(target_engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=target_engine, checkfirst=True)
+    with target_engine.begin() as connection:
+        for name in OBSOLETE_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    if target_engine.dialect.name == "sqlite":
+        from app.search import ensure_search_index
+
+        with target_engine.begin() as connection:
+            ensure_search_index(connection)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -20,4 +298,14 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,172 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.database import current_ledger_id
+from app.models.ledger_state import LedgerState
+from app.shards import shard_registry
+
+# Ключ в Session.info, где копятся изменения до commit
+PENDING_CHANGES_KEY = "ledger_changes"
+# Ключ в Session.info с сохраняемой версией текущей транзакции БД
+SYNC_VERSION_KEY = "ledger_sync_version"
+
+
+@dataclass(frozen=True)
+class LedgerChange:
+    action: str  # created, updated, deleted, imported, bulk
+    transaction_ids: Tuple[int, ...]
+    # Все затронутые даты, при переносе записи - и старая, и новая
+    dates: Tuple[date, ...]
+    version: int = 0
+    # Состояние записей после изменения: (id, date, type, amount, category).
+    # None - состав изменения неизвестен (импорт, пересборка агрегатов)
+    rows: Optional[Tuple[tuple, ...]] = None
+    # Сохраняемая версия (sync_version) зафиксированной транзакции, с нее
+    # клиент продолжает /changes; None - транзакция не меняла записи
+    sync_version: Optional[int] = None
+    # Журнал, в который записано изменение; None - основная база
+    ledger_id: Optional[str] = None
+
+
+# Версия журнала в памяти процесса: растет с каждым зафиксированным изменением,
+# у каждого журнала (app.shards) своя. epoch отличает запуски процесса, чтобы
+# ETag после перезапуска не совпал с выданным раньше. Версия закрытого
+# реестром журнала забывается; при следующем открытии она продолжается с
+# наибольшей выданной процессом (_version_floor), чтобы ETag и id событий
+# прежнего открытия не совпали с новыми. Основная база не закрывается
+epoch = format(int(time.time() * 1000), "x")
+_versions: Dict[Optional[str], int] = {None: 0}
+_version_floor = 0
+_version_lock = threading.Lock()
+_listeners: List[Callable[[LedgerChange], None]] = []
+
+
+def current_version() -> int:
+    # Версия журнала текущего запроса
+    return _versions.get(current_ledger_id(), _version_floor)
+
+
+def version_tag(version: int, ledger_id: Optional[str] = None) -> str:
+    # Основа ETag и id событий: у журналов с одинаковой версией теги различаются
+    if ledger_id is None:
+        return f"{epoch}-{version}"
+    return f"{epoch}-{ledger_id}-{version}"
+
+
+def persisted_version(db: Session) -> int:
+    # Версия, сохраненная в БД: в отличие от current_version не сбрасывается
+    # при перезапуске, по ней клиенты синхронизируются через /changes
+    version = db.execute(select(LedgerState.version).where(LedgerState.id == 1)).scalar()
+    return version or 0
+
+
+def sync_version(db: Session) -> int:
+    # Номер версии для изменений текущей транзакции БД: один на commit, поэтому
+    # все строки пакета импорта получают общий номер. Счетчик увеличивается UPDATE-ом,
+    # то есть под блокировкой записи SQLite: два commit не получат один номер
+    version = db.info.get(SYNC_VERSION_KEY)
+    if version is None:
+        result = db.execute(
+            update(LedgerState).where(LedgerState.id == 1).values(version=LedgerState.version + 1)
+        )
+        if result.rowcount == 0:
+            db.execute(insert(LedgerState).values(id=1, version=1))
+        version = persisted_version(db)
+        db.info[SYNC_VERSION_KEY] = version
+    return version
+
+
+def subscribe(listener: Callable[[LedgerChange], None]) -> None:
+    _listeners.append(listener)
+
+
+def record(
+    db: Session,
+    action: str,
+    transaction_ids: Iterable[int],
+    dates: Iterable[date],
+    rows: Optional[Iterable[tuple]] = None,
+) -> None:
+    # Изменение публикуется только после успешного commit этой сессии
+    db.info.setdefault(PENDING_CHANGES_KEY, []).append(
+        (
+            action,
+            tuple(transaction_ids),
+            tuple(sorted(set(dates))),
+            tuple(rows) if rows is not None else None,
+        )
+    )
+
+
+@contextmanager
+def savepoint(db: Session) -> Iterator[None]:
+    # Вложенная транзакция (SAVEPOINT): при ее откате из очереди публикации
+    # убираются и изменения, записанные внутри нее
+    pending = db.info.setdefault(PENDING_CHANGES_KEY, [])
+    mark = len(pending)
+    had_version = SYNC_VERSION_KEY in db.info
+    try:
+        with db.begin_nested():
+            yield
+    except Exception:
+        del pending[mark:]
+        # Увеличение счетчика версий откатилось вместе с SAVEPOINT
+        if not had_version:
+            db.info.pop(SYNC_VERSION_KEY, None)
+        raise
+
+
+def _publish(changes: list, sync_version: Optional[int] = None) -> None:
+    # commit выполняется в контексте запроса (или use_ledger), поэтому журнал
+    # изменения - журнал текущего контекста
+    ledger_id = current_ledger_id()
+    for action, transaction_ids, dates, rows in changes:
+        with _version_lock:
+            version = _versions.get(ledger_id, _version_floor) + 1
+            _versions[ledger_id] = version
+            change = LedgerChange(action, transaction_ids, dates, version, rows, sync_version, ledger_id)
+        for listener in _listeners:
+            listener(change)
+
+
+def _open_ledger(shard) -> None:
+    with _version_lock:
+        _versions.setdefault(shard.ledger_id, _version_floor)
+
+
+def _close_ledger(ledger_id: str) -> None:
+    global _version_floor
+    with _version_lock:
+        version = _versions.pop(ledger_id, None)
+        if version is not None:
+            _version_floor = max(_version_floor, version)
+
+
+shard_registry.on_open(_open_ledger)
+shard_registry.on_close(_close_ledger)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    # Событие приходит и при RELEASE SAVEPOINT - публикуем только настоящий commit
+    if session.in_nested_transaction():
+        return
+    sync_version = session.info.pop(SYNC_VERSION_KEY, None)
+    changes = session.info.pop(PENDING_CHANGES_KEY, None)
+    if changes:
+        _publish(changes, sync_version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    session.info.pop(SYNC_VERSION_KEY, None)
+    session.info.pop(PENDING_CHANGES_KEY, None)
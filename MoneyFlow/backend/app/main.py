@@ -1,21 +1,48 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 
+from app import server_lock
+from app.archive import ArchivedYearError
 from app.config import settings
-from app.database import engine, Base
+from app.database import WriterBusyError, engine, read_engine, async_engine, SessionLocal, init_db
 from app.api.routes import api_router
-
-# Создаем таблицы при запуске
-Base.metadata.create_all(bind=engine)
-
+from app.metrics import MetricsMiddleware, instrument_engine, registry
+from app.compression import CompressionMiddleware
+from app.shards import LedgerMiddleware, shard_registry
+from app.repositories.rollup_repository import RollupRepository
+from app.services.statistics_cache import statistics_cache
+from app.services.statistics_service import SeriesTooLargeError
+from app.services.columnar_engine import columnar_engine
+from app.services.write_batcher import write_batcher
+from app.services.event_broker import event_broker
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # При запуске
+    # При запуске - блокировка базы на все время работы (app.server_lock):
+    # второй процесс, в том числе воркер того же сервера, не запустится
+    database_lock = server_lock.acquire_server()
+    try:
+        # Создаем таблицы и индексы - уже под блокировкой, иначе воркеры
+        # создавали бы схему одновременно и падали на "database is locked"
+        init_db()
+        # Заполняем дневные агрегаты для баз, созданных до их появления
+        with SessionLocal() as db:
+            RollupRepository(db).ensure_built()
+    except BaseException:
+        server_lock.release(database_lock)
+        raise
     yield
-    # При завершении - закрываем соединения с БД
+    # При завершении - фиксируем очередь записей и закрываем соединения с БД
+    if write_batcher is not None:
+        write_batcher.close()
+    shard_registry.close_all()
     engine.dispose()
+    read_engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    server_lock.release(database_lock)
 
 
 app = FastAPI(
@@ -24,6 +51,26 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Счетчики SQL-запросов и их времени для метрик текущего запроса
+instrument_engine(engine)
+instrument_engine(read_engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+
+
+def _instrument_shard(shard) -> None:
+    instrument_engine(shard.engine)
+    instrument_engine(shard.read_engine)
+    if shard.async_engine is not None:
+        instrument_engine(shard.async_engine.sync_engine)
+
+
+shard_registry.on_open(_instrument_shard)
+
+# Выбор журнала - самым внутренним слоем: предварительные запросы CORS
+# журнал не открывают, а метрики видят путь уже без /ledgers/{ledger_id}
+app.add_middleware(LedgerMiddleware)
+
 # Настройка CORS для работы с frontend
 app.add_middleware(
     CORSMiddleware,
@@ -31,15 +78,88 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Ledger-Version", "ETag"],
 )
 
+# Сжатие - внутри метрик, чтобы его время входило в замер запроса
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+
+# Метрики добавляются последними, чтобы замерять и CORS
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix="/api")
 
+
+@app.exception_handler(ArchivedYearError)
+async def archived_year_error(request: Request, exc: ArchivedYearError):
+    # Записи архивных лет только читаются (см. app.archive)
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+
+@app.exception_handler(WriterBusyError)
+async def writer_busy_error(request: Request, exc: WriterBusyError):
+    # Запись не дождалась писателя за write_pool_timeout: клиент может повторить
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(SeriesTooLargeError)
+async def series_too_large_error(request: Request, exc: SeriesTooLargeError):
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
+
+
+def _pool_stats(target_engine) -> dict:
+    pool = target_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+
 @app.get("/")
 def read_root():
     return {"message": "MoneyFlow API", "version": settings.api_version}
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    health = {
+        "status": "ok",
+        "pools": {"writer": _pool_stats(engine), "reader": _pool_stats(read_engine)},
+        "statistics_cache": statistics_cache.stats(),
+        "events": event_broker.stats(),
+        "ledgers": shard_registry.stats(),
+    }
+    if settings.statistics_engine == "numpy":
+        health["columnar_engine"] = columnar_engine.stats()
+    if write_batcher is not None:
+        health["write_batcher"] = write_batcher.stats()
+    return health
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Формат текстовой выдачи Prometheus 0.0.4
+    cache = statistics_cache.stats()
+    gauges = {
+        "moneyflow_statistics_cache_entries": [({}, cache["size"])],
+        "moneyflow_statistics_cache_hits": [({}, cache["hits"])],
+        "moneyflow_statistics_cache_misses": [({}, cache["misses"])],
+        "moneyflow_statistics_cache_evictions": [({}, cache["evictions"])],
+        "moneyflow_ledger_version": [({}, cache["ledger_version"])],
+        "moneyflow_event_stream_clients": [({}, event_broker.stats()["clients"])],
+        "moneyflow_ledger_shards_open": [({}, shard_registry.stats()["open"])],
+        "moneyflow_db_pool_checked_out": [
+            ({"pool": name}, _pool_stats(target)["checked_out"])
+            for name, target in (("writer", engine), ("reader", read_engine))
+        ],
+    }
+    return PlainTextResponse(
+        registry.render(gauges), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
@@ -0,0 +1,299 @@
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+from app.config import settings
+
+# Границы корзин гистограмм, секунды и штуки
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+@dataclass
+class RequestMetrics:
+    # Время по фазам одного запроса; db и validate набираются из разных потоков
+    # (пул потоков FastAPI), поэтому объект передается через contextvar
+    route: Optional[str] = None
+    db_seconds: float = 0.0
+    db_queries: int = 0
+    endpoint_seconds: float = 0.0
+    handler_seconds: float = 0.0
+    phases: Dict[str, float] = field(default_factory=dict)
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_duration: Dict[Tuple[str, str], Histogram] = {}
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.db_duration: Dict[Tuple[str, str], Histogram] = {}
+        self.db_queries: Dict[Tuple[str, str], Histogram] = {}
+        self.phase_seconds: Dict[Tuple[str, str, str], float] = {}
+
+    def record_request(self, method: str, status: int, duration: float, metrics: RequestMetrics) -> None:
+        route = metrics.route or "unmatched"
+        key = (method, route)
+        with self._lock:
+            self.request_duration.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(duration)
+            status_key = (method, route, str(status))
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            self.db_duration.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(metrics.db_seconds)
+            self.db_queries.setdefault(key, Histogram(QUERY_COUNT_BUCKETS)).observe(metrics.db_queries)
+            for phase, seconds in _phase_breakdown(metrics).items():
+                phase_key = (method, route, phase)
+                self.phase_seconds[phase_key] = self.phase_seconds.get(phase_key, 0.0) + seconds
+
+    def render(self, extra_gauges: Dict[str, List[Tuple[dict, float]]]) -> str:
+        lines: List[str] = []
+        with self._lock:
+            _render_histograms(
+                lines,
+                "moneyflow_http_request_duration_seconds",
+                "Request latency by route",
+                self.request_duration,
+            )
+            lines.append("# HELP moneyflow_http_requests_total Requests by route and status")
+            lines.append("# TYPE moneyflow_http_requests_total counter")
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f"moneyflow_http_requests_total{_labels(method=method, route=route, status=status)} {count}"
+                )
+            _render_histograms(
+                lines,
+                "moneyflow_db_duration_seconds",
+                "SQL execution time per request",
+                self.db_duration,
+            )
+            _render_histograms(
+                lines,
+                "moneyflow_db_queries_per_request",
+                "SQL statements per request (N+1 shows up as a high count)",
+                self.db_queries,
+            )
+            lines.append("# HELP moneyflow_request_phase_seconds_total Time spent per request phase")
+            lines.append("# TYPE moneyflow_request_phase_seconds_total counter")
+            for (method, route, phase), seconds in sorted(self.phase_seconds.items()):
+                lines.append(
+                    f"moneyflow_request_phase_seconds_total{_labels(method=method, route=route, phase=phase)} {seconds:.6f}"
+                )
+        for name, samples in extra_gauges.items():
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(**labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels: str) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _render_histograms(lines: List[str], name: str, help_text: str, histograms: dict) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=bound)} {cumulative}")
+        cumulative += histogram.counts[-1]
+        lines.append(f"{name}_bucket{_labels(method=method, route=route, le='+Inf')} {cumulative}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {histogram.total:.6f}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {cumulative}")
+
+
+def _phase_breakdown(metrics: RequestMetrics) -> Dict[str, float]:
+    # db - выполнение SQL; validate - преобразование в Pydantic-модели в сервисах;
+    # app - остальная работа обработчика (гидратация ORM, расчеты);
+    # serialize - разбор запроса, проверка response_model и сборка JSON в FastAPI.
+    # Фазы, замеренные через phase() внутри обработчика, вычитаются из app
+    measured = sum(metrics.phases.values())
+    breakdown = {
+        "db": metrics.db_seconds,
+        "validate": 0.0,
+        "app": max(0.0, metrics.endpoint_seconds - metrics.db_seconds - measured),
+        "serialize": max(0.0, metrics.handler_seconds - metrics.endpoint_seconds),
+    }
+    for phase, seconds in metrics.phases.items():
+        breakdown[phase] = breakdown.get(phase, 0.0) + seconds
+    return breakdown
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    # Отдельно учитываемая фаза запроса (например, validate в сервисах)
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.phases[name] = metrics.phases.get(name, 0.0) + time.perf_counter() - started
+
+
+def instrument_engine(target_engine) -> None:
+    # Время и число SQL-запросов текущего HTTP-запроса
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(target_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.db_seconds += time.perf_counter() - started
+            metrics.db_queries += 1
+
+
+class TimedRoute(APIRoute):
+    # Маршрут, который замеряет время самого обработчика и весь путь FastAPI
+    # (зависимости, проверка response_model, JSON) и запоминает шаблон пути
+    # для меток метрик
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        route_path = self.path_format
+
+        async def timed_handler(request):
+            metrics = _current.get()
+            if metrics is None:
+                return await handler(request)
+            metrics.route = _route_template(request.scope["path"], route_path)
+            started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                metrics.handler_seconds += time.perf_counter() - started
+
+        return timed_handler
+
+
+def _route_template(path: str, route_path: str) -> str:
+    # FastAPI может хранить у маршрута путь без префикса роутера ("/monthly");
+    # префикс восстанавливается из фактического пути по числу сегментов шаблона,
+    # параметры пути остаются в виде {name}, чтобы не плодить метки
+    segments = [segment for segment in path.split("/") if segment]
+    template_segments = [segment for segment in route_path.split("/") if segment]
+    prefix = segments[: len(segments) - len(template_segments)]
+    return "".join(f"/{segment}" for segment in prefix) + route_path
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    # Обертка сохраняет сигнатуру (functools.wraps) и вид функции: sync
+    # обработчики FastAPI по-прежнему выполняет в пуле потоков. include_router
+    # пересоздает маршруты с уже обернутым обработчиком - второй раз не оборачиваем
+    if getattr(endpoint, "_timed", False):
+        return endpoint
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _add_endpoint_time(started)
+    else:
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _add_endpoint_time(started)
+    timed._timed = True
+    return timed
+
+
+def _add_endpoint_time(started: float) -> None:
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.endpoint_seconds += time.perf_counter() - started
+
+
+def _server_timing(metrics: RequestMetrics, total: float) -> bytes:
+    entries = []
+    for name, seconds in _phase_breakdown(metrics).items():
+        description = f';desc="{metrics.db_queries} queries"' if name == "db" else ""
+        entries.append(f"{name};dur={seconds * 1000:.2f}{description}")
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries).encode()
+
+
+class MetricsMiddleware:
+    # Чистый ASGI middleware: не буферизует тело ответа и не мешает потоковым
+    # ответам; задержка считается до последнего отправленного фрагмента
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append(
+                        (b"server-timing", _server_timing(metrics, time.perf_counter() - started))
+                    )
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            # Маршруты вне TimedRoute (/health, /metrics) берут шаблон у Starlette
+            if metrics.route is None and scope.get("route") is not None:
+                metrics.route = getattr(scope["route"], "path", None)
+            registry.record_request(
+                scope["method"], status, time.perf_counter() - started, metrics
+            )
+            _current.reset(token)
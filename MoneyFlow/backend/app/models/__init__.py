@@ -1,6 +1,17 @@
 from app.models.transaction import Transaction
+from app.models.daily_total import DailyTotal
+from app.models.balance_checkpoint import BalanceCheckpoint
+from app.models.category_daily_total import CategoryDailyTotal
+from app.models.transaction_tombstone import TransactionTombstone
+from app.models.ledger_state import LedgerState
+from app.models.archive_partition import ArchivePartition
 
-__all__ = ["Transaction"]
-
-
-
+__all__ = [
+    "Transaction",
+    "DailyTotal",
+    "BalanceCheckpoint",
+    "CategoryDailyTotal",
+    "TransactionTombstone",
+    "LedgerState",
+    "ArchivePartition",
+]
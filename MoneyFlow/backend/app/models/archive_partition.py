@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+# Реестр архивов: закрытые годы, перенесенные из transactions в отдельный
+# файл SQLite только для чтения (см. app.archive)
+class ArchivePartition(Base):
+    __tablename__ = "archive_partitions"
+
+    id = Column(Integer, primary_key=True)
+    # Имя файла архива в каталоге основной базы
+    file = Column(String, nullable=False)
+    first_year = Column(Integer, nullable=False)
+    last_year = Column(Integer, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    # Диапазон id записей архива: поиск записи по id заглядывает только сюда
+    min_id = Column(Integer, nullable=False)
+    max_id = Column(Integer, nullable=False)
+    sealed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Float, Date
+
+from app.database import Base
+
+
+# Накопленные суммы на конец месяца: month - первое число месяца,
+# значения включают все транзакции до конца этого месяца
+class BalanceCheckpoint(Base):
+    __tablename__ = "balance_checkpoints"
+
+    month = Column(Date, primary_key=True)
+    income = Column(Float, nullable=False, default=0.0)
+    expense = Column(Float, nullable=False, default=0.0)
+    adjustment = Column(Float, nullable=False, default=0.0)
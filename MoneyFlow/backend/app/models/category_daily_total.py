@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Float, Date, Index
+
+from app.database import Base
+
+
+# Суммы за день по категории и типу. Транзакции без категории хранятся
+# с пустой строкой: значение входит в первичный ключ и не может быть NULL
+class CategoryDailyTotal(Base):
+    __tablename__ = "category_daily_totals"
+    __table_args__ = (
+        # Покрывающий индекс для GROUP BY category по типу и диапазону дат:
+        # суммы читаются из индекса, без обращения к строкам таблицы
+        Index(
+            "ix_category_daily_totals_covering",
+            "type", "category", "date", "amount", "count",
+        ),
+    )
+
+    date = Column(Date, primary_key=True)
+    category = Column(String, primary_key=True, default="")
+    type = Column(String, primary_key=True)
+    amount = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
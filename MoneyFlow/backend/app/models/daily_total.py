@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, Float, Date
+
+from app.database import Base
+
+
+# Дневной агрегат по транзакциям, обновляется в той же транзакции БД,
+# что и сама запись (см. RollupRepository)
+class DailyTotal(Base):
+    __tablename__ = "daily_totals"
+
+    date = Column(Date, primary_key=True)
+    income = Column(Float, nullable=False, default=0.0)
+    expense = Column(Float, nullable=False, default=0.0)
+    adjustment = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
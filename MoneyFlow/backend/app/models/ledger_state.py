@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer
+
+from app.database import Base
+
+
+# Единственная строка со счетчиком версий журнала, который сохраняется
+# между запусками: каждый commit с изменениями транзакций получает
+# следующий номер (см. ledger.sync_version)
+class LedgerState(Base):
+    __tablename__ = "ledger_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
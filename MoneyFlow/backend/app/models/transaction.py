@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Enum, Index
 from sqlalchemy.sql import func
 import enum
 
@@ -13,14 +13,26 @@ class TransactionType(str, enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Упорядоченная выдача списка и keyset-пагинация по (date, id)
+        Index("ix_transactions_date_id", "date", "id"),
+        # Фильтр по типу с сортировкой или диапазоном по дате
+        Index("ix_transactions_type_date", "type", "date"),
+        # Выборка изменений для синхронизации клиентов (/changes)
+        Index("ix_transactions_version", "version"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    date = Column(Date, nullable=False, index=True)
+    # Отдельный индекс по date не нужен: его заменяет ix_transactions_date_id
+    date = Column(Date, nullable=False)
     type = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
     category = Column(String, nullable=True)
     description = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Версия журнала, в которой запись создана или изменена последний раз
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
 
 
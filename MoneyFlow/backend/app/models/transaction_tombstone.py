@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+# След удаленной транзакции для синхронизации клиентов (/changes): версия,
+# в которой запись была удалена
+class TransactionTombstone(Base):
+    __tablename__ = "transaction_tombstones"
+
+    transaction_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, index=True)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
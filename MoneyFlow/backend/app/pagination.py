@@ -0,0 +1,21 @@
+import base64
+import binascii
+from datetime import date
+from typing import Tuple
+
+
+# Курсор keyset-пагинации: непрозрачная строка с ключом (date, id)
+# последней выданной записи
+def encode_cursor(cursor_date: date, cursor_id: int) -> str:
+    raw = f"{cursor_date.isoformat()}:{cursor_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        cursor_date, cursor_id = raw.split(":")
+        return date.fromisoformat(cursor_date), int(cursor_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
@@ -1,6 +1,5 @@
 from app.repositories.transaction_repository import TransactionRepository
+from app.repositories.rollup_repository import RollupRepository
+from app.repositories.async_transaction_repository import AsyncTransactionRepository
 
-__all__ = ["TransactionRepository"]
-
-
-
+__all__ = ["TransactionRepository", "RollupRepository", "AsyncTransactionRepository"]
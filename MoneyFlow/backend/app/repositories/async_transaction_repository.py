@@ -0,0 +1,95 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import List, Optional, Tuple
+
+from app.database import async_write_transaction
+from app.models.transaction import Transaction
+from app.repositories.transaction_repository import TransactionRepository
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+
+
+class AsyncTransactionRepository:
+    # Асинхронная обертка над TransactionRepository: SQL и поддержка агрегатов
+    # остаются в одном месте, а запросы выполняются через AsyncSession.run_sync
+    # поверх aiosqlite, не занимая пул потоков. Изменения репозиторий только
+    # сбрасывает в БД (autocommit=False), а фиксирует их async_write_transaction
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, transaction: TransactionCreate) -> Transaction:
+        async with async_write_transaction(self.db):
+            return await self.db.run_sync(
+                lambda session: TransactionRepository(session, autocommit=False).create(transaction)
+            )
+
+    async def get_by_id(self, transaction_id: int) -> Optional[Transaction]:
+        return await self.db.run_sync(
+            lambda session: TransactionRepository(session).get_by_id(transaction_id)
+        )
+
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: Optional[str] = None,
+        after: Optional[Tuple[date, int]] = None,
+        q: Optional[str] = None,
+        order: str = "date",
+    ) -> List[Transaction]:
+        return await self.db.run_sync(
+            lambda session: TransactionRepository(session).get_all(
+                skip=skip,
+                limit=limit,
+                start_date=start_date,
+                end_date=end_date,
+                transaction_type=transaction_type,
+                after=after,
+                q=q,
+                order=order,
+            )
+        )
+
+    async def get_rows(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: Optional[str] = None,
+        after: Optional[Tuple[date, int]] = None,
+        q: Optional[str] = None,
+        order: str = "date",
+    ) -> List[tuple]:
+        return await self.db.run_sync(
+            lambda session: TransactionRepository(session).get_rows(
+                skip=skip,
+                limit=limit,
+                start_date=start_date,
+                end_date=end_date,
+                transaction_type=transaction_type,
+                after=after,
+                q=q,
+                order=order,
+            )
+        )
+
+    async def get_sync_version(self) -> int:
+        return await self.db.run_sync(
+            lambda session: TransactionRepository(session).get_sync_version()
+        )
+
+    async def update(
+        self, transaction_id: int, transaction: TransactionUpdate
+    ) -> Optional[Transaction]:
+        async with async_write_transaction(self.db):
+            return await self.db.run_sync(
+                lambda session: TransactionRepository(session, autocommit=False).update(transaction_id, transaction)
+            )
+
+    async def delete(self, transaction_id: int) -> bool:
+        async with async_write_transaction(self.db):
+            return await self.db.run_sync(
+                lambda session: TransactionRepository(session, autocommit=False).delete(transaction_id)
+            )
@@ -0,0 +1,654 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import func, and_, case, cast, delete, insert, select, update, bindparam, Date, Integer, String
+from collections import defaultdict
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from app import archive, ledger
+from app.models.transaction import Transaction
+from app.models.daily_total import DailyTotal
+from app.models.balance_checkpoint import BalanceCheckpoint
+from app.models.category_daily_total import CategoryDailyTotal
+from app.search import search_ids
+
+# Допустимая погрешность при сверке сумм с плавающей точкой
+ROLLUP_TOLERANCE = 1e-6
+
+TRANSACTION_TYPES = ("income", "expense", "adjustment")
+
+DAILY_COLUMNS = ("date", "income", "expense", "adjustment", "count")
+CATEGORY_COLUMNS = ("date", "category", "type", "amount", "count")
+
+# Начало интервала группировки для даты (SQLite): неделя начинается с понедельника
+BUCKET_MODIFIERS = {
+    "week": ("weekday 0", "-6 days"),
+    "month": ("start of month",),
+    "year": ("start of year",),
+}
+
+
+def _type_total(transaction_type: str):
+    return func.coalesce(
+        func.sum(case((Transaction.type == transaction_type, Transaction.amount), else_=0.0)),
+        0.0,
+    )
+
+
+def _aggregate_transactions():
+    # Агрегат по сырым транзакциям с теми же колонками, что и в daily_totals
+    return select(
+        Transaction.date,
+        *(_type_total(transaction_type) for transaction_type in TRANSACTION_TYPES),
+        func.count(Transaction.id),
+    ).group_by(Transaction.date)
+
+
+def _aggregate_categories():
+    # Агрегат по сырым транзакциям в разрезе дня, категории и типа
+    return select(
+        Transaction.date,
+        func.coalesce(Transaction.category, ""),
+        Transaction.type,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id),
+    ).group_by(Transaction.date, func.coalesce(Transaction.category, ""), Transaction.type)
+
+
+def category_key(category: Optional[str]) -> str:
+    return category or ""
+
+
+def bucket_start(column, granularity: str):
+    if granularity == "day":
+        return column
+    if granularity == "quarter":
+        # Готового модификатора нет: от начала месяца отступаем на (месяц - 1) % 3 месяцев
+        months_back = (cast(func.strftime("%m", column), Integer) - 1) % 3
+        return func.date(column, "start of month", "-" + cast(months_back, String) + " months", type_=Date)
+    return func.date(column, *BUCKET_MODIFIERS[granularity], type_=Date)
+
+
+def bucket_floor(value: date, granularity: str) -> date:
+    # То же, что bucket_start, но для даты в Python (заполнение пропусков)
+    if granularity == "week":
+        return value - timedelta(days=value.weekday())
+    if granularity == "month":
+        return value.replace(day=1)
+    if granularity == "quarter":
+        return value.replace(month=value.month - (value.month - 1) % 3, day=1)
+    if granularity == "year":
+        return value.replace(month=1, day=1)
+    return value
+
+
+def next_bucket(value: date, granularity: str) -> date:
+    if granularity == "day":
+        return value + timedelta(days=1)
+    if granularity == "week":
+        return value + timedelta(days=7)
+    months = {"month": 1, "quarter": 3, "year": 12}[granularity]
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def bucket_count(start_date: date, end_date: date, granularity: str) -> int:
+    # Число интервалов ряда с пропусками от start_date до end_date включительно
+    first, last = bucket_floor(start_date, granularity), bucket_floor(end_date, granularity)
+    if granularity in ("day", "week"):
+        return (last - first).days // (7 if granularity == "week" else 1) + 1
+    months = {"month": 1, "quarter": 3, "year": 12}[granularity]
+    return ((last.year - first.year) * 12 + last.month - first.month) // months + 1
+
+
+@lru_cache(maxsize=None)
+def _daily_upsert():
+    # Выражения пути записи строятся один раз: сборка excluded, select и
+    # update на каждой записи заметно дороже самого выполнения в SQLite
+    table = DailyTotal.__table__
+    statement = sqlite_insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.date],
+        set_={
+            "income": table.c.income + statement.excluded.income,
+            "expense": table.c.expense + statement.excluded.expense,
+            "adjustment": table.c.adjustment + statement.excluded.adjustment,
+            "count": table.c.count + statement.excluded.count,
+        },
+    )
+
+
+@lru_cache(maxsize=None)
+def _category_upsert():
+    table = CategoryDailyTotal.__table__
+    statement = sqlite_insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.date, table.c.category, table.c.type],
+        set_={
+            "amount": table.c.amount + statement.excluded.amount,
+            "count": table.c.count + statement.excluded.count,
+        },
+    )
+
+
+@lru_cache(maxsize=None)
+def _checkpoints_from():
+    table = BalanceCheckpoint.__table__
+    return select(table).where(table.c.month >= bindparam("first_month")).order_by(table.c.month)
+
+
+@lru_cache(maxsize=None)
+def _checkpoint_before():
+    table = BalanceCheckpoint.__table__
+    return (
+        select(table.c.income, table.c.expense, table.c.adjustment)
+        .where(table.c.month < bindparam("month"))
+        .order_by(table.c.month.desc())
+        .limit(1)
+    )
+
+
+@lru_cache(maxsize=None)
+def _checkpoint_update():
+    table = BalanceCheckpoint.__table__
+    return (
+        update(table)
+        .where(table.c.month == bindparam("b_month"))
+        .values(
+            income=bindparam("b_income"),
+            expense=bindparam("b_expense"),
+            adjustment=bindparam("b_adjustment"),
+        )
+    )
+
+
+def _month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def _differs(expected: Optional[tuple], actual: Optional[tuple]) -> bool:
+    if expected is None or actual is None:
+        return True
+    return any(
+        abs(float(e) - float(a)) > ROLLUP_TOLERANCE for e, a in zip(expected, actual)
+    )
+
+
+class RollupRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply(
+        self,
+        trans_date: date,
+        trans_type: str,
+        amount: float,
+        sign: int = 1,
+        category: Optional[str] = None,
+    ) -> None:
+        # Изменение применяется в текущей сессии, commit выполняет вызывающий код,
+        # поэтому агрегат и транзакция фиксируются атомарно
+        self.apply_batch({(trans_date, trans_type, category): (float(amount) * sign, sign)})
+
+    def apply_batch(
+        self, totals: Dict[Tuple[date, str, Optional[str]], Tuple[float, int]]
+    ) -> None:
+        # Пакетное применение сумм и количества по ключу (дата, тип, категория):
+        # один UPSERT дневных строк, один по категориям и один проход
+        # по контрольным точкам
+        daily: Dict[date, List[float]] = defaultdict(lambda: [0.0, 0.0, 0.0, 0])
+        monthly: Dict[date, List[float]] = defaultdict(lambda: [0.0, 0.0, 0.0])
+        categories: Dict[Tuple[date, str, str], List[float]] = defaultdict(lambda: [0.0, 0])
+        for (trans_date, trans_type, category), (amount, count) in totals.items():
+            daily[trans_date][3] += count
+            by_category = categories[(trans_date, category_key(category), trans_type)]
+            by_category[0] += float(amount)
+            by_category[1] += count
+            if trans_type in TRANSACTION_TYPES:
+                index = TRANSACTION_TYPES.index(trans_type)
+                daily[trans_date][index] += float(amount)
+                monthly[_month_start(trans_date)][index] += float(amount)
+
+        if daily:
+            self._apply_daily(daily)
+            self._apply_categories(categories)
+        if monthly:
+            self._apply_checkpoints(monthly)
+
+    def _apply_daily(self, daily: Dict[date, List[float]]) -> None:
+        # Один UPSERT (executemany) на весь пакет; строки, у которых не осталось
+        # транзакций, удаляются следом
+        table = DailyTotal.__table__
+        self.db.execute(
+            _daily_upsert(),
+            [
+                {
+                    "date": trans_date,
+                    "income": income,
+                    "expense": expense,
+                    "adjustment": adjustment,
+                    "count": count,
+                }
+                for trans_date, (income, expense, adjustment, count) in daily.items()
+            ],
+        )
+        # Количество может стать нулевым, только если в пакете есть удаления
+        removed = [trans_date for trans_date, totals in daily.items() if totals[3] < 0]
+        if removed:
+            self.db.execute(
+                delete(table).where(and_(table.c.count <= 0, table.c.date.in_(removed)))
+            )
+
+    def _apply_categories(self, categories: Dict[Tuple[date, str, str], List[float]]) -> None:
+        table = CategoryDailyTotal.__table__
+        self.db.execute(
+            _category_upsert(),
+            [
+                {"date": trans_date, "category": category, "type": trans_type, "amount": amount, "count": count}
+                for (trans_date, category, trans_type), (amount, count) in categories.items()
+            ],
+        )
+        removed = {key[0] for key, totals in categories.items() if totals[1] < 0}
+        if removed:
+            self.db.execute(
+                delete(table).where(and_(table.c.count <= 0, table.c.date.in_(removed)))
+            )
+
+    def _apply_checkpoints(self, monthly: Dict[date, List[float]]) -> None:
+        # Накопленные суммы меняются у месяца транзакции и у всех последующих.
+        # Недостающая строка месяца создается из предыдущей контрольной точки,
+        # поэтому для любого месяца с данными всегда есть своя точка
+        table = BalanceCheckpoint.__table__
+        first_month = min(monthly)
+        stored = {
+            row.month: (row.income, row.expense, row.adjustment)
+            for row in self.db.execute(_checkpoints_from(), {"first_month": first_month})
+        }
+
+        previous = self._checkpoint_before(first_month)
+        running = [0.0, 0.0, 0.0]
+        updates, inserts = [], []
+        for month in sorted(set(stored) | set(monthly)):
+            delta = monthly.get(month, (0.0, 0.0, 0.0))
+            running = [running[index] + delta[index] for index in range(3)]
+            if month in stored:
+                previous = stored[month]
+            income, expense, adjustment = (previous[index] + running[index] for index in range(3))
+            if month in stored:
+                updates.append({
+                    "b_month": month, "b_income": income, "b_expense": expense, "b_adjustment": adjustment,
+                })
+            else:
+                inserts.append({
+                    "month": month, "income": income, "expense": expense, "adjustment": adjustment,
+                })
+
+        if inserts:
+            self.db.execute(insert(table), inserts)
+        if updates:
+            self.db.execute(_checkpoint_update(), updates)
+
+    def _checkpoint_before(self, month: date) -> Tuple[float, float, float]:
+        row = self.db.execute(_checkpoint_before(), {"month": month}).first()
+        if row is None:
+            return 0.0, 0.0, 0.0
+        return float(row[0]), float(row[1]), float(row[2])
+
+    def get_totals_as_of(self, as_of: Optional[date] = None) -> Tuple[float, float, float]:
+        # Накопленные доходы, расходы и корректировки по дату включительно:
+        # одна контрольная точка до начала месяца плюс дни текущего месяца
+        if as_of is None:
+            latest = self.db.execute(
+                select(
+                    BalanceCheckpoint.income,
+                    BalanceCheckpoint.expense,
+                    BalanceCheckpoint.adjustment,
+                )
+                .order_by(BalanceCheckpoint.month.desc())
+                .limit(1)
+            ).first()
+            if latest is None:
+                return 0.0, 0.0, 0.0
+            return float(latest[0]), float(latest[1]), float(latest[2])
+
+        month = _month_start(as_of)
+        income, expense, adjustment = self._checkpoint_before(month)
+        partial = self.db.execute(
+            select(
+                func.coalesce(func.sum(DailyTotal.income), 0.0),
+                func.coalesce(func.sum(DailyTotal.expense), 0.0),
+                func.coalesce(func.sum(DailyTotal.adjustment), 0.0),
+            ).where(and_(DailyTotal.date >= month, DailyTotal.date <= as_of))
+        ).one()
+        return (
+            income + float(partial[0]),
+            expense + float(partial[1]),
+            adjustment + float(partial[2]),
+        )
+
+    def get_balance_as_of(self, as_of: Optional[date] = None) -> float:
+        income, expense, adjustment = self.get_totals_as_of(as_of)
+        return income - expense + adjustment
+
+    def get_daily_totals(self, start_date: date, end_date: date) -> List[DailyTotal]:
+        return (
+            self.db.query(DailyTotal)
+            .filter(
+                and_(
+                    DailyTotal.date >= start_date,
+                    DailyTotal.date <= end_date,
+                )
+            )
+            .order_by(DailyTotal.date)
+            .all()
+        )
+
+    def get_bucketed_totals(
+        self, start_date: date, end_date: date, granularity: str = "day"
+    ) -> List[tuple]:
+        # Суммы по интервалам (день, неделя, месяц), сгруппированные в SQL
+        bucket = bucket_start(DailyTotal.date, granularity).label("bucket")
+        return self.db.execute(
+            select(
+                bucket,
+                func.sum(DailyTotal.income),
+                func.sum(DailyTotal.expense),
+                func.sum(DailyTotal.adjustment),
+                func.sum(DailyTotal.count),
+            )
+            .where(and_(DailyTotal.date >= start_date, DailyTotal.date <= end_date))
+            .group_by(bucket)
+            .order_by(bucket)
+        ).all()
+
+    def get_category_totals(
+        self, start_date: date, end_date: date, trans_type: str
+    ) -> List[tuple]:
+        # (категория, сумма, количество) по убыванию суммы
+        amount = func.sum(CategoryDailyTotal.amount)
+        return self.db.execute(
+            select(CategoryDailyTotal.category, amount, func.sum(CategoryDailyTotal.count))
+            .where(
+                and_(
+                    CategoryDailyTotal.type == trans_type,
+                    CategoryDailyTotal.date >= start_date,
+                    CategoryDailyTotal.date <= end_date,
+                )
+            )
+            .group_by(CategoryDailyTotal.category)
+            .order_by(amount.desc(), CategoryDailyTotal.category)
+        ).all()
+
+    def get_category_months(
+        self, start_date: date, end_date: date, trans_type: str
+    ) -> List[tuple]:
+        # (первое число месяца, категория, сумма, количество)
+        month = bucket_start(CategoryDailyTotal.date, "month").label("month")
+        return self.db.execute(
+            select(
+                month,
+                CategoryDailyTotal.category,
+                func.sum(CategoryDailyTotal.amount),
+                func.sum(CategoryDailyTotal.count),
+            )
+            .where(
+                and_(
+                    CategoryDailyTotal.type == trans_type,
+                    CategoryDailyTotal.date >= start_date,
+                    CategoryDailyTotal.date <= end_date,
+                )
+            )
+            .group_by(month, CategoryDailyTotal.category)
+            .order_by(month, CategoryDailyTotal.category)
+        ).all()
+
+    def get_date_range(self) -> Tuple[Optional[date], Optional[date]]:
+        row = self.db.execute(
+            select(func.min(DailyTotal.date), func.max(DailyTotal.date))
+        ).one()
+        return row[0], row[1]
+
+    def is_empty(self) -> bool:
+        return self.db.query(DailyTotal.date).first() is None
+
+    def build_totals(self, schema: Optional[str] = None) -> None:
+        # Дневные агрегаты и агрегаты по категориям заново по записям той же
+        # базы: живой или архива, который строит archive seal
+        options = archive.schema_options(schema)
+        for model, columns, aggregate in (
+            (DailyTotal, DAILY_COLUMNS, _aggregate_transactions()),
+            (CategoryDailyTotal, CATEGORY_COLUMNS, _aggregate_categories()),
+        ):
+            self.db.execute(delete(model), execution_options=options)
+            self.db.execute(insert(model).from_select(columns, aggregate), execution_options=options)
+
+    def _archived_rows(self, model, columns) -> List[tuple]:
+        # Агрегаты архивных лет, посчитанные при запечатывании
+        rows = []
+        for partition in archive.partitions():
+            rows.extend(
+                self.db.execute(
+                    select(*(getattr(model, name) for name in columns)),
+                    execution_options=archive.schema_options(partition.schema),
+                ).all()
+            )
+        return rows
+
+    def _expected_daily(self) -> List[tuple]:
+        # Дневные суммы, как они следуют из записей: архивные годы - из
+        # агрегатов архива, остальное - по живой таблице
+        return self._archived_rows(DailyTotal, DAILY_COLUMNS) + self.db.execute(_aggregate_transactions()).all()
+
+    def _expected_categories(self) -> List[tuple]:
+        return (
+            self._archived_rows(CategoryDailyTotal, CATEGORY_COLUMNS)
+            + self.db.execute(_aggregate_categories()).all()
+        )
+
+    def rebuild(self) -> int:
+        self.build_totals()
+        for model, columns in ((DailyTotal, DAILY_COLUMNS), (CategoryDailyTotal, CATEGORY_COLUMNS)):
+            archived = self._archived_rows(model, columns)
+            if archived:
+                self.db.execute(insert(model), [dict(zip(columns, row)) for row in archived])
+        self.db.execute(delete(BalanceCheckpoint))
+        checkpoints = self._expected_checkpoints()
+        if checkpoints:
+            self.db.execute(
+                insert(BalanceCheckpoint),
+                [
+                    {"month": month, "income": values[0], "expense": values[1], "adjustment": values[2]}
+                    for month, values in checkpoints.items()
+                ],
+            )
+        # Пустой список дат - изменилось все
+        ledger.record(self.db, "rebuilt", [], [])
+        self.db.commit()
+        return self.db.query(func.count(DailyTotal.date)).scalar()
+
+    def ensure_built(self) -> bool:
+        # Для баз, созданных до появления агрегатов: строим их один раз при запуске
+        has_transactions = bool(archive.partitions()) or self.db.query(Transaction.id).first() is not None
+        has_checkpoints = self.db.query(BalanceCheckpoint.month).first() is not None
+        has_categories = self.db.query(CategoryDailyTotal.date).first() is not None
+        if has_transactions and (self.is_empty() or not has_checkpoints or not has_categories):
+            self.rebuild()
+            return True
+        return False
+
+    def _expected_checkpoints(self) -> dict:
+        # Накопленные суммы по месяцам, посчитанные заново из сырых транзакций
+        monthly = {}
+        for row in self._expected_daily():
+            month = _month_start(row[0])
+            totals = monthly.setdefault(month, [0.0, 0.0, 0.0])
+            for index in range(3):
+                totals[index] += float(row[index + 1])
+
+        checkpoints = {}
+        running = [0.0, 0.0, 0.0]
+        for month in sorted(monthly):
+            running = [running[index] + monthly[month][index] for index in range(3)]
+            checkpoints[month] = tuple(running)
+        return checkpoints
+
+    def verify(self) -> List[dict]:
+        expected = {row[0]: row[1:] for row in self._expected_daily()}
+        actual = {
+            row.date: (row.income, row.expense, row.adjustment, row.count)
+            for row in self.db.query(DailyTotal).all()
+        }
+
+        drift = []
+        for trans_date in sorted(set(expected) | set(actual)):
+            if _differs(expected.get(trans_date), actual.get(trans_date)):
+                drift.append({
+                    "date": trans_date,
+                    "expected": expected.get(trans_date),
+                    "actual": actual.get(trans_date),
+                })
+
+        expected_categories = {tuple(row[:3]): row[3:] for row in self._expected_categories()}
+        actual_categories = {
+            (row.date, row.category, row.type): (row.amount, row.count)
+            for row in self.db.query(CategoryDailyTotal).all()
+        }
+        for key in sorted(set(expected_categories) | set(actual_categories)):
+            if _differs(expected_categories.get(key), actual_categories.get(key)):
+                drift.append({
+                    "date": key[0],
+                    "category": key[1],
+                    "type": key[2],
+                    "expected": expected_categories.get(key),
+                    "actual": actual_categories.get(key),
+                })
+
+        # Контрольные точки месяцев без транзакций допустимы (после удалений),
+        # поэтому сверяем накопленные суммы только там, где есть данные
+        expected_checkpoints = self._expected_checkpoints()
+        actual_checkpoints = {
+            row.month: (row.income, row.expense, row.adjustment)
+            for row in self.db.query(BalanceCheckpoint).all()
+        }
+        for month in sorted(expected_checkpoints):
+            if _differs(expected_checkpoints[month], actual_checkpoints.get(month)):
+                drift.append({
+                    "date": month,
+                    "expected": expected_checkpoints[month],
+                    "actual": actual_checkpoints.get(month),
+                })
+        return drift
+
+
+def _sum_by_key(rows: List[tuple], width: int) -> List[tuple]:
+    # Слияние сгруппированных строк нескольких баз: первые width колонок -
+    # ключ группы, остальные суммируются
+    merged: Dict[tuple, list] = {}
+    for row in rows:
+        key = tuple(row[:width])
+        values = merged.get(key)
+        if values is None:
+            merged[key] = list(row[width:])
+        else:
+            for index, value in enumerate(row[width:]):
+                values[index] += value
+    return [key + tuple(values) for key, values in merged.items()]
+
+
+class SearchRollupRepository:
+    # Те же методы чтения, что у RollupRepository, но по транзакциям, найденным
+    # поиском: агрегаты по всему журналу здесь не помогают, поэтому суммы
+    # считаются GROUP BY по самим транзакциям из подзапроса к индексу FTS5.
+    # Живая таблица и архивы опрашиваются по отдельности, группы сливаются
+    def __init__(self, db: Session, q: str):
+        self.db = db
+        self.q = q
+
+    def _type_totals(self) -> list:
+        return [_type_total(transaction_type) for transaction_type in TRANSACTION_TYPES]
+
+    def _rows(self, build, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[tuple]:
+        # build(matched) - запрос с условием на найденные записи одной базы
+        rows = []
+        for schema in archive.schemas(start_date, end_date):
+            matched = Transaction.id.in_(search_ids(self.q, schema))
+            rows.extend(
+                self.db.execute(build(matched), execution_options=archive.schema_options(schema)).all()
+            )
+        return rows
+
+    def get_totals_as_of(self, as_of: Optional[date] = None) -> Tuple[float, float, float]:
+        def build(matched):
+            query = select(*self._type_totals()).where(matched)
+            if as_of is not None:
+                query = query.where(Transaction.date <= as_of)
+            return query
+
+        totals = [0.0, 0.0, 0.0]
+        for row in self._rows(build, end_date=as_of):
+            for index in range(3):
+                totals[index] += float(row[index])
+        return totals[0], totals[1], totals[2]
+
+    def get_balance_as_of(self, as_of: Optional[date] = None) -> float:
+        income, expense, adjustment = self.get_totals_as_of(as_of)
+        return income - expense + adjustment
+
+    def get_bucketed_totals(
+        self, start_date: date, end_date: date, granularity: str = "day"
+    ) -> List[tuple]:
+        bucket = bucket_start(Transaction.date, granularity).label("bucket")
+        rows = self._rows(
+            lambda matched: select(bucket, *self._type_totals(), func.count(Transaction.id))
+            .where(matched, Transaction.date >= start_date, Transaction.date <= end_date)
+            .group_by(bucket),
+            start_date,
+            end_date,
+        )
+        return sorted(_sum_by_key(rows, 1), key=lambda row: row[0])
+
+    def get_category_totals(
+        self, start_date: date, end_date: date, trans_type: str
+    ) -> List[tuple]:
+        category = func.coalesce(Transaction.category, "")
+        rows = self._rows(
+            lambda matched: select(category, func.sum(Transaction.amount), func.count(Transaction.id))
+            .where(
+                matched,
+                Transaction.type == trans_type,
+                Transaction.date >= start_date,
+                Transaction.date <= end_date,
+            )
+            .group_by(category),
+            start_date,
+            end_date,
+        )
+        return sorted(_sum_by_key(rows, 1), key=lambda row: (-row[1], row[0]))
+
+    def get_category_months(
+        self, start_date: date, end_date: date, trans_type: str
+    ) -> List[tuple]:
+        month = bucket_start(Transaction.date, "month").label("month")
+        category = func.coalesce(Transaction.category, "")
+        rows = self._rows(
+            lambda matched: select(month, category, func.sum(Transaction.amount), func.count(Transaction.id))
+            .where(
+                matched,
+                Transaction.type == trans_type,
+                Transaction.date >= start_date,
+                Transaction.date <= end_date,
+            )
+            .group_by(month, category),
+            start_date,
+            end_date,
+        )
+        return sorted(_sum_by_key(rows, 2), key=lambda row: (row[0], row[1]))
+
+    def get_date_range(self) -> Tuple[Optional[date], Optional[date]]:
+        rows = self._rows(
+            lambda matched: select(func.min(Transaction.date), func.max(Transaction.date)).where(matched)
+        )
+        first = [row[0] for row in rows if row[0] is not None]
+        last = [row[1] for row in rows if row[1] is not None]
+        return min(first, default=None), max(last, default=None)
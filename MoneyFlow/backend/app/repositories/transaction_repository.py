@@ -1,26 +1,311 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import func, tuple_, insert, select, update, delete, bindparam
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import date
-from typing import List, Optional
+from functools import lru_cache, wraps
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
+from app import archive, ledger
+from app.database import write_transaction
 from app.models.transaction import Transaction
-from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.models.transaction_tombstone import TransactionTombstone
+from app.search import search_ids, search_match, search_table_for
+from app.repositories.rollup_repository import RollupRepository
+from app.schemas.transaction import TransactionCreate, TransactionUpdate, TRANSACTION_LIST_FIELDS
+from app.schemas.transaction_bulk import TransactionBulkUpdate, TransactionFilter, TransactionRecategorize
+
+# Изменение журнала с большим числом строк публикуется без самих строк:
+# колоночный движок перечитает снимок вместо поштучного наложения
+BULK_LEDGER_ROWS_LIMIT = 500
+
+# Поля, которые пакетное изменение записывает целиком
+BULK_UPDATE_FIELDS = ("date", "type", "amount", "category", "description")
+
+
+def _ledger_row(transaction: Transaction) -> tuple:
+    return (
+        transaction.id,
+        transaction.date,
+        transaction.type,
+        transaction.amount,
+        transaction.category,
+    )
+
+
+def _list_query(query, start_date, end_date, transaction_type, after, q=None, order="date", schema=None):
+    # Фильтры и порядок списка; подходит и для ORM Query, и для Core select.
+    # schema - архив, к которому направлен запрос: индекс поиска берется оттуда же
+    if q and order == "relevance":
+        # По релевантности (bm25) выборку ведет индекс поиска; курсор
+        # в этом порядке не поддерживается, только skip
+        search_table = search_table_for(schema)
+        query = query.join(search_table, search_table.c.rowid == Transaction.id).filter(search_match(q, schema))
+        query = _filter_query(query, start_date, end_date, transaction_type)
+        return query.order_by(search_table.c.rank, Transaction.date.desc(), Transaction.id.desc())
+    if q:
+        query = query.filter(Transaction.id.in_(search_ids(q, schema)))
+    query = _filter_query(query, start_date, end_date, transaction_type)
+    if after:
+        # Keyset-пагинация: продолжаем строго после последней выданной записи,
+        # стоимость не зависит от глубины страницы
+        query = query.filter(tuple_(Transaction.date, Transaction.id) < tuple_(*after))
+    return query.order_by(Transaction.date.desc(), Transaction.id.desc())
+
+
+def _filter_query(query, start_date, end_date, transaction_type):
+    if start_date:
+        query = query.filter(Transaction.date >= start_date)
+    if end_date:
+        query = query.filter(Transaction.date <= end_date)
+    if transaction_type:
+        query = query.filter(Transaction.type == transaction_type)
+    return query
+
+
+def insert_rows(db: Session, rows: List[dict]) -> List[int]:
+    # Пакетная вставка с RETURNING: SQLAlchemy собирает строки в многострочные
+    # INSERT ... VALUES (insertmanyvalues) вместо executemany по одной строке.
+    # Триггеры индекса поиска тогда срабатывают внутри одного выражения на
+    # пачку, и FTS5 сбрасывает буфер на диск один раз на пачку, а не на строку.
+    # sort_by_parameter_order в SQLite снова вставлял бы по строке; порядок
+    # восстанавливаем сортировкой: новые rowid выдаются по возрастанию в
+    # порядке строк. Возвращает id в порядке rows
+    table = Transaction.__table__
+    first_id = archive.reserve_ids(db, len(rows))
+    if first_id is not None:
+        rows = [dict(row, id=first_id + offset) for offset, row in enumerate(rows)]
+    return sorted(db.execute(insert(table).returning(table.c.id), rows).scalars())
+
+
+def _filter_conditions(criteria: TransactionFilter) -> list:
+    table = Transaction.__table__
+    conditions = []
+    if criteria.start_date:
+        conditions.append(table.c.date >= criteria.start_date)
+    if criteria.end_date:
+        conditions.append(table.c.date <= criteria.end_date)
+    if criteria.type:
+        conditions.append(table.c.type == criteria.type)
+    if criteria.category is not None:
+        conditions.append(table.c.category == criteria.category)
+    if criteria.description is not None:
+        # autoescape: % и _ в подстроке ищутся буквально
+        conditions.append(table.c.description.icontains(criteria.description, autoescape=True))
+    if criteria.q is not None:
+        conditions.append(table.c.id.in_(search_ids(criteria.q)))
+    return conditions
+
+
+@lru_cache(maxsize=None)
+def _bulk_update():
+    table = Transaction.__table__
+    return (
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(
+            **{name: bindparam(f"b_{name}") for name in BULK_UPDATE_FIELDS},
+            version=bindparam("b_version"),
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def _tombstone_upsert():
+    table = TransactionTombstone.__table__
+    statement = sqlite_insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.transaction_id],
+        set_={"version": statement.excluded.version, "deleted_at": func.now()},
+    )
+
+
+class _BulkChanges:
+    # Что набрал пакет операций: дельты агрегатов по (дата, тип, категория)
+    # и итоговое состояние затронутых записей (None - запись удалена)
+    def __init__(self):
+        self.totals: Dict[tuple, List[float]] = defaultdict(lambda: [0.0, 0])
+        self.rows: Dict[int, Optional[tuple]] = {}
+        self.dates = set()
+
+    def account(self, trans_date: date, trans_type: str, category: Optional[str], amount: float, count: int) -> None:
+        totals = self.totals[(trans_date, trans_type, category)]
+        totals[0] += float(amount)
+        totals[1] += count
+        self.dates.add(trans_date)
+
+    def put(self, row: tuple) -> None:
+        # row - (id, date, type, amount, category), как в _ledger_row
+        self.rows[row[0]] = row
+        self.dates.add(row[1])
+
+
+def _writes(method):
+    # Метод изменения выполняется в транзакции TransactionRepository._writing
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._writing():
+            return method(self, *args, **kwargs)
+
+    return wrapper
 
 
 class TransactionRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, autocommit: bool = True):
         self.db = db
+        self.rollups = RollupRepository(db)
+        # False - изменения только сбрасываются в БД, а фиксирует их вызывающий
+        # код (WriteBatcher: один commit на пакет операций)
+        self.autocommit = autocommit
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        # Изменение под блокировкой писателя журнала с commit в конце. Без
+        # autocommit транзакцией и блокировкой владеет вызывающий код,
+        # изменения только сбрасываются в БД
+        if not self.autocommit:
+            yield
+            self.db.flush()
+            return
+        with write_transaction(self.db):
+            yield
 
+    @_writes
     def create(self, transaction: TransactionCreate) -> Transaction:
-        db_transaction = Transaction(**transaction.model_dump())
+        archive.check_dates([transaction.date])
+        db_transaction = Transaction(
+            **transaction.model_dump(), version=ledger.sync_version(self.db)
+        )
+        db_transaction.id = archive.reserve_ids(self.db, 1)
         self.db.add(db_transaction)
-        self.db.commit()
+        self.db.flush()
+        self.rollups.apply(
+            db_transaction.date, db_transaction.type, db_transaction.amount,
+            category=db_transaction.category,
+        )
+        ledger.record(
+            self.db, "created", [db_transaction.id], [db_transaction.date],
+            rows=[_ledger_row(db_transaction)],
+        )
+        # Значения по умолчанию из БД (created_at) читаются до commit
         self.db.refresh(db_transaction)
         return db_transaction
 
+    def create_many(self, transactions: List[TransactionCreate]) -> int:
+        # Пакетная вставка без commit: вызывающий код фиксирует пакет импорта
+        # одной транзакцией вместе с агрегатами
+        if not transactions:
+            return 0
+        archive.check_dates(transaction.date for transaction in transactions)
+
+        version = ledger.sync_version(self.db)
+        rows = [transaction.model_dump() for transaction in transactions]
+        for row in rows:
+            row["version"] = version
+        insert_rows(self.db, rows)
+
+        totals = defaultdict(lambda: [0.0, 0])
+        for row in rows:
+            key = (row["date"], row["type"], row["category"])
+            totals[key][0] += float(row["amount"])
+            totals[key][1] += 1
+        self.rollups.apply_batch(totals)
+        ledger.record(self.db, "imported", [], [key[0] for key in totals])
+        return len(rows)
+
     def get_by_id(self, transaction_id: int) -> Optional[Transaction]:
+        transaction = self._get_live(transaction_id)
+        for schema in archive.schemas_for_id(transaction_id):
+            if transaction is not None:
+                break
+            transaction = (
+                self.db.query(Transaction)
+                .filter(Transaction.id == transaction_id)
+                .execution_options(**archive.schema_options(schema))
+                .first()
+            )
+        return transaction
+
+    def _get_live(self, transaction_id: int) -> Optional[Transaction]:
         return self.db.query(Transaction).filter(Transaction.id == transaction_id).first()
 
+    def _get_writable(self, transaction_id: int) -> Optional[Transaction]:
+        # Запись для изменения или удаления: архивные записи только читаются
+        transaction = self._get_live(transaction_id)
+        if transaction is None and self._archived_ids([transaction_id]):
+            raise archive.archived_record_error(transaction_id)
+        return transaction
+
+    def _archived_ids(self, transaction_ids) -> set:
+        # Какие из id лежат в архивах; в каждый архив - один запрос по его диапазону id
+        found = set()
+        for partition in archive.partitions():
+            candidates = [
+                transaction_id
+                for transaction_id in transaction_ids
+                if partition.min_id <= transaction_id <= partition.max_id
+            ]
+            if candidates:
+                found.update(
+                    self.db.execute(
+                        select(Transaction.id).where(Transaction.id.in_(candidates)),
+                        execution_options=archive.schema_options(partition.schema),
+                    ).scalars()
+                )
+        return found
+
+    def _list(self, columns, skip, limit, start_date, end_date, transaction_type, after, q, order) -> list:
+        # Страница списка по живой таблице и архивам. Архивные годы старше
+        # любой живой записи, поэтому в порядке по дате базы идут подряд:
+        # сначала живая, затем архивы от новых лет к старым
+        schemas = archive.schemas(start_date, end_date)
+        if len(schemas) == 1:
+            query = _list_query(select(*columns), start_date, end_date, transaction_type, after, q, order)
+            return self.db.execute(query.offset(skip).limit(limit)).all()
+        if q and order == "relevance":
+            return self._list_by_relevance(columns, schemas, skip, limit, start_date, end_date, transaction_type, q)
+
+        rows = []
+        for schema in schemas:
+            options = archive.schema_options(schema)
+            query = _list_query(
+                select(*columns), start_date, end_date, transaction_type, after, q, order, schema
+            )
+            page = self.db.execute(query.offset(skip).limit(limit - len(rows)), execution_options=options).all()
+            if page:
+                skip = 0
+            elif skip:
+                # Вся выборка этой базы уходит в пропуск
+                skip -= self.db.execute(
+                    select(func.count()).select_from(query.order_by(None).subquery()),
+                    execution_options=options,
+                ).scalar()
+            rows.extend(page)
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def _list_by_relevance(self, columns, schemas, skip, limit, start_date, end_date, transaction_type, q) -> list:
+        # bm25 каждой базы считается по ее собственному индексу: страница
+        # собирается слиянием лучших skip + limit записей каждой базы
+        candidates = []
+        for schema in schemas:
+            query = _list_query(
+                select(
+                    *columns,
+                    search_table_for(schema).c.rank,
+                    Transaction.date.label("sort_date"),
+                    Transaction.id.label("sort_id"),
+                ),
+                start_date, end_date, transaction_type, None, q, "relevance", schema,
+            )
+            candidates.extend(
+                self.db.execute(query.limit(skip + limit), execution_options=archive.schema_options(schema)).all()
+            )
+        candidates.sort(key=lambda row: (row[-3], -row[-2].toordinal(), -row[-1]))
+        return [tuple(row[:-3]) for row in candidates[skip:skip + limit]]
+
     def get_all(
         self,
         skip: int = 0,
@@ -28,93 +313,291 @@ class TransactionRepository:
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         transaction_type: Optional[str] = None,
+        after: Optional[Tuple[date, int]] = None,
+        q: Optional[str] = None,
+        order: str = "date",
     ) -> List[Transaction]:
-        query = self.db.query(Transaction)
+        rows = self._list((Transaction,), skip, limit, start_date, end_date, transaction_type, after, q, order)
+        return [row[0] for row in rows]
+
+    def get_rows(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: Optional[str] = None,
+        after: Optional[Tuple[date, int]] = None,
+        q: Optional[str] = None,
+        order: str = "date",
+    ) -> List[tuple]:
+        # Та же выборка, что get_all, но Core-строками без ORM-объектов;
+        # поля идут в порядке TRANSACTION_LIST_FIELDS
+        return self._list(
+            tuple(getattr(Transaction, name) for name in TRANSACTION_LIST_FIELDS),
+            skip, limit, start_date, end_date, transaction_type, after, q, order,
+        )
 
+    def iter_rows(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: Optional[str] = None,
+        chunk_size: int = 1000,
+        q: Optional[str] = None,
+    ) -> Iterator[Sequence[tuple]]:
+        # Потоковое чтение Core-строк пачками (yield_per) без создания ORM-объектов:
+        # в памяти одновременно находится только одна пачка. Архивы идут
+        # первыми, от старых лет к новым, затем живая таблица
+        table = Transaction.__table__
+        query = select(
+            table.c.id,
+            table.c.date,
+            table.c.type,
+            table.c.amount,
+            table.c.category,
+            table.c.description,
+            table.c.created_at,
+        )
         if start_date:
-            query = query.filter(Transaction.date >= start_date)
+            query = query.where(table.c.date >= start_date)
         if end_date:
-            query = query.filter(Transaction.date <= end_date)
+            query = query.where(table.c.date <= end_date)
         if transaction_type:
-            query = query.filter(Transaction.type == transaction_type)
+            query = query.where(table.c.type == transaction_type)
+        query = query.order_by(table.c.date, table.c.id)
+
+        for schema in archive.schemas(start_date, end_date, newest_first=False):
+            schema_query = query.where(table.c.id.in_(search_ids(q, schema))) if q else query
+            result = self.db.execute(
+                schema_query.execution_options(yield_per=chunk_size, **archive.schema_options(schema))
+            )
+            try:
+                yield from result.partitions()
+            finally:
+                result.close()
 
-        return query.order_by(Transaction.date.desc()).offset(skip).limit(limit).all()
+    def get_sync_version(self) -> int:
+        return ledger.persisted_version(self.db)
+
+    def get_changed(self, since: int, until: int, limit: int) -> List[Transaction]:
+        # Записи, созданные или измененные в версиях (since, until], включая
+        # архивные: клиент, синхронизирующийся с нуля, получает весь журнал
+        changed = []
+        schemas = archive.schemas()
+        for schema in schemas:
+            changed.extend(
+                self.db.query(Transaction)
+                .filter(Transaction.version > since, Transaction.version <= until)
+                .order_by(Transaction.version, Transaction.id)
+                .limit(limit)
+                .execution_options(**archive.schema_options(schema))
+                .all()
+            )
+        if len(schemas) > 1:
+            changed.sort(key=lambda transaction: (transaction.version, transaction.id))
+        return changed[:limit]
 
+    def get_deleted_ids(self, since: int, until: int, limit: int) -> List[int]:
+        # Удаленные в версиях (since, until]; если id уже занят новой записью,
+        # удаление перекрыто ею и не возвращается
+        live = select(Transaction.id).where(Transaction.id == TransactionTombstone.transaction_id)
+        return list(
+            self.db.execute(
+                select(TransactionTombstone.transaction_id)
+                .where(
+                    TransactionTombstone.version > since,
+                    TransactionTombstone.version <= until,
+                    ~live.exists(),
+                )
+                .order_by(TransactionTombstone.version, TransactionTombstone.transaction_id)
+                .limit(limit)
+            ).scalars()
+        )
+
+    @_writes
     def update(self, transaction_id: int, transaction: TransactionUpdate) -> Optional[Transaction]:
-        db_transaction = self.get_by_id(transaction_id)
+        db_transaction = self._get_writable(transaction_id)
         if not db_transaction:
             return None
 
+        old_values = (db_transaction.date, db_transaction.type, db_transaction.amount)
+        old_category = db_transaction.category
+
         update_data = transaction.model_dump(exclude_unset=True)
+        if update_data.get("date") is not None:
+            archive.check_dates([update_data["date"]])
         for field, value in update_data.items():
             setattr(db_transaction, field, value)
+        db_transaction.version = ledger.sync_version(self.db)
 
-        self.db.commit()
+        # Сначала учитываем новые значения, затем вычитаем старые:
+        # так строка агрегата не удаляется, если дата не изменилась
+        self.rollups.apply(
+            db_transaction.date, db_transaction.type, db_transaction.amount,
+            category=db_transaction.category,
+        )
+        self.rollups.apply(*old_values, sign=-1, category=old_category)
+        ledger.record(
+            self.db, "updated", [transaction_id], [old_values[0], db_transaction.date],
+            rows=[_ledger_row(db_transaction)],
+        )
+        self.db.flush()
         self.db.refresh(db_transaction)
         return db_transaction
 
+    @_writes
     def delete(self, transaction_id: int) -> bool:
-        db_transaction = self.get_by_id(transaction_id)
+        db_transaction = self._get_writable(transaction_id)
         if not db_transaction:
             return False
 
+        self.rollups.apply(
+            db_transaction.date, db_transaction.type, db_transaction.amount, sign=-1,
+            category=db_transaction.category,
+        )
+        ledger.record(self.db, "deleted", [transaction_id], [db_transaction.date], rows=[])
+        # merge: SQLite может выдать id удаленной последней записи повторно,
+        # тогда след прежнего удаления обновляется
+        self.db.merge(
+            TransactionTombstone(transaction_id=transaction_id, version=ledger.sync_version(self.db))
+        )
         self.db.delete(db_transaction)
-        self.db.commit()
         return True
 
-    def get_statistics_by_period(
-        self, start_date: date, end_date: date
-    ) -> dict:
-        # Получаем все транзакции за период
-        transactions = (
-            self.db.query(Transaction)
-            .filter(
-                and_(
-                    Transaction.date >= start_date,
-                    Transaction.date <= end_date,
-                )
-            )
-            .order_by(Transaction.date)
-            .all()
+    @_writes
+    def bulk(
+        self,
+        creates: List[TransactionCreate],
+        updates: List[TransactionBulkUpdate],
+        recategorize: List[TransactionRecategorize],
+        deletes: List[int],
+    ) -> Tuple[List[int], List[bool], List[int], List[bool], int]:
+        # Пакет изменений одной транзакцией: каждый вид операций - один
+        # множественный запрос (executemany или UPDATE/DELETE по условию),
+        # агрегаты обновляются одним apply_batch, в журнал идет одно изменение.
+        # Возвращает id созданных записей, найдена ли запись для каждого
+        # изменения и удаления, сколько записей сменили категорию и версию
+        # журнала после пакета.
+        # Архивные годы и записи только читаются: такой пакет отклоняется
+        # целиком до первого изменения, смена категории по фильтру затрагивает
+        # только живые записи
+        table = Transaction.__table__
+        archive.check_dates(
+            [item.date for item in creates] + [item.date for item in updates if item.date is not None]
         )
+        archived = self._archived_ids({item.id for item in updates} | set(deletes))
+        if archived:
+            raise archive.archived_record_error(min(archived))
+        changes = _BulkChanges()
+        # Незаписанные ORM-изменения этой сессии должны попасть в БД раньше
+        # запросов ниже
+        self.db.flush()
+
+        created_ids: List[int] = []
+        if creates:
+            version = ledger.sync_version(self.db)
+            rows = [dict(item.model_dump(), version=version) for item in creates]
+            created_ids = insert_rows(self.db, rows)
+            for transaction_id, row in zip(created_ids, rows):
+                changes.account(row["date"], row["type"], row["category"], row["amount"], 1)
+                changes.put((transaction_id, row["date"], row["type"], row["amount"], row["category"]))
 
-        # Группируем по датам
-        daily_data = {}
-        total_income = 0.0
-        total_expense = 0.0
-
-        for transaction in transactions:
-            trans_date = transaction.date
-            if trans_date not in daily_data:
-                daily_data[trans_date] = {"income": 0.0, "expense": 0.0}
-
-            if transaction.type == "income":
-                amount = float(transaction.amount)
-                daily_data[trans_date]["income"] += amount
-                total_income += amount
-            elif transaction.type == "expense":
-                amount = float(transaction.amount)
-                daily_data[trans_date]["expense"] += amount
-                total_expense += amount
-
-        # Формируем список дневной статистики
-        daily_stats = []
-        for trans_date in sorted(daily_data.keys()):
-            income = daily_data[trans_date]["income"]
-            expense = daily_data[trans_date]["expense"]
-            daily_stats.append({
-                "date": trans_date,
-                "income": income,
-                "expense": expense,
-                "balance": income - expense,
-            })
-
-        return {
-            "period_start": start_date,
-            "period_end": end_date,
-            "total_income": total_income,
-            "total_expense": total_expense,
-            "balance": total_income - total_expense,
-            "daily_statistics": daily_stats,
-        }
+        updated: List[bool] = []
+        if updates:
+            current = {
+                row[0]: dict(zip(BULK_UPDATE_FIELDS, row[1:]))
+                for row in self.db.execute(
+                    select(table.c.id, *(table.c[name] for name in BULK_UPDATE_FIELDS))
+                    .where(table.c.id.in_({item.id for item in updates}))
+                )
+            }
+            original = {transaction_id: dict(values) for transaction_id, values in current.items()}
+            # Изменения одной записи накладываются по порядку, как серия PUT
+            for item in updates:
+                values = current.get(item.id)
+                updated.append(values is not None)
+                if values is not None:
+                    values.update(item.model_dump(exclude_unset=True, exclude={"id"}))
+
+            changed = [item.id for item in updates if item.id in current]
+            if changed:
+                version = ledger.sync_version(self.db)
+                self.db.execute(
+                    _bulk_update(),
+                    [
+                        dict(
+                            {f"b_{name}": value for name, value in current[transaction_id].items()},
+                            b_id=transaction_id,
+                            b_version=version,
+                        )
+                        for transaction_id in dict.fromkeys(changed)
+                    ],
+                )
+            for transaction_id in dict.fromkeys(changed):
+                old, new = original[transaction_id], current[transaction_id]
+                changes.account(old["date"], old["type"], old["category"], -float(old["amount"]), -1)
+                changes.account(new["date"], new["type"], new["category"], new["amount"], 1)
+                changes.put((transaction_id, new["date"], new["type"], new["amount"], new["category"]))
+
+        recategorized: List[int] = []
+        for operation in recategorize:
+            conditions = _filter_conditions(operation.filter)
+            conditions.append(table.c.category.is_distinct_from(operation.category))
+            # Дельты агрегатов считаются в SQL до UPDATE: суммы уходят из
+            # прежних категорий и приходят в новую
+            for trans_date, trans_type, category, amount, count in self.db.execute(
+                select(table.c.date, table.c.type, table.c.category, func.sum(table.c.amount), func.count())
+                .where(*conditions)
+                .group_by(table.c.date, table.c.type, table.c.category)
+            ):
+                changes.account(trans_date, trans_type, category, -float(amount), -count)
+                changes.account(trans_date, trans_type, operation.category, amount, count)
+            returned = self.db.execute(
+                update(table)
+                .where(*conditions)
+                .values(category=operation.category, version=ledger.sync_version(self.db))
+                .returning(table.c.id, table.c.date, table.c.type, table.c.amount)
+            ).all()
+            for transaction_id, trans_date, trans_type, amount in returned:
+                changes.put((transaction_id, trans_date, trans_type, amount, operation.category))
+            recategorized.append(len(returned))
+
+        deleted: List[bool] = []
+        if deletes:
+            existing = {
+                row[0]: row
+                for row in self.db.execute(
+                    select(table.c.id, table.c.date, table.c.type, table.c.amount, table.c.category)
+                    .where(table.c.id.in_(set(deletes)))
+                )
+            }
+            # Повторный id в списке удалений уже не найден
+            seen = set()
+            for transaction_id in deletes:
+                deleted.append(transaction_id in existing and transaction_id not in seen)
+                seen.add(transaction_id)
+            if existing:
+                version = ledger.sync_version(self.db)
+                self.db.execute(delete(table).where(table.c.id.in_(list(existing))))
+                self.db.execute(
+                    _tombstone_upsert(),
+                    [{"transaction_id": transaction_id, "version": version} for transaction_id in existing],
+                )
+            for transaction_id, trans_date, trans_type, amount, category in existing.values():
+                changes.account(trans_date, trans_type, category, -float(amount), -1)
+                changes.rows[transaction_id] = None
+                changes.dates.add(trans_date)
 
+        if changes.totals:
+            self.rollups.apply_batch(changes.totals)
+        if changes.rows:
+            if len(changes.rows) <= BULK_LEDGER_ROWS_LIMIT:
+                rows = [row for row in changes.rows.values() if row is not None]
+                ledger.record(self.db, "bulk", list(changes.rows), changes.dates, rows=rows)
+            else:
+                ledger.record(self.db, "bulk", [], changes.dates)
+        # ORM-объекты, загруженные раньше в этой сессии, не видят изменений
+        # Core-запросов
+        self.db.expire_all()
+        return created_ids, updated, recategorized, deleted, ledger.persisted_version(self.db)
@@ -3,17 +3,63 @@ from app.schemas.transaction import (
     TransactionCreate,
     TransactionUpdate,
     TransactionResponse,
+    TransactionChangesResponse,
 )
-from app.schemas.period import PeriodRequest, StatisticsResponse, DailyStatistics
+from app.schemas.period import (
+    PeriodRequest,
+    StatisticsResponse,
+    DailyStatistics,
+    SeriesPoint,
+    SeriesResponse,
+    StatisticsPeriod,
+    BatchStatisticsRequest,
+    BatchStatisticsResponse,
+)
+from app.schemas.balance import BalanceResponse
+from app.schemas.category import CategoryTotal, CategoryMonthTotal, CategoryStatisticsResponse
+from app.schemas.transaction_import import ImportRowError, ImportResponse
+from app.schemas.transaction_bulk import (
+    TransactionBulkUpdate,
+    TransactionFilter,
+    TransactionRecategorize,
+    TransactionBulkRequest,
+    BulkItemResult,
+    BulkRecategorizeResult,
+    TransactionBulkResponse,
+)
+from app.schemas.event import ChangeEvent, PeriodTotals, TotalsEvent, ResetEvent
 
 __all__ = [
     "TransactionBase",
     "TransactionCreate",
     "TransactionUpdate",
     "TransactionResponse",
+    "TransactionChangesResponse",
     "PeriodRequest",
     "StatisticsResponse",
     "DailyStatistics",
+    "SeriesPoint",
+    "SeriesResponse",
+    "StatisticsPeriod",
+    "BatchStatisticsRequest",
+    "BatchStatisticsResponse",
+    "BalanceResponse",
+    "CategoryTotal",
+    "CategoryMonthTotal",
+    "CategoryStatisticsResponse",
+    "ImportRowError",
+    "ImportResponse",
+    "TransactionBulkUpdate",
+    "TransactionFilter",
+    "TransactionRecategorize",
+    "TransactionBulkRequest",
+    "BulkItemResult",
+    "BulkRecategorizeResult",
+    "TransactionBulkResponse",
+    "ChangeEvent",
+    "PeriodTotals",
+    "TotalsEvent",
+    "ResetEvent",
 ]
 
 
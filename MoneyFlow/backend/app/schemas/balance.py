@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Optional
+
+
+class BalanceResponse(BaseModel):
+    as_of: Optional[date] = None
+    total_income: float
+    total_expense: float
+    total_adjustment: float
+    balance: float
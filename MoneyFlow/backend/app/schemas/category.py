@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Optional, List
+
+
+class CategoryTotal(BaseModel):
+    # category = None - транзакции без категории; is_other - сумма категорий,
+    # не вошедших в top
+    category: Optional[str] = None
+    total: float
+    count: int
+    share: float
+    is_other: bool = False
+
+
+class CategoryMonthTotal(BaseModel):
+    month: date
+    category: Optional[str] = None
+    total: float
+    count: int
+    is_other: bool = False
+
+
+class CategoryStatisticsResponse(BaseModel):
+    period_start: date
+    period_end: date
+    type: str
+    total: float
+    count: int
+    categories: List[CategoryTotal]
+    # Разбивка по месяцам, только если запрошена (pivot=true)
+    months: Optional[List[CategoryMonthTotal]] = None
@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+
+class ChangeEvent(BaseModel):
+    action: str  # created, updated, deleted, imported, bulk, rebuilt
+    ids: List[int]
+    # Затронутые даты; пустой список - изменилось все (пересборка агрегатов)
+    dates: List[date]
+    # Сохраняемая версия журнала, с нее клиент продолжает /changes
+    version: Optional[int] = None
+
+
+class PeriodTotals(BaseModel):
+    # Итоги периода без разбивки по дням
+    period_start: date
+    period_end: date
+    total_income: float
+    total_expense: float
+    total_adjustment: float
+    balance: float
+    opening_balance: float
+    closing_balance: float
+
+
+class TotalsEvent(BaseModel):
+    periods: List[PeriodTotals]
+
+
+class ResetEvent(BaseModel):
+    # unknown_id - Last-Event-ID другого запуска сервера или слишком старый,
+    # overflow - клиент не успевал читать и часть событий потеряна
+    reason: str
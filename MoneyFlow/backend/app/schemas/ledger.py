@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class LedgerResponse(BaseModel):
+    id: str
+    created: bool
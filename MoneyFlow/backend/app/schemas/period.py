@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import date
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 
 class PeriodRequest(BaseModel):
@@ -13,6 +13,7 @@ class DailyStatistics(BaseModel):
     income: float
     expense: float
     balance: float
+    adjustment: float = 0.0
 
 
 class StatisticsResponse(BaseModel):
@@ -22,6 +23,59 @@ class StatisticsResponse(BaseModel):
     total_expense: float
     balance: float
     daily_statistics: List[DailyStatistics]
+    total_adjustment: float = 0.0
+    # Остаток на начало и конец периода с учетом всей истории и корректировок
+    opening_balance: float = 0.0
+    closing_balance: float = 0.0
 
 
+class SeriesPoint(BaseModel):
+    # date - начало интервала (день, понедельник недели, первое число месяца,
+    # квартала или года); balance - накопленный остаток на конец интервала
+    date: date
+    income: float
+    expense: float
+    adjustment: float
+    net: float
+    count: int
+    balance: float
+    # Среднее net за последние window интервалов, если window указан
+    rolling_net: Optional[float] = None
+
+
+class SeriesResponse(BaseModel):
+    granularity: str
+    period_start: date
+    period_end: date
+    opening_balance: float
+    closing_balance: float
+    points: List[SeriesPoint]
+
+
+class StatisticsPeriod(BaseModel):
+    name: str = Field(..., min_length=1)
+    start_date: date
+    end_date: date
+    granularity: str = Field("day", pattern="^(day|week|month|quarter|year)$")
+
+    @model_validator(mode='after')
+    def validate_range(self):
+        if self.end_date < self.start_date:
+            raise ValueError('end_date must not be earlier than start_date')
+        return self
+
+
+class BatchStatisticsRequest(BaseModel):
+    periods: List[StatisticsPeriod] = Field(..., min_length=1, max_length=366)
+
+    @model_validator(mode='after')
+    def validate_names(self):
+        names = [period.name for period in self.periods]
+        if len(set(names)) != len(names):
+            raise ValueError('Period names must be unique')
+        return self
+
 
+class BatchStatisticsResponse(BaseModel):
+    # Результаты в порядке запроса, ключ - имя периода
+    periods: Dict[str, StatisticsResponse]
@@ -1,6 +1,16 @@
-from pydantic import BaseModel, Field, field_serializer, field_validator, ConfigDict, model_validator
+from pydantic import (
+    BaseModel,
+    Field,
+    field_serializer,
+    field_validator,
+    ConfigDict,
+    model_validator,
+    PlainSerializer,
+    TypeAdapter,
+)
 from datetime import date, datetime
-from typing import Optional, Any
+from typing import Optional, Any, List, Annotated
+from typing_extensions import TypedDict
 
 
 class TransactionBase(BaseModel):
@@ -70,3 +80,31 @@ class TransactionResponse(TransactionBase):
     class Config:
         from_attributes = True
 
+
+class TransactionChangesResponse(BaseModel):
+    # Текущая сохраненная версия журнала: ее клиент передает в since дальше
+    version: int
+    changes: List[TransactionResponse] = []
+    deleted: List[int] = []
+    # true - изменений больше limit или версия клиента неизвестна серверу:
+    # список нужно загрузить заново
+    reset: bool = False
+
+
+# Быстрый путь списка: строки из БД кодируются в JSON сразу, без создания
+# TransactionResponse и повторной проверки response_model. Поля, их порядок
+# и формат created_at совпадают с TransactionResponse, поэтому JSON тот же
+TRANSACTION_LIST_FIELDS = ("date", "type", "amount", "category", "description", "id", "created_at")
+
+
+class TransactionRow(TypedDict):
+    date: date
+    type: str
+    amount: float
+    category: Optional[str]
+    description: Optional[str]
+    id: int
+    created_at: Annotated[datetime, PlainSerializer(lambda value: value.isoformat(), return_type=str)]
+
+
+transaction_list_adapter = TypeAdapter(List[TransactionRow])
@@ -0,0 +1,65 @@
+from pydantic import BaseModel, Field, model_validator
+from datetime import date
+from typing import List, Optional
+
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.search import SEARCH_QUERY_PATTERN
+
+
+class TransactionBulkUpdate(TransactionUpdate):
+    id: int
+
+
+class TransactionFilter(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    type: Optional[str] = Field(None, pattern="^(income|expense|adjustment)$")
+    category: Optional[str] = None
+    # Подстрока описания без учета регистра (в SQLite - только для латиницы)
+    description: Optional[str] = None
+    # Полнотекстовый поиск по описанию и категории, как параметр q списка
+    q: Optional[str] = Field(None, min_length=1, max_length=200, pattern=SEARCH_QUERY_PATTERN)
+
+    @model_validator(mode='after')
+    def validate_not_empty(self):
+        """Пустой фильтр совпал бы со всем журналом - такой запрос скорее ошибка"""
+        if all(value is None for value in self.model_dump().values()):
+            raise ValueError('Filter must contain at least one condition')
+        return self
+
+
+class TransactionRecategorize(BaseModel):
+    filter: TransactionFilter
+    # None - убрать категорию
+    category: Optional[str] = None
+
+
+class TransactionBulkRequest(BaseModel):
+    # Операции выполняются одной транзакцией БД в порядке: создания,
+    # изменения, смена категории по фильтру, удаления
+    creates: List[TransactionCreate] = []
+    updates: List[TransactionBulkUpdate] = []
+    recategorize: List[TransactionRecategorize] = []
+    deletes: List[int] = []
+
+    def operation_count(self) -> int:
+        return len(self.creates) + len(self.updates) + len(self.recategorize) + len(self.deletes)
+
+
+class BulkItemResult(BaseModel):
+    id: int
+    status: str  # created, updated, deleted, not_found
+
+
+class BulkRecategorizeResult(BaseModel):
+    updated: int
+
+
+class TransactionBulkResponse(BaseModel):
+    # Сохраненная версия журнала после операции (см. /changes)
+    version: int
+    # Результаты в порядке элементов запроса
+    creates: List[BulkItemResult] = []
+    updates: List[BulkItemResult] = []
+    recategorize: List[BulkRecategorizeResult] = []
+    deletes: List[BulkItemResult] = []
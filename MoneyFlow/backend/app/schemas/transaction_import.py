@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+    # True, если ошибок больше, чем помещается в ответ
+    errors_truncated: bool = False
@@ -0,0 +1,91 @@
+import re
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import column, select, table, text
+
+# Полнотекстовый индекс FTS5 по description и category. Таблица с внешним
+# содержимым (content=transactions): текст хранится только в transactions,
+# а индекс обновляют триггеры - при любой записи, будь то ORM, пакетная
+# вставка импорта или /bulk
+SEARCH_TABLE = "transactions_fts"
+
+# {table} - имя таблицы индекса, в архиве - с именем подключенной базы
+SEARCH_TABLE_DDL = """CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+    description, category,
+    content='transactions', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)"""
+
+SEARCH_DDL = (
+    SEARCH_TABLE_DDL.format(table=SEARCH_TABLE),
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, description, category)
+        VALUES (new.id, new.description, new.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, description, category)
+        VALUES ('delete', old.id, old.description, old.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update
+    AFTER UPDATE OF description, category ON transactions BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, description, category)
+        VALUES ('delete', old.id, old.description, old.category);
+        INSERT INTO {SEARCH_TABLE}(rowid, description, category)
+        VALUES (new.id, new.description, new.category);
+    END""",
+)
+
+# Параметр q должен содержать хотя бы одну букву или цифру
+SEARCH_QUERY_PATTERN = r"[^\W_]"
+SEARCH_QUERY_DESCRIPTION = "Full-text search over description and category, words match by prefix"
+
+
+@lru_cache(maxsize=None)
+def search_table_for(schema: Optional[str] = None):
+    # rank - bm25 по индексу: чем меньше, тем релевантнее. schema_translate_map
+    # не меняет такие легкие table(), поэтому для архива (см. app.archive)
+    # имя базы указывается явно
+    return table(SEARCH_TABLE, column("rowid"), column("rank"), column(SEARCH_TABLE), schema=schema)
+
+
+search_table = search_table_for()
+
+
+def match_query(q: str) -> str:
+    # Текст пользователя не передается в FTS5 как есть: каждое слово
+    # становится фразой в кавычках с поиском по префиксу, слова объединяются
+    # через AND. Так операторы и кавычки во вводе не ломают запрос
+    words = re.findall(r"[^\W_]+", q)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_match(q: str, schema: Optional[str] = None):
+    return search_table_for(schema).c[SEARCH_TABLE].match(match_query(q))
+
+
+def search_ids(q: str, schema: Optional[str] = None):
+    # Подзапрос id записей, найденных по тексту
+    return select(search_table_for(schema).c.rowid).where(search_match(q, schema))
+
+
+def ensure_search_index(connection) -> bool:
+    # Индекс и триггеры создаются при запуске; для базы, созданной до них,
+    # индекс сразу заполняется по существующим записям. True - индекс создан
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": SEARCH_TABLE},
+    ).first()
+    for statement in SEARCH_DDL:
+        connection.execute(text(statement))
+    if exists:
+        return False
+    rebuild_search_index(connection)
+    return True
+
+
+def rebuild_search_index(connection, schema: Optional[str] = None) -> int:
+    # Полная пересборка индекса по таблице transactions той же базы
+    prefix = f"{schema}." if schema else ""
+    connection.execute(text(f"INSERT INTO {prefix}{SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+    return connection.execute(text(f"SELECT count(*) FROM {prefix}transactions")).scalar()
@@ -0,0 +1,71 @@
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from app.archive import database_path
+
+# Блокировка базы процессом сервера. Реестр архивов, версии журналов, кэш
+# статистики и ETag живут в памяти процесса и не видят изменений, сделанных
+# в обход него. Поэтому сервер держит блокировку все время работы, а команды,
+# меняющие базу (archive seal, rollup rebuild, search rebuild) - на время
+# выполнения: второй сервер с той же базой и такие команды при работающем
+# сервере не запускаются. Это касается и воркеров одного сервера (uvicorn
+# --workers, gunicorn -w): с базой работает один процесс, параллельность
+# дают потоки и журналы (app.shards).
+# Блокировка - исключительная транзакция SQLite над отдельным пустым файлом
+# рядом с базой: работает на всех платформах и снимается ОС, если процесс
+# завершился аварийно
+
+
+class DatabaseInUseError(RuntimeError):
+    pass
+
+
+def lock_path() -> Optional[str]:
+    # None - база в памяти, блокировать нечего
+    database = database_path()
+    return f"{database}.lock" if database else None
+
+
+def acquire(holder: str) -> Optional[sqlite3.Connection]:
+    # Возвращает соединение, которое держит блокировку до close()
+    path = lock_path()
+    if path is None:
+        return None
+    connection = sqlite3.connect(path, timeout=0, isolation_level=None, check_same_thread=False)
+    try:
+        connection.execute("BEGIN EXCLUSIVE")
+    except sqlite3.OperationalError:
+        connection.close()
+        raise DatabaseInUseError(
+            f"Database {database_path()} is in use by a running server or maintenance command, "
+            f"stop it before {holder}"
+        )
+    return connection
+
+
+def acquire_server() -> Optional[sqlite3.Connection]:
+    # Блокировка на время работы сервера. Чаще всего ее не получает второй
+    # воркер того же сервера, поэтому ошибка прямо говорит, как запускать
+    try:
+        return acquire("starting the server")
+    except DatabaseInUseError:
+        raise DatabaseInUseError(
+            f"Database {database_path()} is already served by another process. "
+            "The statistics cache and ETags live in process memory, so run a single server "
+            "process per database: no uvicorn --workers, gunicorn -w 1"
+        ) from None
+
+
+def release(connection: Optional[sqlite3.Connection]) -> None:
+    if connection is not None:
+        connection.close()
+
+
+@contextmanager
+def exclusive(holder: str) -> Iterator[None]:
+    connection = acquire(holder)
+    try:
+        yield
+    finally:
+        release(connection)
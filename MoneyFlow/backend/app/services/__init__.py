@@ -1,7 +1,14 @@
 from app.services.transaction_service import TransactionService
 from app.services.statistics_service import StatisticsService
-
-__all__ = ["TransactionService", "StatisticsService"]
+from app.services.async_transaction_service import AsyncTransactionService
+from app.services.async_statistics_service import AsyncStatisticsService
+
+__all__ = [
+    "TransactionService",
+    "StatisticsService",
+    "AsyncTransactionService",
+    "AsyncStatisticsService",
+]
 
 
 
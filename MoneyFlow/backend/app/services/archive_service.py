@@ -0,0 +1,155 @@
+import os
+import stat
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app import archive, server_lock
+from app.config import settings
+from app.database import configure_sqlite
+from app.models.archive_partition import ArchivePartition
+from app.models.category_daily_total import CategoryDailyTotal
+from app.models.daily_total import DailyTotal
+from app.models.transaction import Transaction
+from app.models.transaction_tombstone import TransactionTombstone
+from app.repositories.rollup_repository import RollupRepository
+from app.search import SEARCH_TABLE, SEARCH_TABLE_DDL, rebuild_search_index
+
+# Имя, под которым строящийся архив подключен на время seal
+BUILD_SCHEMA = "archive_build"
+
+
+class ArchiveService:
+    # Перенос закрытых лет в архивный файл (команда archive seal). Работает
+    # через отдельное соединение без явного BEGIN: ATTACH, DETACH и VACUUM
+    # SQLite выполняет только вне транзакции
+    def __init__(self):
+        self.engine = create_engine(settings.sync_database_url, poolclass=NullPool)
+        configure_sqlite(self.engine)
+
+    def list(self) -> List[ArchivePartition]:
+        with Session(self.engine) as db:
+            return db.query(ArchivePartition).order_by(ArchivePartition.last_year).all()
+
+    def seal(self, through: int, vacuum: bool = False) -> Optional[ArchivePartition]:
+        # Все записи по through включительно уходят в новый файл архива.
+        # Сначала архив строится и фиксируется целиком, затем одной транзакцией
+        # записывается в реестр и удаляется из живой таблицы: после сбоя между
+        # шагами записи остаются на месте, а недостроенный файл перезаписывается
+        # следующим запуском. Возвращает None, если переносить нечего.
+        # Сервер читает реестр архивов один раз, поэтому при работающем
+        # сервере перенос не начинается (DatabaseInUseError)
+        with server_lock.exclusive("sealing an archive"):
+            return self._seal(through, vacuum)
+
+    def _seal(self, through: int, vacuum: bool) -> Optional[ArchivePartition]:
+        if through >= date.today().year:
+            raise ValueError(f"Year {through} is not closed yet, only past years can be archived")
+        database = archive.database_path()
+        if database is None:
+            raise ValueError("Archives require a file-based SQLite database")
+        cutoff = date(through, 12, 31)
+        table = Transaction.__table__
+
+        with self.engine.connect() as connection:
+            db = Session(bind=connection, expire_on_commit=False)
+            registered = db.query(ArchivePartition).order_by(ArchivePartition.last_year).all()
+            if registered and through <= registered[-1].last_year:
+                raise ValueError(f"Years up to {registered[-1].last_year} are already archived")
+            if len(registered) >= archive.MAX_ARCHIVES:
+                raise ValueError(f"At most {archive.MAX_ARCHIVES} archives can be attached")
+            first_date = db.execute(select(func.min(table.c.date)).where(table.c.date <= cutoff)).scalar()
+            db.commit()
+            if first_date is None:
+                return None
+
+            file = f"{os.path.splitext(os.path.basename(database))[0]}.archive-{first_date.year}-{through}.db"
+            path = os.path.join(os.path.dirname(database), file)
+            _remove(path)
+            connection.exec_driver_sql(f"ATTACH DATABASE ? AS {BUILD_SCHEMA}", (path,))
+            connection.commit()
+            try:
+                partition = self._build(db, file, cutoff)
+                self._move(db, partition, cutoff)
+            except Exception:
+                db.rollback()
+                connection.exec_driver_sql(f"DETACH DATABASE {BUILD_SCHEMA}")
+                connection.commit()
+                _remove(path)
+                raise
+            connection.exec_driver_sql(f"DETACH DATABASE {BUILD_SCHEMA}")
+            connection.commit()
+            if vacuum:
+                # Возвращает системе страницы, освобожденные в основной базе
+                connection.exec_driver_sql("VACUUM main")
+                connection.commit()
+
+        # Файл архива больше не меняется
+        os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        return partition
+
+    def _build(self, db: Session, file: str, cutoff: date) -> ArchivePartition:
+        table = Transaction.__table__
+        options = archive.schema_options(BUILD_SCHEMA)
+        for model in (Transaction, DailyTotal, CategoryDailyTotal):
+            db.execute(CreateTable(model.__table__), execution_options=options)
+        # Строки переносятся в порядке (date, id), индексы строятся после
+        # загрузки: так файл получается плотным
+        columns = ", ".join(column.name for column in table.columns)
+        db.connection().exec_driver_sql(
+            f"INSERT INTO {BUILD_SCHEMA}.transactions ({columns}) "
+            f"SELECT {columns} FROM main.transactions WHERE date <= ? ORDER BY date, id",
+            (cutoff.isoformat(),),
+        )
+        for index in table.indexes:
+            db.execute(CreateIndex(index), execution_options=options)
+        # Агрегаты архива считаются по его же записям
+        RollupRepository(db).build_totals(BUILD_SCHEMA)
+        db.connection().exec_driver_sql(SEARCH_TABLE_DDL.format(table=f"{BUILD_SCHEMA}.{SEARCH_TABLE}"))
+        rebuild_search_index(db.connection(), BUILD_SCHEMA)
+
+        first_date, last_date, row_count, min_id, max_id = db.execute(
+            select(
+                func.min(table.c.date), func.max(table.c.date), func.count(), func.min(table.c.id), func.max(table.c.id)
+            ),
+            execution_options=options,
+        ).one()
+        db.commit()
+        return ArchivePartition(
+            file=file,
+            first_year=first_date.year,
+            last_year=cutoff.year,
+            row_count=row_count,
+            min_id=min_id,
+            max_id=max_id,
+        )
+
+    def _move(self, db: Session, partition: ArchivePartition, cutoff: date) -> None:
+        table = Transaction.__table__
+        db.add(partition)
+        # Следы удаления тех id, что заняты архивными записями, уже перекрыты
+        # ими (см. get_deleted_ids)
+        db.execute(
+            delete(TransactionTombstone).where(
+                TransactionTombstone.transaction_id.in_(
+                    select(table.c.id).where(table.c.date <= cutoff)
+                )
+            )
+        )
+        # Перенос не меняет журнал: ни следов удаления, ни новой версии, а
+        # агрегаты живой базы по-прежнему покрывают архивные годы
+        deleted = db.execute(delete(table).where(table.c.date <= cutoff)).rowcount
+        if deleted != partition.row_count:
+            raise RuntimeError("Transactions changed while sealing, run the command again")
+        db.commit()
+
+
+def _remove(path: str) -> None:
+    # Остаток прерванного запуска: файл не попал в реестр
+    if os.path.exists(path):
+        os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)
+        os.remove(path)
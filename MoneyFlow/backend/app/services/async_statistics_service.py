@@ -0,0 +1,85 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Dict, List, Optional
+
+from app.services.statistics_service import StatisticsService
+from app.schemas.period import StatisticsResponse, SeriesResponse, StatisticsPeriod
+from app.schemas.balance import BalanceResponse
+from app.schemas.category import CategoryStatisticsResponse
+
+
+class AsyncStatisticsService:
+    # Расчеты выполняет StatisticsService внутри AsyncSession.run_sync,
+    # поэтому оба стека читают одни и те же агрегаты одинаково
+    def __init__(self, db: AsyncSession, q: Optional[str] = None):
+        self.db = db
+        self.q = q
+
+    async def get_statistics_by_period(
+        self, start_date: date, end_date: date, granularity: str = "day"
+    ) -> StatisticsResponse:
+        return await self.db.run_sync(
+            lambda session: StatisticsService(session, self.q).get_statistics_by_period(
+                start_date, end_date, granularity
+            )
+        )
+
+    async def get_all_time_statistics(self, granularity: str = "day") -> StatisticsResponse:
+        return await self.db.run_sync(
+            lambda session: StatisticsService(session, self.q).get_all_time_statistics(granularity)
+        )
+
+    async def get_daily_statistics(self, target_date: date) -> StatisticsResponse:
+        return await self.db.run_sync(
+            lambda session: StatisticsService(session, self.q).get_daily_statistics(target_date)
+        )
+
+    async def get_weekly_statistics(self, target_date: date) -> StatisticsResponse:
+        return await self.db.run_sync(
+            lambda session: StatisticsService(session, self.q).get_weekly_statistics(target_date)
+        )
+
+    async def get_monthly_statistics(self, target_date: date) -> StatisticsResponse:
+        return await self.db.run_sync(
+            lambda session: StatisticsService(session, self.q).get_monthly_statistics(target_date)
+        )
+
+    async def get_statistics_batch(
+        self, periods: List[StatisticsPeriod]
+    ) -> Dict[str, StatisticsResponse]:
+        return await self.db.run_sync(
+            lambda session: StatisticsService(session, self.q).get_statistics_batch(periods)
+        )
+
+    async def get_series(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        granularity: str = "month",
+        fill_gaps: bool = True,
+        window: Optional[int] = None,
+    ) -> SeriesResponse:
+        return await self.db.run_sync(
+            lambda session: StatisticsService(session, self.q).get_series(
+                start_date, end_date, granularity, fill_gaps, window
+            )
+        )
+
+    async def get_category_statistics(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: str = "expense",
+        top: Optional[int] = None,
+        pivot: bool = False,
+    ) -> CategoryStatisticsResponse:
+        return await self.db.run_sync(
+            lambda session: StatisticsService(session, self.q).get_category_statistics(
+                start_date, end_date, transaction_type, top, pivot
+            )
+        )
+
+    async def get_balance(self, as_of: Optional[date] = None) -> BalanceResponse:
+        return await self.db.run_sync(
+            lambda session: StatisticsService(session, self.q).get_balance(as_of)
+        )
@@ -0,0 +1,87 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from datetime import date
+
+from app.columnar_format import encode_transaction_columns
+from app.metrics import phase
+from app.repositories.async_transaction_repository import AsyncTransactionRepository
+from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionResponse
+from app.services.transaction_service import encode_transaction_rows, next_page_key
+
+
+class AsyncTransactionService:
+    def __init__(self, db: AsyncSession):
+        self.repository = AsyncTransactionRepository(db)
+
+    async def create_transaction(self, transaction: TransactionCreate) -> TransactionResponse:
+        db_transaction = await self.repository.create(transaction)
+        return TransactionResponse.model_validate(db_transaction)
+
+    async def get_transaction(self, transaction_id: int) -> Optional[TransactionResponse]:
+        db_transaction = await self.repository.get_by_id(transaction_id)
+        if not db_transaction:
+            return None
+        return TransactionResponse.model_validate(db_transaction)
+
+    async def get_transactions(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: Optional[str] = None,
+        after: Optional[Tuple[date, int]] = None,
+        q: Optional[str] = None,
+        order: str = "date",
+    ) -> List[TransactionResponse]:
+        transactions = await self.repository.get_all(
+            skip=skip,
+            limit=limit,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            after=after,
+            q=q,
+            order=order,
+        )
+        with phase("validate"):
+            return [TransactionResponse.model_validate(t) for t in transactions]
+
+    async def get_transactions_json(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: Optional[str] = None,
+        after: Optional[Tuple[date, int]] = None,
+        q: Optional[str] = None,
+        order: str = "date",
+        columnar: bool = False,
+    ) -> Tuple[bytes, Optional[Tuple[date, int]]]:
+        rows = await self.repository.get_rows(
+            skip=skip,
+            limit=limit,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            after=after,
+            q=q,
+            order=order,
+        )
+        content = encode_transaction_columns(rows, start_date) if columnar else encode_transaction_rows(rows)
+        return content, next_page_key(rows, limit)
+
+    async def get_sync_version(self) -> int:
+        return await self.repository.get_sync_version()
+
+    async def update_transaction(
+        self, transaction_id: int, transaction: TransactionUpdate
+    ) -> Optional[TransactionResponse]:
+        db_transaction = await self.repository.update(transaction_id, transaction)
+        if not db_transaction:
+            return None
+        return TransactionResponse.model_validate(db_transaction)
+
+    async def delete_transaction(self, transaction_id: int) -> bool:
+        return await self.repository.delete(transaction_id)
@@ -0,0 +1,317 @@
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+
+from app import archive, ledger
+from app.database import ReadSessionLocal, current_ledger_id
+from app.models.transaction import Transaction
+from app.repositories.rollup_repository import TRANSACTION_TYPES
+from app.shards import shard_registry
+
+try:
+    import numpy as np
+except ImportError:  # numpy нужен только для statistics_engine=numpy
+    np = None
+
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+LOAD_CHUNK_SIZE = 10000
+
+
+def _day_number(value: date) -> int:
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def _from_day_number(value: int) -> date:
+    return EPOCH + timedelta(days=int(value))
+
+
+def _bucket_keys(days, granularity: str):
+    # Номер дня начала интервала для каждого дня, как bucket_start в SQL
+    if granularity == "day":
+        return days
+    if granularity == "week":
+        # 1970-01-01 - четверг: понедельник недели на (day + 3) % 7 дней раньше
+        return days - (days + 3) % 7
+    months = days.astype("datetime64[D]").astype("datetime64[M]")
+    if granularity == "quarter":
+        month_numbers = months.astype(np.int64)
+        months = (month_numbers - month_numbers % 3).astype("datetime64[M]")
+    elif granularity == "year":
+        months = months.astype("datetime64[Y]").astype("datetime64[M]")
+    return months.astype("datetime64[D]").astype(np.int64)
+
+
+def _row_keys(days, ids):
+    # Составной ключ порядка строк: поля структуры сравниваются по очереди
+    keys = np.empty(len(days), dtype=[("day", np.int32), ("id", np.int64)])
+    keys["day"] = days
+    keys["id"] = ids
+    return keys
+
+
+class ColumnarSnapshot:
+    # Неизменяемый колоночный снимок журнала, строки упорядочены по (date, id).
+    # Изменения создают новый снимок, поэтому запросы читают его без блокировок
+    def __init__(self, ids, days, amounts, types, categories, category_names: List[str]):
+        self.ids = ids
+        self.days = days
+        self.amounts = amounts
+        self.types = types
+        self.categories = categories
+        self.category_names = category_names
+        self.category_codes = {name: code for code, name in enumerate(category_names)}
+
+    @classmethod
+    def load(cls, db) -> "ColumnarSnapshot":
+        # Архивы от старых лет к новым, затем живая таблица: архивные годы
+        # раньше живых, поэтому порядок (date, id) сохраняется
+        table = Transaction.__table__
+        query = select(
+            table.c.id,
+            table.c.date,
+            table.c.type,
+            table.c.amount,
+            func.coalesce(table.c.category, ""),
+        ).order_by(table.c.date, table.c.id)
+        category_names: List[str] = []
+        category_codes: Dict[str, int] = {}
+        type_codes = {name: code for code, name in enumerate(TRANSACTION_TYPES)}
+        ids, days, amounts, types, categories = [], [], [], [], []
+        for schema in archive.schemas(newest_first=False):
+            result = db.execute(
+                query.execution_options(yield_per=LOAD_CHUNK_SIZE, **archive.schema_options(schema))
+            )
+            for partition in result.partitions():
+                for transaction_id, trans_date, trans_type, amount, category in partition:
+                    code = category_codes.get(category)
+                    if code is None:
+                        code = category_codes[category] = len(category_names)
+                        category_names.append(category)
+                    ids.append(transaction_id)
+                    days.append(_day_number(trans_date))
+                    amounts.append(amount)
+                    types.append(type_codes[trans_type])
+                    categories.append(code)
+        return cls(
+            np.array(ids, dtype=np.int64),
+            np.array(days, dtype=np.int32),
+            np.array(amounts, dtype=np.float64),
+            np.array(types, dtype=np.int8),
+            np.array(categories, dtype=np.int32),
+            category_names,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def patched(self, removed_ids: Sequence[int], rows: Iterable[tuple]) -> "ColumnarSnapshot":
+        # Запись удаляется по id и вставляется заново, поэтому повторное
+        # применение того же изменения ничего не портит
+        ids, days, amounts, types, categories = (
+            self.ids, self.days, self.amounts, self.types, self.categories
+        )
+        if len(removed_ids):
+            keep = ~np.isin(ids, np.asarray(removed_ids, dtype=np.int64))
+            ids, days, amounts, types, categories = (
+                ids[keep], days[keep], amounts[keep], types[keep], categories[keep]
+            )
+
+        # Новые строки в порядке (date, id): равные места вставки сохраняют
+        # его и в снимке
+        rows = sorted(rows, key=lambda row: (row[1], row[0]))
+        category_names, category_codes = self.category_names, self.category_codes
+        if rows:
+            codes = []
+            for _, _, _, _, category in rows:
+                category = category or ""
+                code = category_codes.get(category)
+                if code is None:
+                    if category_names is self.category_names:
+                        category_names, category_codes = list(category_names), dict(category_codes)
+                    code = category_codes[category] = len(category_names)
+                    category_names.append(category)
+                codes.append(code)
+            new_ids = np.array([row[0] for row in rows], dtype=np.int64)
+            new_days = np.array([_day_number(row[1]) for row in rows], dtype=np.int32)
+            # Места вставки - одним поиском по ключу (date, id) в отрезке
+            # снимка между первым и последним днем изменения
+            low = int(np.searchsorted(days, new_days[0], side="left"))
+            high = int(np.searchsorted(days, new_days[-1], side="right"))
+            positions = low + np.searchsorted(
+                _row_keys(days[low:high], ids[low:high]), _row_keys(new_days, new_ids)
+            )
+            ids = np.insert(ids, positions, new_ids)
+            days = np.insert(days, positions, new_days)
+            amounts = np.insert(amounts, positions, [float(row[3]) for row in rows])
+            types = np.insert(types, positions, [TRANSACTION_TYPES.index(row[2]) for row in rows])
+            categories = np.insert(categories, positions, codes)
+        return ColumnarSnapshot(ids, days, amounts, types, categories, category_names)
+
+    def _range(self, start_date: date, end_date: date) -> slice:
+        low = np.searchsorted(self.days, _day_number(start_date), side="left")
+        high = np.searchsorted(self.days, _day_number(end_date), side="right")
+        return slice(int(low), int(high))
+
+    def get_bucketed_totals(
+        self, start_date: date, end_date: date, granularity: str = "day"
+    ) -> List[tuple]:
+        window = self._range(start_date, end_date)
+        days = self.days[window]
+        if not len(days):
+            return []
+        # Строки упорядочены по дате, поэтому интервалы - непрерывные отрезки:
+        # ключ интервала считается только для различных дней, суммы - reduceat
+        day_starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        keys = _bucket_keys(days[day_starts].astype(np.int64), granularity)
+        bucket_starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        row_starts = day_starts[bucket_starts]
+
+        types = self.types[window]
+        amounts = self.amounts[window]
+        totals = [
+            np.add.reduceat(np.where(types == code, amounts, 0.0), row_starts)
+            for code in range(len(TRANSACTION_TYPES))
+        ]
+        counts = np.diff(np.r_[row_starts, len(days)])
+        return [
+            (_from_day_number(bucket), float(income), float(expense), float(adjustment), int(count))
+            for bucket, income, expense, adjustment, count in zip(
+                keys[bucket_starts].tolist(), *totals, counts
+            )
+        ]
+
+    def get_totals_as_of(self, as_of: Optional[date] = None) -> Tuple[float, float, float]:
+        high = len(self.days) if as_of is None else int(
+            np.searchsorted(self.days, _day_number(as_of), side="right")
+        )
+        totals = np.bincount(
+            self.types[:high], weights=self.amounts[:high], minlength=len(TRANSACTION_TYPES)
+        )
+        return float(totals[0]), float(totals[1]), float(totals[2])
+
+    def get_balance_as_of(self, as_of: Optional[date] = None) -> float:
+        income, expense, adjustment = self.get_totals_as_of(as_of)
+        return income - expense + adjustment
+
+    def get_date_range(self) -> Tuple[Optional[date], Optional[date]]:
+        if not len(self.days):
+            return None, None
+        return _from_day_number(self.days[0]), _from_day_number(self.days[-1])
+
+    def _category_window(self, start_date: date, end_date: date, trans_type: str):
+        window = self._range(start_date, end_date)
+        selected = self.types[window] == TRANSACTION_TYPES.index(trans_type)
+        return (
+            self.days[window][selected],
+            self.categories[window][selected],
+            self.amounts[window][selected],
+        )
+
+    def get_category_totals(
+        self, start_date: date, end_date: date, trans_type: str
+    ) -> List[tuple]:
+        _, categories, amounts = self._category_window(start_date, end_date, trans_type)
+        size = len(self.category_names)
+        totals = np.bincount(categories, weights=amounts, minlength=size)
+        counts = np.bincount(categories, minlength=size)
+        rows = [
+            (self.category_names[code], float(totals[code]), int(counts[code]))
+            for code in np.nonzero(counts)[0]
+        ]
+        rows.sort(key=lambda row: (-row[1], row[0]))
+        return rows
+
+    def get_category_months(
+        self, start_date: date, end_date: date, trans_type: str
+    ) -> List[tuple]:
+        days, categories, amounts = self._category_window(start_date, end_date, trans_type)
+        if not len(days):
+            return []
+        size = len(self.category_names)
+        # Месяц считается для различных дней и размножается на их строки
+        day_starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        months = np.repeat(
+            _bucket_keys(days[day_starts].astype(np.int64), "month"),
+            np.diff(np.r_[day_starts, len(days)]),
+        )
+        keys = months * size + categories
+        groups, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=amounts, minlength=len(groups))
+        counts = np.bincount(inverse, minlength=len(groups))
+        rows = [
+            (_from_day_number(key // size), self.category_names[key % size], float(total), int(count))
+            for key, total, count in zip(groups.tolist(), totals, counts)
+        ]
+        rows.sort(key=lambda row: (row[0], row[1]))
+        return rows
+
+
+class ColumnarEngine:
+    # Держит актуальный снимок каждого журнала: изменения с известным составом
+    # (создание, изменение, удаление) накладываются на снимок сразу после
+    # commit, остальные (импорт, пересборка) сбрасывают его - снимок загрузится
+    # заново при следующем запросе, когда версия журнала не совпадет
+    def __init__(self):
+        # id журнала -> (снимок, версия журнала, которой он соответствует)
+        self._snapshots: Dict[Optional[str], Tuple[ColumnarSnapshot, int]] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.patches = 0
+
+    def snapshot(self) -> ColumnarSnapshot:
+        if np is None:
+            raise RuntimeError("statistics_engine=numpy requires the numpy package")
+        ledger_id = current_ledger_id()
+        with self._lock:
+            version = ledger.current_version()
+            snapshot, snapshot_version = self._snapshots.get(ledger_id, (None, -1))
+            if snapshot is not None and snapshot_version == version:
+                return snapshot
+
+        # Отдельная сессия начинает чтение после того, как версия прочитана,
+        # поэтому снимок не старше этой версии
+        with ReadSessionLocal() as db:
+            snapshot = ColumnarSnapshot.load(db)
+        with self._lock:
+            if self._snapshots.get(ledger_id, (None, -1))[1] <= version:
+                self._snapshots[ledger_id] = (snapshot, version)
+            self.loads += 1
+        return snapshot
+
+    def apply(self, change: ledger.LedgerChange) -> None:
+        with self._lock:
+            current = self._snapshots.get(change.ledger_id)
+            if current is None:
+                return
+            snapshot, version = current
+            if change.rows is None or change.version != version + 1:
+                del self._snapshots[change.ledger_id]
+                return
+            self._snapshots[change.ledger_id] = (
+                snapshot.patched(change.transaction_ids, change.rows),
+                change.version,
+            )
+            self.patches += 1
+
+    def drop(self, ledger_id: Optional[str]) -> None:
+        # Журнал закрыт: снимок загрузится заново при следующем запросе к нему
+        with self._lock:
+            self._snapshots.pop(ledger_id, None)
+
+    def stats(self) -> dict:
+        # Итоги по всем загруженным снимкам журналов
+        with self._lock:
+            return {
+                "rows": sum(len(snapshot) for snapshot, _ in self._snapshots.values()),
+                "ledgers": len(self._snapshots),
+                "loads": self.loads,
+                "patches": self.patches,
+            }
+
+
+columnar_engine = ColumnarEngine()
+ledger.subscribe(columnar_engine.apply)
+shard_registry.on_close(columnar_engine.drop)
@@ -0,0 +1,209 @@
+import asyncio
+import threading
+from collections import deque
+from datetime import date
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+from app import ledger
+from app.config import settings
+from app.database import ReadSessionLocal, current_ledger_id
+from app.schemas.event import ChangeEvent, PeriodTotals, ResetEvent, TotalsEvent
+from app.services.statistics_service import StatisticsService
+
+# Маркер в очереди клиента: очередь переполнилась, события потеряны
+OVERFLOW = None
+
+# Событие журнала: (версия журнала в памяти процесса, событие)
+EventItem = Tuple[int, ChangeEvent]
+# Событие в общей истории: (журнал, версия, событие)
+HistoryItem = Tuple[Optional[str], int, ChangeEvent]
+Period = Tuple[date, date]
+
+
+def format_event(
+    event: str, data: BaseModel, version: Optional[int] = None, ledger_id: Optional[str] = None
+) -> str:
+    # Как и ETag, id включает epoch запуска и журнал: после перезапуска сервера
+    # прежний Last-Event-ID не примется за id этого запуска
+    lines = [f"id: {ledger.version_tag(version, ledger_id)}"] if version is not None else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {data.model_dump_json()}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _period_totals(periods: List[Period]) -> List[PeriodTotals]:
+    # Итоги считаются тем же StatisticsService и через тот же кэш, что и
+    # /api/statistics: клиенты с одинаковыми периодами разделяют результат
+    with ReadSessionLocal() as db:
+        service = StatisticsService(db)
+        return [service.get_period_totals(start_date, end_date) for start_date, end_date in periods]
+
+
+class Subscriber:
+    # Клиент потока. Очередь принадлежит циклу событий клиента, изменения из
+    # потоков записи попадают в нее через call_soon_threadsafe
+    def __init__(self, loop: asyncio.AbstractEventLoop, buffer_size: int, ledger_id: Optional[str]):
+        self.loop = loop
+        self.ledger_id = ledger_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.overflowed = False
+
+    def push(self, item: EventItem) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Клиент не успевает читать: вместо роста очереди он получит
+            # reset и перечитает данные целиком
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+            self.overflowed = True
+
+
+class EventBroker:
+    # Раздает зафиксированные изменения журнала клиентам /api/events.
+    # Последние history_size событий всех журналов хранятся для возобновления
+    # по Last-Event-ID; клиент получает события только своего журнала
+    def __init__(self, history_size: int, buffer_size: int, max_clients: int, heartbeat: float):
+        self.buffer_size = buffer_size
+        self.max_clients = max_clients
+        self.heartbeat = heartbeat
+        self._history: Deque[HistoryItem] = deque(maxlen=history_size)
+        # Наибольшая версия каждого журнала, вытесненная из истории:
+        # возобновить можно только после нее
+        self._evicted: Dict[Optional[str], int] = {}
+        self._subscribers: Set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def publish(self, change: ledger.LedgerChange) -> None:
+        # Слушатель журнала: вызывается после commit в потоке, выполнившем запись
+        item = (
+            change.version,
+            ChangeEvent(
+                action=change.action,
+                ids=list(change.transaction_ids),
+                dates=list(change.dates),
+                version=change.sync_version,
+            ),
+        )
+        with self._lock:
+            if len(self._history) == self._history.maxlen:
+                evicted_ledger, evicted_version, _ = self._history[0]
+                self._evicted[evicted_ledger] = max(self._evicted.get(evicted_ledger, 0), evicted_version)
+            self._history.append((change.ledger_id,) + item)
+            self.published += 1
+            subscribers = [
+                subscriber for subscriber in self._subscribers if subscriber.ledger_id == change.ledger_id
+            ]
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.push, item)
+            except RuntimeError:
+                # Цикл событий клиента уже закрыт
+                self.unsubscribe(subscriber)
+
+    def subscribe(self, last_event_id: Optional[str]) -> Tuple[Optional[Subscriber], Optional[List[EventItem]]]:
+        # Регистрация и выборка пропущенных событий под одной блокировкой
+        # с publish: каждое событие попадает либо в выборку, либо в очередь.
+        # Возвращает (None, None), если клиентов слишком много; выборка None -
+        # пропущенные события восстановить нельзя
+        loop = asyncio.get_running_loop()
+        ledger_id = current_ledger_id()
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None, None
+            subscriber = Subscriber(loop, self.buffer_size, ledger_id)
+            self._subscribers.add(subscriber)
+            return subscriber, self._missed(last_event_id, ledger_id)
+
+    def _missed(self, last_event_id: Optional[str], ledger_id: Optional[str]) -> Optional[List[EventItem]]:
+        if not last_event_id:
+            return []
+        prefix, _, version = last_event_id.rpartition("-")
+        if (
+            prefix != ledger.version_tag(0, ledger_id).rpartition("-")[0]
+            or not version.isdigit()
+            or int(version) < self._evicted.get(ledger_id, 0)
+        ):
+            return None
+        return sorted(
+            (item_version, event)
+            for item_ledger, item_version, event in self._history
+            if item_ledger == ledger_id and item_version > int(version)
+        )
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    async def stream(
+        self, subscriber: Subscriber, missed: Optional[List[EventItem]], periods: List[Period]
+    ) -> AsyncIterator[str]:
+        # Тело ответа text/event-stream: события change, при подписке на
+        # периоды - totals с пересчитанными итогами затронутых периодов,
+        # reset - клиенту нужно перечитать все, и heartbeat при простое
+        ledger_id = subscriber.ledger_id
+        try:
+            if missed is None:
+                yield format_event("reset", ResetEvent(reason="unknown_id"), ledger.current_version(), ledger_id)
+            for version, event in missed or ():
+                yield format_event("change", event, version, ledger_id)
+            if periods:
+                yield format_event("totals", TotalsEvent(periods=await run_in_threadpool(_period_totals, periods)))
+
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    # Комментарий SSE: прокси не закрывают простаивающее соединение
+                    yield ": heartbeat\n\n"
+                    continue
+                # Накопившиеся события отправляются пачкой, итоги пересчитываются
+                # один раз на пачку
+                items = [item]
+                while not subscriber.queue.empty():
+                    items.append(subscriber.queue.get_nowait())
+                affected = set()
+                for item in items:
+                    if item is OVERFLOW:
+                        subscriber.overflowed = False
+                        yield format_event("reset", ResetEvent(reason="overflow"), ledger.current_version(), ledger_id)
+                        affected.update(periods)
+                        continue
+                    version, event = item
+                    yield format_event("change", event, version, ledger_id)
+                    # Как и в кэше статистики: период затронут, если изменение
+                    # не позже его конца - от него зависит остаток на конец
+                    first_changed = min(event.dates, default=None)
+                    affected.update(
+                        period for period in periods if first_changed is None or period[1] >= first_changed
+                    )
+                if affected:
+                    changed = [period for period in periods if period in affected]
+                    totals = await run_in_threadpool(_period_totals, changed)
+                    yield format_event("totals", TotalsEvent(periods=totals))
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "clients": len(self._subscribers),
+                "published": self.published,
+                "history": len(self._history),
+            }
+
+
+event_broker = EventBroker(
+    settings.events_history_size,
+    settings.events_client_buffer,
+    settings.events_max_clients,
+    settings.events_heartbeat_seconds,
+)
+ledger.subscribe(event_broker.publish)
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Iterator, Optional, Sequence
+
+from app.repositories.transaction_repository import TransactionRepository
+
+EXPORT_FIELDS = ("id", "date", "type", "amount", "category", "description", "created_at")
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _row_values(row: tuple) -> tuple:
+    transaction_id, trans_date, trans_type, amount, category, description, created_at = row
+    return (
+        transaction_id,
+        trans_date.isoformat(),
+        trans_type,
+        amount,
+        category,
+        description,
+        created_at.isoformat() if created_at else None,
+    )
+
+
+def _encode_csv(rows: Sequence[tuple], write_header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if write_header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(_row_values(row) for row in rows)
+    return buffer.getvalue().encode()
+
+
+def _encode_ndjson(rows: Sequence[tuple]) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, _row_values(row))), ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+
+class ExportService:
+    def __init__(self, db: Session, chunk_size: int = 1000):
+        self.repository = TransactionRepository(db)
+        self.chunk_size = chunk_size
+
+    def stream(
+        self,
+        export_format: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: Optional[str] = None,
+        q: Optional[str] = None,
+    ) -> Iterator[bytes]:
+        # Каждая пачка строк кодируется и отдается клиенту сразу
+        if export_format == "csv":
+            # Заголовок отправляем до первого запроса к БД, чтобы первый байт
+            # уходил клиенту немедленно
+            yield _encode_csv([], write_header=True)
+
+        for rows in self.repository.iter_rows(
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            chunk_size=self.chunk_size,
+            q=q,
+        ):
+            if export_format == "csv":
+                yield _encode_csv(rows, write_header=False)
+            else:
+                yield _encode_ndjson(rows)
@@ -0,0 +1,172 @@
+import codecs
+import csv
+import json
+from abc import ABC, abstractmethod
+from pydantic import ValidationError
+from typing import List, Optional, Tuple
+
+from app import archive
+from app.database import SessionLocal, write_transaction
+from app.repositories.transaction_repository import TransactionRepository
+from app.schemas.transaction import TransactionCreate
+from app.schemas.transaction_import import ImportRowError, ImportResponse
+
+IMPORT_FIELDS = ("date", "type", "amount", "category", "description")
+
+# Строка файла: номер строки и словарь полей либо текст ошибки разбора
+ParsedRow = Tuple[int, Optional[dict], Optional[str]]
+
+
+class _LineParser(ABC):
+    # Потоковый разбор тела запроса: куски байтов превращаются в полные строки,
+    # незавершенный хвост хранится до следующего куска
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._pending = ""
+        self._line_number = 0
+
+    def feed(self, chunk: bytes) -> List[ParsedRow]:
+        self._pending += self._decoder.decode(chunk)
+        *lines, self._pending = self._pending.split("\n")
+        return self._parse_lines(lines)
+
+    def close(self) -> List[ParsedRow]:
+        self._pending += self._decoder.decode(b"", final=True)
+        lines, self._pending = [self._pending], ""
+        return self._parse_lines(lines)
+
+    def _parse_lines(self, lines: List[str]) -> List[ParsedRow]:
+        rows = []
+        for line in lines:
+            self._line_number += 1
+            rows.extend(self._parse_line(self._line_number, line.rstrip("\r")))
+        return rows
+
+    @abstractmethod
+    def _parse_line(self, line_number: int, line: str) -> List[ParsedRow]:
+        # Строка без перевода строки; возвращает разобранные из нее записи
+        ...
+
+
+class NdjsonParser(_LineParser):
+    def _parse_line(self, line_number: int, line: str) -> List[ParsedRow]:
+        if not line.strip():
+            return []
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError as e:
+            return [(line_number, None, f"Invalid JSON: {e.msg}")]
+        if not isinstance(value, dict):
+            return [(line_number, None, "Expected a JSON object")]
+        return [(line_number, value, None)]
+
+
+class CsvParser(_LineParser):
+    # Первая строка - заголовок с именами полей. Поле в кавычках может
+    # содержать перевод строки, поэтому запись копится, пока кавычки не закрыты
+    def __init__(self):
+        super().__init__()
+        self._header: Optional[List[str]] = None
+        self._record = ""
+        self._record_line = 0
+
+    def close(self) -> List[ParsedRow]:
+        rows = super().close()
+        if self._record:
+            rows.append((self._record_line, None, "Unterminated quoted field"))
+            self._record = ""
+        return rows
+
+    def _parse_line(self, line_number: int, line: str) -> List[ParsedRow]:
+        if self._record:
+            self._record += "\n" + line
+        else:
+            self._record, self._record_line = line, line_number
+        if self._record.count('"') % 2:
+            return []
+
+        record, self._record = self._record, ""
+        if not record.strip():
+            return []
+        values = next(csv.reader([record]))
+
+        if self._header is None:
+            self._header = [name.strip().lower() for name in values]
+            missing = [name for name in ("date", "type", "amount") if name not in self._header]
+            if missing:
+                return [(self._record_line, None, f"Missing CSV columns: {', '.join(missing)}")]
+            return []
+        if len(values) != len(self._header):
+            return [(self._record_line, None, f"Expected {len(self._header)} columns, got {len(values)}")]
+
+        row = {
+            name: (value if value != "" else None)
+            for name, value in zip(self._header, values)
+            if name in IMPORT_FIELDS
+        }
+        return [(self._record_line, row, None)]
+
+
+def create_parser(import_format: str) -> _LineParser:
+    if import_format == "csv":
+        return CsvParser()
+    if import_format == "ndjson":
+        return NdjsonParser()
+    raise ValueError(f"Unknown import format: {import_format}")
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+class ImportService:
+    # Сессии на весь импорт нет: тело запроса читается и проверяется без
+    # писателя, а каждый пакет вставляется в своей короткой транзакции.
+    # Поэтому медленная загрузка не задерживает остальные изменения журнала,
+    # но уже вставленные пакеты остаются, если импорт оборвался на середине
+    def __init__(self, max_errors: int = 1000):
+        self.max_errors = max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[ImportRowError] = []
+
+    def import_chunk(self, rows: List[ParsedRow]) -> int:
+        valid = self._validate(rows)
+        if valid:
+            with SessionLocal() as db, write_transaction(db):
+                self.imported += TransactionRepository(db).create_many(valid)
+        return len(valid)
+
+    def _validate(self, rows: List[ParsedRow]) -> List[TransactionCreate]:
+        # Проверка правилами TransactionCreate. Ошибочные строки пропускаются
+        # и попадают в отчет, пакет не прерывается
+        valid = []
+        for line_number, row, parse_error in rows:
+            if parse_error is None:
+                try:
+                    transaction = TransactionCreate(**row)
+                except ValidationError as e:
+                    parse_error = _format_validation_error(e)
+                else:
+                    if not archive.is_sealed(transaction.date):
+                        valid.append(transaction)
+                        continue
+                    parse_error = f"Year {transaction.date.year} is archived and read-only"
+            self._add_error(line_number, parse_error)
+        return valid
+
+    def _add_error(self, line_number: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(ImportRowError(line=line_number, error=error))
+
+    def report(self) -> ImportResponse:
+        return ImportResponse(
+            imported=self.imported,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+        )
@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from app import ledger
+from app.config import settings
+from app.database import current_ledger_id
+from app.shards import shard_registry
+
+# Ключ начинается с (start_date, end_date), дальше - параметры запроса.
+# Кэш общий для всех журналов: в нем ключ дополняется id журнала запроса
+CacheKey = Tuple[Any, ...]
+
+
+class StatisticsCache:
+    # LRU ответов статистики в памяти процесса. Записи сбрасываются после commit
+    # изменений: затрагивается период, если он содержит измененную дату или
+    # заканчивается позже нее - от истории до начала периода зависит
+    # opening_balance, а значит и closing_balance
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[Optional[str], CacheKey], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_compute(
+        self, key: CacheKey, compute: Callable[[], Any]
+    ) -> Any:
+        cached, version = self.lookup(key)
+        if cached is not None:
+            return cached
+        value = compute()
+        self.store(key, value, version)
+        return value
+
+    def lookup(self, key: CacheKey) -> Tuple[Optional[Any], int]:
+        # Вместе со значением возвращается версия журнала на момент поиска:
+        # ее нужно передать в store, когда значение будет посчитано
+        key = (current_ledger_id(), key)
+        with self._lock:
+            version = ledger.current_version()
+            if self.max_size <= 0:
+                return None, version
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached, version
+            self.misses += 1
+            return None, version
+
+    def store(self, key: CacheKey, value: Any, version: int) -> None:
+        key = (current_ledger_id(), key)
+        with self._lock:
+            # Если пока считали, прошла запись, результат мог быть прочитан
+            # до нее - такой ответ не кэшируем
+            if self.max_size <= 0 or ledger.current_version() != version:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, change: ledger.LedgerChange) -> None:
+        with self._lock:
+            entries = [key for key in self._entries if key[0] == change.ledger_id]
+            if change.dates:
+                first_changed = min(change.dates)
+                stale = [key for key in entries if key[1][1] >= first_changed]
+            else:
+                # Пересборка агрегатов или изменение без известных дат
+                stale = entries
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def drop(self, ledger_id: Optional[str]) -> None:
+        # Журнал закрыт: его ответы освобождают место в кэше
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == ledger_id]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "ledger_version": ledger.current_version(),
+            }
+
+
+statistics_cache = StatisticsCache(settings.statistics_cache_size)
+ledger.subscribe(statistics_cache.invalidate)
+shard_registry.on_close(statistics_cache.drop)
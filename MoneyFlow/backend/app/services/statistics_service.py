@@ -1,27 +1,409 @@
 from sqlalchemy.orm import Session
+from bisect import bisect_left, bisect_right
 from datetime import date, timedelta
 
-from app.repositories.transaction_repository import TransactionRepository
-from app.schemas.period import StatisticsResponse, DailyStatistics
+from typing import Dict, Iterable, List, Optional
+
+from app import ledger
+from app.config import settings
+from app.repositories.rollup_repository import (
+    RollupRepository,
+    SearchRollupRepository,
+    bucket_count,
+    bucket_floor,
+    next_bucket,
+)
+from app.schemas.period import (
+    StatisticsResponse,
+    DailyStatistics,
+    SeriesPoint,
+    SeriesResponse,
+    StatisticsPeriod,
+)
+from app.schemas.balance import BalanceResponse
+from app.schemas.event import PeriodTotals
+from app.schemas.category import CategoryTotal, CategoryMonthTotal, CategoryStatisticsResponse
+from app.services.statistics_cache import statistics_cache
+
+if settings.statistics_engine == "numpy":
+    # Колоночный движок (и numpy) загружаются, только если он выбран
+    from app.services.columnar_engine import columnar_engine
+else:
+    columnar_engine = None
+
+
+class SeriesTooLargeError(ValueError):
+    # Ряд с пропусками длиннее settings.series_max_points (HTTP 422)
+    pass
+
+
+def _group_days(days: List[tuple], granularity: str) -> List[tuple]:
+    # Дневные строки (date, income, expense, adjustment, count) по возрастанию
+    # даты сворачиваются в интервалы так же, как bucket_start в SQL
+    if granularity == "day":
+        return days
+    buckets: List[list] = []
+    for trans_date, income, expense, adjustment, count in days:
+        bucket = bucket_floor(trans_date, granularity)
+        if buckets and buckets[-1][0] == bucket:
+            totals = buckets[-1]
+            totals[1] += income
+            totals[2] += expense
+            totals[3] += adjustment
+            totals[4] += count
+        else:
+            buckets.append([bucket, income, expense, adjustment, count])
+    return [tuple(bucket) for bucket in buckets]
 
 
 class StatisticsService:
-    def __init__(self, db: Session):
-        self.repository = TransactionRepository(db)
+    def __init__(self, db: Session, q: Optional[str] = None):
+        self.db = db
+        # Поисковый запрос: статистика только по найденным транзакциям
+        self.q = q
+        self._rollups = None
+
+    @property
+    def rollups(self):
+        # Источник агрегатов: RollupRepository (SQL) или колоночный снимок
+        # с теми же методами чтения; выбирается при первом обращении, поэтому
+        # ответы из кэша не загружают снимок
+        if self._rollups is None:
+            if self.q:
+                self._rollups = SearchRollupRepository(self.db, self.q)
+            elif columnar_engine is not None:
+                self._rollups = columnar_engine.snapshot()
+            else:
+                self._rollups = RollupRepository(self.db)
+        return self._rollups
 
     def get_statistics_by_period(
-        self, start_date: date, end_date: date
+        self, start_date: date, end_date: date, granularity: str = "day"
+    ) -> StatisticsResponse:
+        return statistics_cache.get_or_compute(
+            (start_date, end_date, granularity, self.q),
+            lambda: self._compute_statistics(start_date, end_date, granularity),
+        )
+
+    def get_period_totals(self, start_date: date, end_date: date) -> PeriodTotals:
+        # Только итоги периода (поток /api/events): один интервал на год
+        # вместо строки на каждый день
+        statistics = self.get_statistics_by_period(start_date, end_date, "year")
+        return PeriodTotals(**statistics.model_dump(exclude={"daily_statistics"}))
+
+    def _compute_statistics(
+        self, start_date: date, end_date: date, granularity: str
+    ) -> StatisticsResponse:
+        # Читаем дневные агрегаты: стоимость зависит от числа дней в периоде,
+        # а не от числа транзакций. При granularity week/month строки
+        # daily_statistics соответствуют началу недели или месяца
+        return self._build_statistics(
+            start_date,
+            end_date,
+            self.rollups.get_bucketed_totals(start_date, end_date, granularity),
+            self._opening_balance(start_date),
+        )
+
+    def _opening_balance(self, start_date: date) -> float:
+        # Остаток на конец дня перед периодом; раньше date.min записей нет,
+        # а вычесть из нее день нельзя
+        if start_date == date.min:
+            return 0.0
+        return self.rollups.get_balance_as_of(start_date - timedelta(days=1))
+
+    def _build_statistics(
+        self, start_date: date, end_date: date, buckets: Iterable[tuple], opening_balance: float
     ) -> StatisticsResponse:
-        stats = self.repository.get_statistics_by_period(start_date, end_date)
+        daily_statistics = []
+        total_income = 0.0
+        total_expense = 0.0
+        total_adjustment = 0.0
+
+        for bucket, income, expense, adjustment, _ in buckets:
+            total_income += income
+            total_expense += expense
+            total_adjustment += adjustment
+            daily_statistics.append(
+                DailyStatistics(
+                    date=bucket,
+                    income=income,
+                    expense=expense,
+                    balance=income - expense,
+                    adjustment=adjustment,
+                )
+            )
+
         return StatisticsResponse(
-            period_start=stats["period_start"],
-            period_end=stats["period_end"],
-            total_income=stats["total_income"],
-            total_expense=stats["total_expense"],
-            balance=stats["balance"],
-            daily_statistics=[
-                DailyStatistics(**day) for day in stats["daily_statistics"]
-            ],
+            period_start=start_date,
+            period_end=end_date,
+            total_income=total_income,
+            total_expense=total_expense,
+            balance=total_income - total_expense,
+            daily_statistics=daily_statistics,
+            total_adjustment=total_adjustment,
+            opening_balance=opening_balance,
+            closing_balance=opening_balance + total_income - total_expense + total_adjustment,
+        )
+
+    def get_statistics_batch(self, periods: List[StatisticsPeriod]) -> Dict[str, StatisticsResponse]:
+        # Периоды, которых нет в кэше, считаются по одному чтению дневных
+        # агрегатов за общий диапазон и одному остатку на его начало; остаток
+        # на начало каждого периода получается из префиксных сумм
+        results: Dict[str, Optional[StatisticsResponse]] = {}
+        missing = []
+        for period in periods:
+            cached, _ = statistics_cache.lookup(
+                (period.start_date, period.end_date, period.granularity, self.q)
+            )
+            results[period.name] = cached
+            if cached is None:
+                missing.append(period)
+
+        if missing:
+            version = ledger.current_version()
+            first_date = min(period.start_date for period in missing)
+            last_date = max(period.end_date for period in missing)
+            days = self.rollups.get_bucketed_totals(first_date, last_date, "day")
+            envelope_opening = self._opening_balance(first_date)
+
+            dates = [row[0] for row in days]
+            net_before = [0.0]
+            for _, income, expense, adjustment, _ in days:
+                net_before.append(net_before[-1] + income - expense + adjustment)
+
+            for period in missing:
+                low = bisect_left(dates, period.start_date)
+                high = bisect_right(dates, period.end_date)
+                value = self._build_statistics(
+                    period.start_date,
+                    period.end_date,
+                    _group_days(days[low:high], period.granularity),
+                    envelope_opening + net_before[low],
+                )
+                statistics_cache.store(
+                    (period.start_date, period.end_date, period.granularity, self.q), value, version
+                )
+                results[period.name] = value
+        return results
+
+    def get_all_time_statistics(self, granularity: str = "day") -> StatisticsResponse:
+        # Диапазон берется из MIN/MAX по дневным агрегатам, без загрузки транзакций
+        first_date, last_date = self.rollups.get_date_range()
+        if first_date is None:
+            today = date.today()
+            return StatisticsResponse(
+                period_start=today,
+                period_end=today,
+                total_income=0.0,
+                total_expense=0.0,
+                balance=0.0,
+                daily_statistics=[],
+            )
+        return self.get_statistics_by_period(first_date, last_date, granularity)
+
+    def get_series(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        granularity: str = "month",
+        fill_gaps: bool = True,
+        window: Optional[int] = None,
+    ) -> SeriesResponse:
+        if start_date is None or end_date is None:
+            first_date, last_date = self.rollups.get_date_range()
+            if first_date is None:
+                today = date.today()
+                return SeriesResponse(
+                    granularity=granularity,
+                    period_start=today,
+                    period_end=today,
+                    opening_balance=0.0,
+                    closing_balance=0.0,
+                    points=[],
+                )
+            start_date = start_date or first_date
+            end_date = end_date or last_date
+        if fill_gaps:
+            points = bucket_count(start_date, end_date, granularity)
+            if points > settings.series_max_points:
+                raise SeriesTooLargeError(
+                    f"Series of {points} {granularity} buckets exceeds the limit of "
+                    f"{settings.series_max_points}, use a shorter range or a coarser granularity"
+                )
+        return statistics_cache.get_or_compute(
+            (start_date, end_date, granularity, "series", fill_gaps, window, self.q),
+            lambda: self._compute_series(start_date, end_date, granularity, fill_gaps, window),
+        )
+
+    def _compute_series(
+        self,
+        start_date: date,
+        end_date: date,
+        granularity: str,
+        fill_gaps: bool,
+        window: Optional[int],
+    ) -> SeriesResponse:
+        # Группировка выполняется в SQL по дневным агрегатам, поэтому размер
+        # ответа и объем работы зависят от числа интервалов, а не дней или транзакций
+        buckets = {
+            row[0]: row[1:]
+            for row in self.rollups.get_bucketed_totals(start_date, end_date, granularity)
+        }
+        if fill_gaps:
+            bucket_dates = []
+            current = bucket_floor(start_date, granularity)
+            last_bucket = bucket_floor(end_date, granularity)
+            while current <= end_date:
+                bucket_dates.append(current)
+                # Следующий за последним интервал не вычисляется: после
+                # интервала, содержащего date.max, даты уже нет
+                if current == last_bucket:
+                    break
+                current = next_bucket(current, granularity)
+        else:
+            bucket_dates = sorted(buckets)
+
+        opening_balance = self._opening_balance(start_date)
+        running = opening_balance
+        # Скользящее среднее net за window последних интервалов (в начале ряда -
+        # за сколько есть) по префиксным суммам
+        net_sums = [0.0]
+        points = []
+        for index, bucket in enumerate(bucket_dates):
+            income, expense, adjustment, count = buckets.get(bucket, (0.0, 0.0, 0.0, 0))
+            net = income - expense + adjustment
+            running += net
+            net_sums.append(net_sums[-1] + net)
+            rolling_net = None
+            if window:
+                first = max(0, index + 1 - window)
+                rolling_net = (net_sums[-1] - net_sums[first]) / (index + 1 - first)
+            points.append(
+                SeriesPoint(
+                    date=bucket,
+                    income=income,
+                    expense=expense,
+                    adjustment=adjustment,
+                    net=net,
+                    count=count,
+                    balance=running,
+                    rolling_net=rolling_net,
+                )
+            )
+
+        return SeriesResponse(
+            granularity=granularity,
+            period_start=start_date,
+            period_end=end_date,
+            opening_balance=opening_balance,
+            closing_balance=running,
+            points=points,
+        )
+
+    def get_category_statistics(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: str = "expense",
+        top: Optional[int] = None,
+        pivot: bool = False,
+    ) -> CategoryStatisticsResponse:
+        if start_date is None or end_date is None:
+            first_date, last_date = self.rollups.get_date_range()
+            if first_date is None:
+                today = date.today()
+                return CategoryStatisticsResponse(
+                    period_start=today,
+                    period_end=today,
+                    type=transaction_type,
+                    total=0.0,
+                    count=0,
+                    categories=[],
+                    months=[] if pivot else None,
+                )
+            start_date = start_date or first_date
+            end_date = end_date or last_date
+        return statistics_cache.get_or_compute(
+            (start_date, end_date, "categories", transaction_type, top, pivot, self.q),
+            lambda: self._compute_category_statistics(
+                start_date, end_date, transaction_type, top, pivot
+            ),
+        )
+
+    def _compute_category_statistics(
+        self,
+        start_date: date,
+        end_date: date,
+        transaction_type: str,
+        top: Optional[int],
+        pivot: bool,
+    ) -> CategoryStatisticsResponse:
+        # Группировка по категориям выполняется в SQL по category_daily_totals;
+        # категории за пределами top сворачиваются в одну строку is_other
+        rows = self.rollups.get_category_totals(start_date, end_date, transaction_type)
+        total = sum(row[1] for row in rows)
+        count = sum(row[2] for row in rows)
+
+        def share(amount: float) -> float:
+            return amount / total if total else 0.0
+
+        kept = rows if top is None else rows[:top]
+        categories = [
+            CategoryTotal(category=category or None, total=amount, count=amount_count, share=share(amount))
+            for category, amount, amount_count in kept
+        ]
+        folded = rows[len(kept):]
+        if folded:
+            other_total = sum(row[1] for row in folded)
+            categories.append(
+                CategoryTotal(
+                    total=other_total,
+                    count=sum(row[2] for row in folded),
+                    share=share(other_total),
+                    is_other=True,
+                )
+            )
+
+        months = None
+        if pivot:
+            kept_names = {row[0] for row in kept}
+            months = []
+            other_by_month: Dict[date, List[float]] = {}
+            for month, category, amount, amount_count in self.rollups.get_category_months(
+                start_date, end_date, transaction_type
+            ):
+                if category in kept_names:
+                    months.append(
+                        CategoryMonthTotal(month=month, category=category or None, total=amount, count=amount_count)
+                    )
+                else:
+                    other = other_by_month.setdefault(month, [0.0, 0])
+                    other[0] += amount
+                    other[1] += amount_count
+            months.extend(
+                CategoryMonthTotal(month=month, total=amount, count=amount_count, is_other=True)
+                for month, (amount, amount_count) in other_by_month.items()
+            )
+            months.sort(key=lambda item: (item.month, item.is_other))
+
+        return CategoryStatisticsResponse(
+            period_start=start_date,
+            period_end=end_date,
+            type=transaction_type,
+            total=total,
+            count=count,
+            categories=categories,
+            months=months,
+        )
+
+    def get_balance(self, as_of: Optional[date] = None) -> BalanceResponse:
+        income, expense, adjustment = self.rollups.get_totals_as_of(as_of)
+        return BalanceResponse(
+            as_of=as_of,
+            total_income=income,
+            total_expense=expense,
+            total_adjustment=adjustment,
+            balance=income - expense + adjustment,
         )
 
     def get_daily_statistics(self, target_date: date) -> StatisticsResponse:
@@ -1,14 +1,45 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import date
 
+from app.columnar_format import encode_transaction_columns
+from app.metrics import phase
 from app.repositories.transaction_repository import TransactionRepository
-from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionResponse
+from app.schemas.transaction import (
+    TransactionCreate,
+    TransactionUpdate,
+    TransactionResponse,
+    TransactionChangesResponse,
+    TRANSACTION_LIST_FIELDS,
+    transaction_list_adapter,
+)
+from app.schemas.transaction_bulk import (
+    TransactionBulkRequest,
+    TransactionBulkResponse,
+    BulkItemResult,
+    BulkRecategorizeResult,
+)
+
+
+def encode_transaction_rows(rows: List[tuple]) -> bytes:
+    # Тот же JSON, что FastAPI собрал бы из List[TransactionResponse]
+    with phase("serialize"):
+        return transaction_list_adapter.dump_json(
+            [dict(zip(TRANSACTION_LIST_FIELDS, row)) for row in rows]
+        )
+
+
+def next_page_key(rows: List[tuple], limit: int) -> Optional[Tuple[date, int]]:
+    # Ключ (date, id) последней строки полной страницы - основа курсора
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return last[TRANSACTION_LIST_FIELDS.index("date")], last[TRANSACTION_LIST_FIELDS.index("id")]
 
 
 class TransactionService:
-    def __init__(self, db: Session):
-        self.repository = TransactionRepository(db)
+    def __init__(self, db: Session, autocommit: bool = True):
+        self.repository = TransactionRepository(db, autocommit=autocommit)
 
     def create_transaction(self, transaction: TransactionCreate) -> TransactionResponse:
         db_transaction = self.repository.create(transaction)
@@ -27,6 +58,9 @@ class TransactionService:
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         transaction_type: Optional[str] = None,
+        after: Optional[Tuple[date, int]] = None,
+        q: Optional[str] = None,
+        order: str = "date",
     ) -> List[TransactionResponse]:
         transactions = self.repository.get_all(
             skip=skip,
@@ -34,8 +68,54 @@ class TransactionService:
             start_date=start_date,
             end_date=end_date,
             transaction_type=transaction_type,
+            after=after,
+            q=q,
+            order=order,
+        )
+        with phase("validate"):
+            return [TransactionResponse.model_validate(t) for t in transactions]
+
+    def get_transactions_json(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: Optional[str] = None,
+        after: Optional[Tuple[date, int]] = None,
+        q: Optional[str] = None,
+        order: str = "date",
+        columnar: bool = False,
+    ) -> Tuple[bytes, Optional[Tuple[date, int]]]:
+        rows = self.repository.get_rows(
+            skip=skip,
+            limit=limit,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            after=after,
+            q=q,
+            order=order,
         )
-        return [TransactionResponse.model_validate(t) for t in transactions]
+        content = encode_transaction_columns(rows, start_date) if columnar else encode_transaction_rows(rows)
+        return content, next_page_key(rows, limit)
+
+    def get_sync_version(self) -> int:
+        return self.repository.get_sync_version()
+
+    def get_changes(self, since: int, limit: int = 1000) -> TransactionChangesResponse:
+        # Версия читается первой: изменения после нее клиент получит
+        # при следующей синхронизации
+        version = self.repository.get_sync_version()
+        if since > version:
+            return TransactionChangesResponse(version=version, reset=True)
+        changed = self.repository.get_changed(since, version, limit + 1)
+        deleted = self.repository.get_deleted_ids(since, version, limit + 1)
+        if len(changed) + len(deleted) > limit:
+            return TransactionChangesResponse(version=version, reset=True)
+        with phase("validate"):
+            changes = [TransactionResponse.model_validate(t) for t in changed]
+        return TransactionChangesResponse(version=version, changes=changes, deleted=deleted)
 
     def update_transaction(
         self, transaction_id: int, transaction: TransactionUpdate
@@ -48,5 +128,20 @@ class TransactionService:
     def delete_transaction(self, transaction_id: int) -> bool:
         return self.repository.delete(transaction_id)
 
-
-
+    def bulk(self, request: TransactionBulkRequest) -> TransactionBulkResponse:
+        created, updated, recategorized, deleted, version = self.repository.bulk(
+            request.creates, request.updates, request.recategorize, request.deletes
+        )
+        return TransactionBulkResponse(
+            version=version,
+            creates=[BulkItemResult(id=transaction_id, status="created") for transaction_id in created],
+            updates=[
+                BulkItemResult(id=item.id, status="updated" if found else "not_found")
+                for item, found in zip(request.updates, updated)
+            ],
+            recategorize=[BulkRecategorizeResult(updated=count) for count in recategorized],
+            deletes=[
+                BulkItemResult(id=transaction_id, status="deleted" if found else "not_found")
+                for transaction_id, found in zip(request.deletes, deleted)
+            ],
+        )
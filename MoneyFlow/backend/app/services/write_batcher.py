@@ -0,0 +1,162 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app import ledger
+from app.config import settings
+from app.database import SessionLocal, current_ledger_id, use_ledger, write_transaction
+from app.services.transaction_service import TransactionService
+from app.shards import shard_registry
+
+# Сигнал остановки потока-писателя
+_STOP = object()
+
+
+@dataclass
+class _Operation:
+    function: Callable[[TransactionService], Any]
+    future: Future = field(default_factory=Future)
+
+
+class _Writer:
+    # Очередь и поток-писатель одного журнала
+    def __init__(self, ledger_id: Optional[str], target: Callable[["_Writer"], None]):
+        self.ledger_id = ledger_id
+        self.queue: "queue.Queue" = queue.Queue()
+        name = "write-batcher" if ledger_id is None else f"write-batcher-{ledger_id}"
+        self.thread = threading.Thread(target=target, args=(self,), name=name, daemon=True)
+        self.thread.start()
+
+
+class WriteBatcher:
+    # Групповая фиксация: операции из параллельных запросов выполняются одним
+    # потоком-писателем в общей транзакции БД, каждая в своем SAVEPOINT.
+    # Ошибка операции откатывает только ее, а fsync при commit один на пакет,
+    # поэтому пропускная способность растет с числом параллельных запросов.
+    # У каждого журнала (app.shards) свой поток: их записи не ждут друг друга
+    def __init__(self, max_size: int = 64, max_delay: float = 0.002):
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._writers: Dict[Optional[str], _Writer] = {}
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.operations = 0
+        self.failures = 0
+
+    def submit(self, function: Callable[[TransactionService], Any]) -> Future:
+        # function получает TransactionService без собственного commit
+        operation = _Operation(function)
+        ledger_id = current_ledger_id()
+        with self._start_lock:
+            writer = self._writers.get(ledger_id)
+            if writer is None:
+                writer = self._writers[ledger_id] = _Writer(ledger_id, self._loop)
+            writer.queue.put(operation)
+        return operation.future
+
+    def run(self, function: Callable[[TransactionService], Any]) -> Any:
+        # Блокирует поток вызывающего (sync-обработчики FastAPI в пуле потоков)
+        return self.submit(function).result()
+
+    async def run_async(self, function: Callable[[TransactionService], Any]) -> Any:
+        return await asyncio.wrap_future(self.submit(function))
+
+    def close(self) -> None:
+        # Операции, уже стоящие в очереди, фиксируются до остановки
+        with self._start_lock:
+            for writer in self._writers.values():
+                writer.queue.put(_STOP)
+            for writer in self._writers.values():
+                writer.thread.join()
+            self._writers.clear()
+
+    def close_ledger(self, ledger_id: Optional[str]) -> None:
+        # Журнал закрыт (app.shards): его поток останавливается
+        with self._start_lock:
+            writer = self._writers.pop(ledger_id, None)
+            if writer is not None:
+                writer.queue.put(_STOP)
+                writer.thread.join()
+
+    def stats(self) -> dict:
+        with self._start_lock:
+            writers = list(self._writers.values())
+        return {
+            "batches": self.batches,
+            "operations": self.operations,
+            "failures": self.failures,
+            "writers": len(writers),
+            "queued": sum(writer.queue.qsize() for writer in writers),
+            "average_batch": self.operations / self.batches if self.batches else 0.0,
+        }
+
+    def _loop(self, writer: _Writer) -> None:
+        # Сессии потока направляются в журнал писателя
+        with use_ledger(writer.ledger_id):
+            self._drain(writer.queue)
+
+    def _drain(self, operations: "queue.Queue") -> None:
+        stopping = False
+        while not stopping:
+            item = operations.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            # Пакет закрывается по размеру или по таймеру от первой операции;
+            # пока идет commit предыдущего пакета, новые операции копятся в очереди
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_size:
+                try:
+                    item = operations.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_Operation]) -> None:
+        completed = []
+        try:
+            # Пакет фиксируется под той же блокировкой писателя журнала, что
+            # и одиночные изменения
+            with SessionLocal() as db, write_transaction(db):
+                service = TransactionService(db, autocommit=False)
+                for operation in batch:
+                    if not operation.future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with ledger.savepoint(db):
+                            result = operation.function(service)
+                    except Exception as error:
+                        self.failures += 1
+                        operation.future.set_exception(error)
+                    else:
+                        completed.append((operation, result))
+        except Exception as error:
+            # commit (или открытие сессии) не удался: ни одна операция пакета
+            # не зафиксирована
+            for operation in batch:
+                if not operation.future.done():
+                    operation.future.set_exception(error)
+                    self.failures += 1
+            return
+        finally:
+            self.batches += 1
+            self.operations += len(batch)
+        for operation, result in completed:
+            operation.future.set_result(result)
+
+
+write_batcher = (
+    WriteBatcher(settings.write_batch_max_size, settings.write_batch_max_delay_ms / 1000)
+    if settings.write_batch_enabled
+    else None
+)
+if write_batcher is not None:
+    shard_registry.on_close(write_batcher.close_ledger)
@@ -0,0 +1,326 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.database import (
+    create_async_database_engine,
+    create_read_engine,
+    create_write_engine,
+    drop_writer_locks,
+    init_db,
+    ledger_context,
+    use_ledger,
+)
+
+# Отдельные журналы (домохозяйства, счета) на одном сервере. Журнал выбирается
+# путем /api/ledgers/{ledger_id}/... или заголовком X-Ledger-Id; без них запрос
+# обслуживает основная база. У каждого журнала свой файл SQLite в ledgers_dir
+# со своим соединением-писателем, поэтому записи в разные журналы идут
+# параллельно. Журнал создается явно (PUT /api/ledgers/{ledger_id}), запросы к
+# несуществующему получают 404: иначе любой id с опечаткой оставлял бы новый
+# файл. Движки открываются при первом обращении и держатся в LRU не больше
+# ledger_max_open; журналы без запросов дольше ledger_idle_seconds закрываются
+
+LEDGER_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+LEDGER_PATH = re.compile(r"^/api/ledgers/([^/]+)(/.*)?$")
+# Сам путь журнала - маршрут его создания, а не запрос к журналу
+LEDGER_RESOURCE = re.compile(r"^/api/ledgers/[^/]+/?$")
+LEDGER_HEADER = "x-ledger-id"
+
+
+class InvalidLedgerError(ValueError):
+    # Недопустимый id журнала (HTTP 400)
+    pass
+
+
+class LedgerNotFoundError(LookupError):
+    # Журнал не создан (HTTP 404)
+    pass
+
+
+def check_ledger_id(ledger_id: str) -> str:
+    # id становится именем файла, поэтому допускаются только строчные
+    # латинские буквы, цифры, "-" и "_"
+    if not LEDGER_ID_PATTERN.match(ledger_id):
+        raise InvalidLedgerError(
+            "Invalid ledger id, use 1-64 lowercase letters, digits, '-' or '_'"
+        )
+    return ledger_id
+
+
+def ledger_path(ledger_id: str) -> str:
+    return os.path.abspath(os.path.join(settings.ledgers_dir, f"{ledger_id}.db"))
+
+
+def _ledger_url(ledger_id: str, asynchronous: bool = False) -> str:
+    url = make_url(settings.sync_database_url).set(database=ledger_path(ledger_id))
+    if asynchronous:
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url.render_as_string(hide_password=False)
+
+
+class Shard:
+    # Движки одного журнала. Архивы закрытых лет есть только у основной базы
+    def __init__(self, ledger_id: str):
+        self.ledger_id = ledger_id
+        url = _ledger_url(ledger_id)
+        self.engine = create_write_engine(url, archives=False)
+        self.read_engine = create_read_engine(url, settings.ledger_read_pool_size, archives=False)
+        self.async_engine = None
+        if settings.async_database:
+            self.async_engine = create_async_database_engine(
+                _ledger_url(ledger_id, asynchronous=True), archives=False, pooled=False
+            )
+        # Запросы, которые сейчас работают с журналом: такой журнал не закрывается
+        self.active = 0
+        self.last_used = time.monotonic()
+
+    def initialize(self) -> None:
+        # Схема, индексы и агрегаты - как у основной базы при запуске
+        from app.repositories.rollup_repository import RollupRepository
+
+        init_db(self.engine)
+        with use_ledger(self.ledger_id), Session(self.engine) as db:
+            RollupRepository(db).ensure_built()
+
+    def bind_for(self, role: str):
+        if role == "read":
+            return self.read_engine
+        if role == "async":
+            return self.async_engine.sync_engine
+        return self.engine
+
+    def close(self) -> None:
+        self.engine.dispose()
+        self.read_engine.dispose()
+        if self.async_engine is not None:
+            # Соединения без пула уже закрыты, освобождать нечего
+            self.async_engine.sync_engine.dispose()
+
+
+class ShardRegistry:
+    def __init__(self, max_open: int, idle_seconds: float):
+        self.max_open = max_open
+        self.idle_seconds = idle_seconds
+        self._shards: "OrderedDict[str, Shard]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Открытие журнала (создание файла и схемы) идет под своей блокировкой,
+        # чтобы не задерживать запросы к уже открытым журналам
+        self._opening: dict = {}
+        self._open_listeners: List[Callable[[Shard], None]] = []
+        self._close_listeners: List[Callable[[str], None]] = []
+        self._reaper: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self.opened = 0
+        self.closed = 0
+
+    def on_open(self, listener: Callable[[Shard], None]) -> None:
+        # Вызывается для каждого нового журнала до создания схемы
+        self._open_listeners.append(listener)
+
+    def on_close(self, listener: Callable[[str], None]) -> None:
+        # Состояние процесса, которое держится по журналу (снимки, очереди
+        # записи), освобождается вместе с ним
+        self._close_listeners.append(listener)
+
+    def create(self, ledger_id: str) -> bool:
+        # Создает файл и схему журнала; False - журнал уже был
+        existed = os.path.exists(ledger_path(ledger_id))
+        self.get(ledger_id, create=True)
+        return not existed
+
+    def acquire(self, ledger_id: str) -> Shard:
+        # Открывает журнал при необходимости и отмечает активный запрос;
+        # парный вызов release - по завершении ответа
+        shard = self.get(ledger_id, acquire=True)
+        self._ensure_reaper()
+        return shard
+
+    def release(self, shard: Shard) -> None:
+        with self._lock:
+            shard.active -= 1
+            shard.last_used = time.monotonic()
+            evicted = self._evict_over_limit()
+        self._close(evicted)
+
+    def get(self, ledger_id: str, acquire: bool = False, create: bool = False) -> Shard:
+        while True:
+            with self._lock:
+                shard = self._shards.get(ledger_id)
+                if shard is not None:
+                    self._shards.move_to_end(ledger_id)
+                    if acquire:
+                        shard.active += 1
+                    return shard
+                opening = self._opening.setdefault(ledger_id, threading.Lock())
+
+            with opening:
+                with self._lock:
+                    shard = self._shards.get(ledger_id)
+                    if shard is not None:
+                        # Журнал открыл параллельный запрос
+                        self._shards.move_to_end(ledger_id)
+                        if acquire:
+                            shard.active += 1
+                        return shard
+                    if self._opening.get(ledger_id) is not opening:
+                        # Открытие параллельным запросом не удалось, и его
+                        # блокировка уже снята: пробуем заново со свежей
+                        continue
+                try:
+                    shard = self._open(ledger_id, create)
+                    with self._lock:
+                        self._shards[ledger_id] = shard
+                        self.opened += 1
+                        if acquire:
+                            shard.active += 1
+                        evicted = self._evict_over_limit()
+                finally:
+                    # И после ошибки: иначе блокировка журнала остается в
+                    # _opening навсегда
+                    with self._lock:
+                        if self._opening.get(ledger_id) is opening:
+                            del self._opening[ledger_id]
+            self._close(evicted)
+            return shard
+
+    def _open(self, ledger_id: str, create: bool) -> Shard:
+        if not create and not os.path.exists(ledger_path(ledger_id)):
+            raise LedgerNotFoundError(f"Ledger {ledger_id} not found")
+        os.makedirs(settings.ledgers_dir, exist_ok=True)
+        shard = Shard(ledger_id)
+        try:
+            for listener in self._open_listeners:
+                listener(shard)
+            shard.initialize()
+        except Exception:
+            shard.close()
+            raise
+        return shard
+
+    def close_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [
+                ledger_id
+                for ledger_id, shard in self._shards.items()
+                if shard.active == 0 and shard.last_used <= deadline
+            ]
+            evicted = [self._shards.pop(ledger_id) for ledger_id in idle]
+        self._close(evicted)
+
+    def close_all(self) -> None:
+        self._stopped.set()
+        with self._lock:
+            evicted = list(self._shards.values())
+            self._shards.clear()
+        self._close(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "open": len(self._shards),
+                "active": sum(1 for shard in self._shards.values() if shard.active),
+                "max_open": self.max_open,
+                "opened": self.opened,
+                "closed": self.closed,
+            }
+
+    def _evict_over_limit(self) -> List[Shard]:
+        # Вызывается под блокировкой. Закрываются давно не использованные
+        # журналы без активных запросов; если заняты все, лимит временно
+        # превышается до освобождения
+        evicted = []
+        for ledger_id in list(self._shards):
+            if len(self._shards) <= self.max_open:
+                break
+            if self._shards[ledger_id].active == 0:
+                evicted.append(self._shards.pop(ledger_id))
+        return evicted
+
+    def _close(self, shards: List[Shard]) -> None:
+        for shard in shards:
+            # Сначала слушатели: поток групповой фиксации дописывает очередь
+            # через движки журнала, освобождать их можно только после его остановки
+            for listener in self._close_listeners:
+                listener(shard.ledger_id)
+            shard.close()
+            with self._lock:
+                self.closed += 1
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is not None or self.idle_seconds <= 0:
+            return
+        with self._lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name="ledger-reaper", daemon=True)
+                self._reaper.start()
+
+    def _reap(self) -> None:
+        interval = min(max(self.idle_seconds / 4, 0.05), 30.0)
+        while not self._stopped.wait(interval):
+            self.close_idle()
+
+
+shard_registry = ShardRegistry(settings.ledger_max_open, settings.ledger_idle_seconds)
+shard_registry.on_close(drop_writer_locks)
+
+
+class LedgerMiddleware:
+    # Выбирает журнал запроса: /api/ledgers/{ledger_id}/transactions/ обслуживает
+    # тот же маршрут, что /api/transactions/, заголовок X-Ledger-Id - то же
+    # для прежних путей. Журнал открыт (и не закрывается) до конца ответа,
+    # включая потоковые ответы
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not scope["path"].startswith("/api")
+            or LEDGER_RESOURCE.match(scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
+        ledger_id = Headers(scope=scope).get(LEDGER_HEADER)
+        match = LEDGER_PATH.match(scope["path"])
+        if match:
+            if ledger_id is not None and ledger_id != match.group(1):
+                detail = "Ledger id in path and header differ"
+                await JSONResponse(status_code=400, content={"detail": detail})(scope, receive, send)
+                return
+            ledger_id = match.group(1)
+            path = "/api" + (match.group(2) or "")
+            scope = dict(scope, path=path, raw_path=path.encode())
+        if ledger_id is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            check_ledger_id(ledger_id)
+        except InvalidLedgerError as e:
+            await JSONResponse(status_code=400, content={"detail": str(e)})(scope, receive, send)
+            return
+
+        # Открытие журнала - файловые операции
+        try:
+            shard = await run_in_threadpool(shard_registry.acquire, ledger_id)
+        except LedgerNotFoundError as e:
+            await JSONResponse(status_code=404, content={"detail": str(e)})(scope, receive, send)
+            return
+        token = ledger_context.set(ledger_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            ledger_context.reset(token)
+            await run_in_threadpool(shard_registry.release, shard)
@@ -0,0 +1,125 @@
+"""Сравнение пропускной способности синхронного и асинхронного стеков.
+
+Для каждого режима запускается отдельный uvicorn с временной базой,
+база заполняется через импорт, затем N параллельных клиентов в течение
+заданного времени запрашивают список транзакций и месячную статистику.
+
+    python -m benchmarks.async_vs_sync --rows 20000 --concurrency 32 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import httpx
+
+ENDPOINTS = (
+    ("list", "/api/transactions/", {"limit": 50}),
+    ("monthly", "/api/statistics/monthly", {"date": "2024-06-15"}),
+)
+
+
+def _ndjson_rows(rows: int, seed: int = 42) -> bytes:
+    rnd = random.Random(seed)
+    start = date(2022, 1, 1)
+    lines = []
+    for _ in range(rows):
+        trans_type = rnd.choice(("income", "expense", "expense", "expense"))
+        lines.append(json.dumps({
+            "date": (start + timedelta(days=rnd.randrange(3 * 365))).isoformat(),
+            "type": trans_type,
+            "amount": round(rnd.uniform(1, 5000), 2),
+            "category": rnd.choice(("food", "rent", "salary", "transport", "fun")),
+        }))
+    return "\n".join(lines).encode()
+
+
+def _start_server(database_url: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=database_url)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+
+
+async def _wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(100):
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("Server did not start")
+
+
+async def _load(client: httpx.AsyncClient, path: str, params: dict, concurrency: int, duration: float) -> dict:
+    deadline = time.perf_counter() + duration
+    completed = 0
+    errors = 0
+
+    async def worker():
+        nonlocal completed, errors
+        while time.perf_counter() < deadline:
+            response = await client.get(path, params=params)
+            if response.status_code == 200:
+                completed += 1
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"requests": completed, "errors": errors, "rps": round(completed / elapsed, 1)}
+
+
+async def _run_mode(mode: str, rows: bytes, args) -> dict:
+    driver = "sqlite+aiosqlite" if mode == "async" else "sqlite"
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"{driver}:///{os.path.join(directory, 'bench.db')}"
+        server = _start_server(database_url, args.port)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60
+            ) as client:
+                await _wait_ready(client)
+                await client.post(
+                    "/api/transactions/import",
+                    content=rows,
+                    headers={"content-type": "application/x-ndjson"},
+                )
+                return {
+                    name: await _load(client, path, params, args.concurrency, args.duration)
+                    for name, path, params in ENDPOINTS
+                }
+        finally:
+            server.terminate()
+            server.wait()
+
+
+async def main(args) -> dict:
+    rows = _ndjson_rows(args.rows)
+    results = {
+        "rows": args.rows,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+    }
+    for mode in ("sync", "async"):
+        results[mode] = await _run_mode(mode, rows, args)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    print(json.dumps(asyncio.run(main(parser.parse_args())), indent=2))
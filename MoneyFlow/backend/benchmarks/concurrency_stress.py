@@ -0,0 +1,121 @@
+"""Нагрузочная проверка конкурентных записей и чтений.
+
+Запускает uvicorn с временной базой, параллельно создает, изменяет и удаляет
+транзакции и читает список и статистику. В конце проверяет, что не было
+ошибок "database is locked" (ответов 5xx) и что агрегаты сходятся с данными.
+С --write-batch записи идут через групповую фиксацию (WRITE_BATCH_ENABLED),
+число записей в секунду можно сравнить с обычным режимом; --synchronous full
+делает fsync на каждый commit, как на сервере с требованием надежности.
+
+    python -m benchmarks.concurrency_stress --writers 16 --readers 16 --duration 10
+    python -m benchmarks.concurrency_stress --writers 64 --readers 0 --synchronous full --write-batch
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks.async_vs_sync import _start_server, _wait_ready
+
+
+async def _writer(client: httpx.AsyncClient, deadline: float, seed: int, stats: Counter) -> None:
+    rnd = random.Random(seed)
+    own_ids = []
+    while time.perf_counter() < deadline:
+        action = rnd.random()
+        trans_date = f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+        if action < 0.6 or not own_ids:
+            response = await client.post("/api/transactions/", json={
+                "date": trans_date,
+                "type": rnd.choice(("income", "expense")),
+                "amount": round(rnd.uniform(1, 1000), 2),
+            })
+            if response.status_code == 201:
+                own_ids.append(response.json()["id"])
+        elif action < 0.85:
+            response = await client.put(
+                f"/api/transactions/{rnd.choice(own_ids)}",
+                json={"date": trans_date, "amount": round(rnd.uniform(1, 1000), 2)},
+            )
+        else:
+            response = await client.delete(f"/api/transactions/{own_ids.pop()}")
+        stats[f"write_{response.status_code}"] += 1
+
+
+async def _reader(client: httpx.AsyncClient, deadline: float, seed: int, stats: Counter) -> None:
+    rnd = random.Random(seed)
+    while time.perf_counter() < deadline:
+        if rnd.random() < 0.5:
+            response = await client.get("/api/transactions/", params={"limit": 100})
+        else:
+            response = await client.get(
+                "/api/statistics/monthly", params={"date": f"2024-{rnd.randint(1, 12):02d}-15"}
+            )
+        stats[f"read_{response.status_code}"] += 1
+
+
+async def main(args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'stress.db')}"
+        os.environ["SQLITE_SYNCHRONOUS"] = args.synchronous
+        os.environ["WRITE_BATCH_ENABLED"] = "true" if args.write_batch else "false"
+        server = _start_server(database_url, args.port)
+        stats = Counter()
+        try:
+            limits = httpx.Limits(max_connections=args.writers + args.readers)
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60
+            ) as client:
+                await _wait_ready(client)
+                deadline = time.perf_counter() + args.duration
+                await asyncio.gather(
+                    *(_writer(client, deadline, seed, stats) for seed in range(args.writers)),
+                    *(_reader(client, deadline, 1000 + seed, stats) for seed in range(args.readers)),
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+        verify = subprocess.run(
+            [sys.executable, "-m", "app.cli", "rollup", "verify"],
+            env=dict(os.environ, DATABASE_URL=database_url),
+            capture_output=True,
+            text=True,
+        )
+
+    writes = sum(count for key, count in stats.items() if key.startswith("write_"))
+    server_errors = sum(
+        count for key, count in stats.items() if int(key.rsplit("_", 1)[1]) >= 500
+    )
+    return {
+        "writers": args.writers,
+        "readers": args.readers,
+        "duration": args.duration,
+        "synchronous": args.synchronous,
+        "write_batch": args.write_batch,
+        "writes_per_second": round(writes / args.duration, 1),
+        "responses": dict(sorted(stats.items())),
+        "server_errors": server_errors,
+        "rollup_consistent": verify.returncode == 0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--synchronous", default="normal", choices=("off", "normal", "full"))
+    parser.add_argument("--write-batch", action="store_true")
+    result = asyncio.run(main(parser.parse_args()))
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["server_errors"] == 0 and result["rollup_consistent"] else 1)
@@ -0,0 +1,145 @@
+"""Детерминированный генератор синтетического журнала для бенчмарков.
+
+Один и тот же seed и число строк всегда дают одну и ту же базу: зарплата
+и аренда раз в месяц, ежедневные расходы с большим числом покупок в выходные,
+категории с неравномерной частотой, редкие корректировки. Строки пишутся
+пакетами многострочных INSERT, затем пересобираются агрегаты.
+
+    python -m benchmarks.generator --rows 1000000 --output bench.db
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from datetime import date, timedelta
+from typing import Iterator, Optional
+
+DEFAULT_START = date(2005, 1, 1)
+LOAD_CHUNK_SIZE = 20000
+
+# Категория расходов, относительная частота и медиана суммы
+EXPENSE_CATEGORIES = (
+    ("food", 30, 900.0),
+    ("transport", 14, 250.0),
+    ("cafe", 12, 700.0),
+    ("shopping", 9, 2500.0),
+    ("utilities", 5, 3500.0),
+    ("health", 4, 1800.0),
+    ("fun", 6, 1500.0),
+    ("gifts", 2, 3000.0),
+    ("education", 2, 6000.0),
+    ("travel", 1, 25000.0),
+    (None, 5, 500.0),
+)
+INCOME_CATEGORIES = (("freelance", 3, 15000.0), ("cashback", 5, 300.0), ("gifts", 1, 5000.0))
+
+
+def configure(database_path: str, **settings: str) -> None:
+    # Настройки приложения читаются при импорте app, поэтому окружение
+    # задается до первого импорта
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(database_path)}"
+    for name, value in settings.items():
+        os.environ[name.upper()] = str(value)
+
+
+def _weighted(rnd: random.Random, choices: tuple) -> tuple:
+    return rnd.choices(choices, weights=[weight for _, weight, _ in choices])[0]
+
+
+def _amount(rnd: random.Random, median: float) -> float:
+    # Логнормальное распределение: много мелких сумм и редкие крупные
+    return round(max(1.0, rnd.lognormvariate(math.log(median), 0.6)), 2)
+
+
+def generate_rows(rows: int, seed: int = 42, start: date = DEFAULT_START) -> Iterator[dict]:
+    rnd = random.Random(seed)
+    # Около 12 транзакций в день, история от года до 20 лет; в больших
+    # журналах растет плотность, а не длина истории
+    days = min(max(365, rows // 12), 20 * 365)
+    produced = 0
+    for offset in range(days):
+        if produced >= rows:
+            return
+        current = start + timedelta(days=offset)
+        remaining_days = days - offset
+        per_day = (rows - produced) / remaining_days
+        # В выходные покупок примерно в полтора раза больше
+        if current.weekday() >= 5:
+            per_day *= 1.4
+        count = int(per_day) + (1 if rnd.random() < per_day - int(per_day) else 0)
+
+        day_rows = []
+        if current.day in (5, 20):
+            day_rows.append({"type": "income", "amount": _amount(rnd, 60000.0), "category": "salary"})
+        if current.day == 1:
+            day_rows.append({"type": "expense", "amount": _amount(rnd, 35000.0), "category": "rent"})
+        for _ in range(max(0, count - len(day_rows))):
+            roll = rnd.random()
+            if roll < 0.005:
+                amount = round(rnd.uniform(-2000, 2000), 2) or 1.0
+                day_rows.append({"type": "adjustment", "amount": amount, "category": None})
+            elif roll < 0.06:
+                category, _, median = _weighted(rnd, INCOME_CATEGORIES)
+                day_rows.append({"type": "income", "amount": _amount(rnd, median), "category": category})
+            else:
+                category, _, median = _weighted(rnd, EXPENSE_CATEGORIES)
+                day_rows.append({"type": "expense", "amount": _amount(rnd, median), "category": category})
+
+        for row in day_rows[: rows - produced]:
+            row["date"] = current
+            row["description"] = None
+            yield row
+        produced += min(len(day_rows), rows - produced)
+
+
+def load(rows: int, seed: int = 42) -> dict:
+    # База берется из DATABASE_URL (см. configure)
+    from app.database import SessionLocal, init_db
+    from app.repositories.rollup_repository import RollupRepository
+    from app.repositories.transaction_repository import insert_rows
+
+    init_db()
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        chunk = []
+        for row in generate_rows(rows, seed):
+            chunk.append(row)
+            if len(chunk) >= LOAD_CHUNK_SIZE:
+                insert_rows(db, chunk)
+                chunk = []
+        if chunk:
+            insert_rows(db, chunk)
+        db.commit()
+        inserted = time.perf_counter()
+        RollupRepository(db).rebuild()
+    finished = time.perf_counter()
+    return {
+        "rows": rows,
+        "seed": seed,
+        "insert_seconds": round(inserted - started, 2),
+        "rollup_seconds": round(finished - inserted, 2),
+    }
+
+
+def prepare_database(database_path: str, rows: int, seed: int = 42, **settings: str) -> Optional[dict]:
+    # Готовая база переиспользуется между запусками: имя файла задает
+    # вызывающий код, обычно с числом строк и seed
+    exists = os.path.exists(database_path)
+    configure(database_path, **settings)
+    if exists:
+        return None
+    return load(rows, seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench.db")
+    args = parser.parse_args()
+    if os.path.exists(args.output):
+        parser.error(f"{args.output} already exists")
+    configure(args.output)
+    print(json.dumps(load(args.rows, args.seed), indent=2))
@@ -0,0 +1,119 @@
+"""Нагрузочный тест приложения внутри процесса (ASGI, без сети).
+
+Для каждого эндпоинта N параллельных клиентов в течение заданного времени
+отправляют запросы со случайными, но воспроизводимыми параметрами; в отчет
+попадают p50/p95/p99 задержки и пропускная способность.
+
+    python -m benchmarks.load_test --rows 100000 --concurrency 16 --duration 5 --output load.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+import httpx
+
+from benchmarks import generator, report
+
+
+def _endpoints(first_date: date, last_date: date) -> dict:
+    span = (last_date - first_date).days
+
+    def random_day(rnd: random.Random) -> date:
+        return first_date + timedelta(days=rnd.randrange(span + 1))
+
+    return {
+        "list_first_page": lambda rnd: ("/api/transactions/", {"limit": 50}),
+        "list_date_range": lambda rnd: (
+            "/api/transactions/",
+            {"limit": 50, "end_date": random_day(rnd).isoformat()},
+        ),
+        "statistics_monthly": lambda rnd: (
+            "/api/statistics/monthly", {"date": random_day(rnd).isoformat()}
+        ),
+        "statistics_year_by_week": lambda rnd: (
+            "/api/statistics/summary",
+            {
+                "start_date": date(random_day(rnd).year, 1, 1).isoformat(),
+                "end_date": date(random_day(rnd).year, 12, 31).isoformat(),
+                "granularity": "week",
+            },
+        ),
+        "balance_as_of": lambda rnd: ("/api/balance/", {"as_of": random_day(rnd).isoformat()}),
+    }
+
+
+async def _load(client: httpx.AsyncClient, request, concurrency: int, duration: float, seed: int) -> dict:
+    deadline = time.perf_counter() + duration
+    durations = []
+    errors = 0
+
+    async def worker(worker_seed: int):
+        nonlocal errors
+        rnd = random.Random(worker_seed)
+        while time.perf_counter() < deadline:
+            path, params = request(rnd)
+            started = time.perf_counter()
+            response = await client.get(path, params=params)
+            durations.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(seed + index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    summary = report.summarize_ms(durations)
+    summary.update({"errors": errors, "rps": round(len(durations) / elapsed, 1)})
+    return summary
+
+
+async def run(args) -> dict:
+    settings = {} if args.cache else {"statistics_cache_size": 0}
+    load = generator.prepare_database(args.database, args.rows, args.seed, **settings)
+
+    from app.main import app
+    from app.database import ReadSessionLocal
+    from app.repositories.rollup_repository import RollupRepository
+
+    with ReadSessionLocal() as db:
+        first_date, last_date = RollupRepository(db).get_date_range()
+
+    results = {
+        "meta": report.metadata(),
+        "rows": args.rows,
+        "seed": args.seed,
+        "load": load,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "statistics_cache": args.cache,
+        "endpoints": {},
+    }
+    endpoints = _endpoints(first_date, last_date)
+    selected = args.endpoint or list(endpoints)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for name in selected:
+            results["endpoints"][name] = await _load(
+                client, endpoints[name], args.concurrency, args.duration, args.seed
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--endpoint", action="append", help="Run only this endpoint (repeatable)")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="Disable the statistics cache")
+    parser.add_argument("--database", default=None, help="Reuse or create this database file")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+    args.database = args.database or os.path.join(
+        tempfile.gettempdir(), f"moneyflow-bench-{args.rows}-{args.seed}.db"
+    )
+    report.write(asyncio.run(run(args)), args.output)
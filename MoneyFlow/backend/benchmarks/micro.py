@@ -0,0 +1,117 @@
+"""Микробенчмарки слоев приложения на синтетическом журнале.
+
+Замеряются выборка списка в репозитории (первая страница, фильтр по типу,
+глубокая страница через offset и через курсор), расчет статистики в сервисе
+(кэш статистики выключен), преобразование результатов в Pydantic-модели
+и JSON, а также страница списка целиком по прежнему пути (ORM, TransactionResponse,
+проверка response_model) и по быстрому (Core-строки сразу в JSON). База
+создается генератором один раз и переиспользуется.
+
+    python -m benchmarks.micro --rows 100000 --repeat 20 --output micro.json
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+from typing import Callable
+
+from benchmarks import generator, report
+
+
+def _measure(function: Callable[[], object], repeat: int) -> dict:
+    function()  # прогрев: кэш страниц SQLite, компиляция запросов
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - started)
+    return report.summarize_ms(durations)
+
+
+def run(args) -> dict:
+    load = generator.prepare_database(
+        args.database, args.rows, args.seed, statistics_cache_size=0
+    )
+
+    from pydantic import TypeAdapter
+
+    from app.database import ReadSessionLocal
+    from app.repositories.transaction_repository import TransactionRepository
+    from app.schemas.period import StatisticsResponse
+    from app.schemas.transaction import TransactionResponse
+    from app.services.statistics_service import StatisticsService
+    from app.services.transaction_service import TransactionService
+
+    results = {"meta": report.metadata(), "rows": args.rows, "seed": args.seed, "load": load}
+    with ReadSessionLocal() as db:
+        repository = TransactionRepository(db)
+        statistics = StatisticsService(db)
+        transactions = TransactionService(db)
+        first_date, last_date = statistics.rollups.get_date_range()
+        middle = repository.get_all(skip=args.rows // 2, limit=1)[0]
+        year = last_date.year - 1
+
+        results["repository"] = {
+            name: _measure(function, args.repeat)
+            for name, function in (
+                ("get_all_first_page", lambda: repository.get_all(limit=100)),
+                ("get_all_type_filter", lambda: repository.get_all(limit=100, transaction_type="income")),
+                ("get_all_offset_middle", lambda: repository.get_all(skip=args.rows // 2, limit=100)),
+                ("get_all_cursor_middle", lambda: repository.get_all(limit=100, after=(middle.date, middle.id))),
+            )
+        }
+        results["statistics"] = {
+            name: _measure(function, args.repeat)
+            for name, function in (
+                ("month_by_day", lambda: statistics.get_monthly_statistics(date(year, 6, 15))),
+                ("year_by_day", lambda: statistics.get_statistics_by_period(date(year, 1, 1), date(year, 12, 31))),
+                ("all_time_by_month", lambda: statistics.get_all_time_statistics("month")),
+            )
+        }
+
+        page = repository.get_all(limit=1000)
+        responses = [TransactionResponse.model_validate(row) for row in page]
+        list_adapter = TypeAdapter(list[TransactionResponse])
+        year_statistics = statistics.get_statistics_by_period(date(year, 1, 1), date(year, 12, 31))
+        results["serialization"] = {
+            name: _measure(function, args.repeat)
+            for name, function in (
+                ("transactions_model_validate_1000", lambda: [TransactionResponse.model_validate(row) for row in page]),
+                ("transactions_dump_json_1000", lambda: list_adapter.dump_json(responses)),
+                ("statistics_year_dump_json", lambda: year_statistics.model_dump_json()),
+                ("statistics_year_validate", lambda: StatisticsResponse.model_validate(year_statistics.model_dump())),
+            )
+        }
+
+        # Страница списка целиком: прежний путь повторяет работу FastAPI
+        # с response_model, быстрый отдает те же байты
+        def orm_page():
+            return list_adapter.dump_json(
+                list_adapter.validate_python(transactions.get_transactions(limit=1000))
+            )
+
+        def fast_page():
+            return transactions.get_transactions_json(limit=1000)[0]
+
+        assert orm_page() == fast_page()
+        results["list_page"] = {
+            name: _measure(function, args.repeat)
+            for name, function in (("orm_models_1000", orm_page), ("core_rows_json_1000", fast_page))
+        }
+    results["date_range"] = [first_date, last_date]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database", default=None, help="Reuse or create this database file")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+    args.database = args.database or os.path.join(
+        tempfile.gettempdir(), f"moneyflow-bench-{args.rows}-{args.seed}.db"
+    )
+    report.write(run(args), args.output)
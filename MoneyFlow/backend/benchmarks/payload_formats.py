@@ -0,0 +1,189 @@
+"""Размер и время ответа в форматах json и columnar, без сжатия и со сжатием.
+
+На синтетическом журнале за несколько лет сравниваются ответы с дневными
+рядами: сводка за все время по дням, временной ряд по дням и страница списка
+из 1000 транзакций. Для каждого формата замеряются размер тела (как есть,
+gzip и br, если установлен пакет brotli), время сборки JSON и сжатия
+в процессе, а затем задержка запроса целиком через uvicorn (с распаковкой
+на клиенте).
+
+    python -m benchmarks.payload_formats --rows 100000 --repeat 50 --output payload.json
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from typing import Callable
+
+import httpx
+
+from benchmarks import generator, report
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENDPOINTS = (
+    ("summary_all_time_by_day", "/api/statistics/summary", {"granularity": "day"}),
+    ("series_all_time_by_day", "/api/statistics/series", {"granularity": "day"}),
+    ("transactions_page_1000", "/api/transactions/", {"limit": 1000}),
+)
+FORMATS = ("json", "columnar")
+
+
+def _encodings() -> tuple:
+    return ("identity", "gzip", "br") if brotli is not None else ("identity", "gzip")
+
+
+def _compress(encoding: str, body: bytes) -> bytes:
+    # Те же настройки, что у CompressionMiddleware по умолчанию
+    if encoding == "gzip":
+        compressor = zlib.compressobj(5, zlib.DEFLATED, 31)
+        return compressor.compress(body) + compressor.flush()
+    if encoding == "br":
+        return brotli.compress(body, quality=4)
+    return body
+
+
+def _measure(function: Callable[[], object], repeat: int) -> dict:
+    function()
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - started)
+    return report.summarize_ms(durations)
+
+
+def _encoders(db) -> dict:
+    # Сборка тела ответа так же, как это делает обработчик: для json -
+    # проверка response_model и сериализация FastAPI, для columnar -
+    # app.columnar_format
+    from pydantic import TypeAdapter
+
+    from app.columnar_format import encode_series, encode_statistics
+    from app.schemas.period import SeriesResponse, StatisticsResponse
+    from app.services.statistics_service import StatisticsService
+    from app.services.transaction_service import TransactionService
+
+    statistics = StatisticsService(db)
+    transactions = TransactionService(db)
+    summary = statistics.get_all_time_statistics("day")
+    series = statistics.get_series(None, None, "day", True, None)
+    summary_adapter = TypeAdapter(StatisticsResponse)
+    series_adapter = TypeAdapter(SeriesResponse)
+    return {
+        "summary_all_time_by_day": {
+            "json": lambda: summary_adapter.dump_json(summary_adapter.validate_python(summary)),
+            "columnar": lambda: encode_statistics(summary),
+        },
+        "series_all_time_by_day": {
+            "json": lambda: series_adapter.dump_json(series_adapter.validate_python(series)),
+            "columnar": lambda: encode_series(series),
+        },
+        "transactions_page_1000": {
+            "json": lambda: transactions.get_transactions_json(limit=1000)[0],
+            "columnar": lambda: transactions.get_transactions_json(limit=1000, columnar=True)[0],
+        },
+    }
+
+
+def _in_process(args) -> dict:
+    from app.database import ReadSessionLocal
+
+    results = {}
+    with ReadSessionLocal() as db:
+        for name, encoders in _encoders(db).items():
+            results[name] = {}
+            for format_name, encode in encoders.items():
+                body = encode()
+                sizes = {encoding: len(_compress(encoding, body)) for encoding in _encodings()}
+                results[name][format_name] = {
+                    "bytes": sizes,
+                    "encode": _measure(encode, args.repeat),
+                    "compress": {
+                        encoding: _measure(lambda: _compress(encoding, body), args.repeat)
+                        for encoding in _encodings()
+                        if encoding != "identity"
+                    },
+                }
+    return results
+
+
+def _start_server(port: int) -> subprocess.Popen:
+    # DATABASE_URL уже задан generator.configure
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=dict(os.environ),
+    )
+
+
+def _wait_ready(client: httpx.Client) -> None:
+    for _ in range(100):
+        try:
+            if client.get("/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("Server did not start")
+
+
+def _end_to_end(args) -> dict:
+    results = {}
+    server = _start_server(args.port)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{args.port}", timeout=60) as client:
+            _wait_ready(client)
+            for name, path, params in ENDPOINTS:
+                results[name] = {}
+                for format_name in FORMATS:
+                    results[name][format_name] = {}
+                    for encoding in _encodings():
+                        request_params = dict(params, format=format_name)
+                        headers = {"Accept-Encoding": encoding}
+
+                        def request():
+                            response = client.get(path, params=request_params, headers=headers)
+                            response.raise_for_status()
+                            # Тело распаковывается и разбирается, как в браузере
+                            return response.json()
+
+                        summary = _measure(request, args.repeat)
+                        response = client.get(path, params=request_params, headers=headers)
+                        # Байты тела, полученные по сети, до распаковки
+                        summary["wire_bytes"] = response.num_bytes_downloaded
+                        results[name][format_name][encoding] = summary
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+def run(args) -> dict:
+    load = generator.prepare_database(args.database, args.rows, args.seed)
+    results = {"meta": report.metadata(), "rows": args.rows, "seed": args.seed, "load": load}
+    results["in_process"] = _in_process(args)
+    if not args.skip_http:
+        results["end_to_end"] = _end_to_end(args)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--skip-http", action="store_true", help="Only measure encoding in process")
+    parser.add_argument("--database", default=None, help="Reuse or create this database file")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+    args.database = args.database or os.path.join(
+        tempfile.gettempdir(), f"moneyflow-bench-{args.rows}-{args.seed}.db"
+    )
+    report.write(run(args), args.output)
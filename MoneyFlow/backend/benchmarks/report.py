@@ -0,0 +1,54 @@
+"""Общий формат результатов бенчмарков: JSON с описанием окружения,
+чтобы запуски можно было сравнивать между собой."""
+import json
+import math
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import List, Optional
+
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    # Метод ближайшего ранга по уже отсортированным значениям
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize_ms(durations: List[float]) -> dict:
+    # Длительности в секундах -> сводка в миллисекундах
+    values = sorted(value * 1000 for value in durations)
+    return {
+        "runs": len(values),
+        "min_ms": round(values[0], 3),
+        "p50_ms": round(percentile(values, 0.50), 3),
+        "p95_ms": round(percentile(values, 0.95), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+        "max_ms": round(values[-1], 3),
+        "mean_ms": round(sum(values) / len(values), 3),
+    }
+
+
+def write(results: dict, output: Optional[str]) -> None:
+    text = json.dumps(results, indent=2, default=str)
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    print(text, file=sys.stdout)
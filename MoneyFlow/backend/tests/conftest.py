@@ -0,0 +1,51 @@
+import os
+import tempfile
+import uuid
+
+import pytest
+
+# Настройки читаются при импорте app.config, поэтому временная база и каталог
+# журналов задаются до импорта приложения. Каждый тест работает в своем
+# журнале (app.shards) - отдельном файле SQLite, и не видит данных других тестов
+# TEST_ASYNC_DATABASE=1 - асинхронный стек (aiosqlite), см. test_async_stack.py
+DATA_DIR = tempfile.mkdtemp(prefix="moneyflow-tests-")
+DATABASE_SCHEME = "sqlite+aiosqlite" if os.environ.get("TEST_ASYNC_DATABASE") else "sqlite"
+os.environ["DATABASE_URL"] = f"{DATABASE_SCHEME}:///{os.path.join(DATA_DIR, 'moneyflow.db')}"
+os.environ["LEDGERS_DIR"] = os.path.join(DATA_DIR, "ledgers")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import SessionLocal, use_ledger  # noqa: E402
+from app.shards import shard_registry  # noqa: E402
+
+
+@pytest.fixture
+def ledger_id():
+    ledger_id = f"test-{uuid.uuid4().hex[:12]}"
+    shard_registry.create(ledger_id)
+    with use_ledger(ledger_id):
+        yield ledger_id
+
+
+@pytest.fixture
+def db(ledger_id):
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def client(app_client, ledger_id):
+    # Запросы клиента идут в журнал теста
+    app_client.headers["X-Ledger-Id"] = ledger_id
+    try:
+        yield app_client
+    finally:
+        del app_client.headers["X-Ledger-Id"]
@@ -0,0 +1,32 @@
+import random
+from datetime import date, timedelta
+from typing import List
+
+from app.schemas.transaction import TransactionCreate
+
+CATEGORIES = (None, "еда", "транспорт", "зарплата", "кафе")
+
+
+def random_transaction(rng: random.Random, first_date: date, days: int) -> TransactionCreate:
+    transaction_type = rng.choice(("income", "expense", "expense", "adjustment"))
+    amount = round(rng.uniform(0.01, 5000), 2)
+    if transaction_type == "adjustment":
+        amount = round(rng.uniform(-500, 500), 2)
+    return TransactionCreate(
+        date=first_date + timedelta(days=rng.randrange(days)),
+        type=transaction_type,
+        amount=amount,
+        category=rng.choice(CATEGORIES),
+        description=rng.choice((None, "кофе", "такси до дома")),
+    )
+
+
+def random_transactions(
+    rng: random.Random, count: int, first_date: date = date(2023, 1, 1), days: int = 500
+) -> List[TransactionCreate]:
+    return [random_transaction(rng, first_date, days) for _ in range(count)]
+
+
+def random_period(rng: random.Random, first_date: date = date(2022, 12, 1), days: int = 560):
+    start = first_date + timedelta(days=rng.randrange(days))
+    return start, start + timedelta(days=rng.randrange(days // 2))
@@ -0,0 +1,56 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app import archive
+from app.database import SessionLocal, engine, use_ledger
+from app.repositories.transaction_repository import TransactionRepository
+from app.schemas.transaction import TransactionCreate
+from app.server_lock import DatabaseInUseError
+from app.services.archive_service import ArchiveService
+
+
+def test_seal_refuses_while_server_runs(app_client):
+    # Сервер прочитал реестр архивов при запуске и не увидел бы новый архив
+    with pytest.raises(DatabaseInUseError):
+        ArchiveService().seal(2020)
+
+
+@pytest.fixture
+def sealed_main_database(app_client, monkeypatch):
+    # Основная база (ее схему создает запуск сервера), у которой записи
+    # с id до 1000 ушли в архив
+    partition = archive.Partition(
+        id=1, path="unused.db", first_year=2020, last_year=2020, row_count=1000, min_id=1, max_id=1000
+    )
+    monkeypatch.setattr(archive, "_partitions", (partition,))
+    monkeypatch.setattr(archive, "_next_id", None)
+    with use_ledger(None), SessionLocal() as db:
+        yield TransactionRepository(db)
+
+
+def test_new_ids_follow_archive_without_reading_max_id(sealed_main_database):
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    transaction = TransactionCreate(date=date(2024, 5, 1), type="income", amount=10.0)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        created = [sealed_main_database.create(transaction).id for _ in range(3)]
+        sealed_main_database.create_many([transaction, transaction])
+        sealed_main_database.db.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    try:
+        assert created == [1001, 1002, 1003]
+        # Импорт получил следующие id подряд
+        assert archive.reserve_ids(sealed_main_database.db, 1) == 1006
+        # max(id) живой таблицы читается один раз на процесс
+        assert sum("max(transactions.id)" in statement for statement in statements) == 1
+    finally:
+        for transaction_id in range(1001, 1006):
+            sealed_main_database.delete(transaction_id)
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import httpx
+import pytest
+
+from app.config import settings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Настройки читаются при импорте приложения, поэтому асинхронный стек
+# проверяется в отдельном процессе pytest с TEST_ASYNC_DATABASE=1
+async_only = pytest.mark.skipif(
+    not settings.async_database, reason="runs in a subprocess with sqlite+aiosqlite"
+)
+
+
+@pytest.mark.skipif(settings.async_database, reason="already running with sqlite+aiosqlite")
+def test_async_stack():
+    pytest.importorskip("aiosqlite")
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", __file__],
+        cwd=BACKEND_DIR,
+        env=dict(os.environ, TEST_ASYNC_DATABASE="1"),
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+def run(ledger_id, scenario):
+    from app.main import app
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test", headers={"X-Ledger-Id": ledger_id}
+        ) as http:
+            return await scenario(http)
+
+    return asyncio.run(main())
+
+
+def body(**fields):
+    return dict({"date": "2024-03-10", "type": "expense", "amount": 25.0, "category": "еда"}, **fields)
+
+
+@async_only
+def test_crud_and_statistics(ledger_id):
+    async def scenario(http):
+        response = await http.post("/api/transactions/", json=body(type="income", amount=100.0))
+        assert response.status_code == 201, response.text
+        income = response.json()
+        assert income["created_at"] is not None
+
+        response = await http.post("/api/transactions/", json=body())
+        assert response.status_code == 201, response.text
+        expense_id = response.json()["id"]
+
+        response = await http.get(f"/api/transactions/{income['id']}")
+        assert response.status_code == 200, response.text
+        assert response.json()["amount"] == 100.0
+
+        response = await http.put(f"/api/transactions/{expense_id}", json=body(amount=40.0, date="2024-03-12"))
+        assert response.status_code == 200, response.text
+        assert response.json()["amount"] == 40.0
+
+        params = {"start_date": "2024-03-01", "end_date": "2024-03-31"}
+        response = await http.get("/api/statistics/period", params=params)
+        assert response.status_code == 200, response.text
+        statistics = response.json()
+        assert (statistics["total_income"], statistics["total_expense"]) == (100.0, 40.0)
+
+        response = await http.get("/api/statistics/series", params=dict(params, granularity="day"))
+        assert response.status_code == 200, response.text
+        assert response.json()["closing_balance"] == 60.0
+
+        response = await http.delete(f"/api/transactions/{expense_id}")
+        assert response.status_code == 204, response.text
+        assert (await http.get(f"/api/transactions/{expense_id}")).status_code == 404
+
+        response = await http.get("/api/statistics/summary")
+        assert response.status_code == 200, response.text
+        assert response.json()["balance"] == 100.0
+
+        response = await http.get("/api/transactions/")
+        assert [row["id"] for row in response.json()] == [income["id"]]
+
+    run(ledger_id, scenario)
+
+
+@async_only
+def test_concurrent_writes(ledger_id, monkeypatch):
+    # Записи ждут писателя в очереди цикла событий, не блокируя сам цикл:
+    # каждая успевает задолго до таймаута
+    monkeypatch.setattr(settings, "write_pool_timeout", 3.0)
+    writers = 16
+
+    async def scenario(http):
+        responses = await asyncio.gather(
+            *(http.post("/api/transactions/", json=body(amount=float(index + 1))) for index in range(writers)),
+            http.get("/api/statistics/summary"),
+        )
+        assert [response.status_code for response in responses[:writers]] == [201] * writers
+        assert responses[-1].status_code == 200
+
+        created = [response.json()["id"] for response in responses[:writers]]
+        updates = await asyncio.gather(
+            *(http.put(f"/api/transactions/{transaction_id}", json=body(amount=1.0)) for transaction_id in created)
+        )
+        assert [response.status_code for response in updates] == [200] * writers
+
+        response = await http.get("/api/statistics/summary")
+        assert response.json()["total_expense"] == float(writers)
+
+    run(ledger_id, scenario)
@@ -0,0 +1,93 @@
+import random
+import threading
+from collections import Counter
+
+import pytest
+
+from app.config import settings
+from app.repositories.rollup_repository import RollupRepository
+from datetime import date
+
+from tests.data import random_transaction
+
+WRITERS = 64
+READERS = 8
+OPERATIONS_PER_WRITER = 6
+RANGE = (date(2024, 1, 1), 90)
+
+
+@pytest.fixture
+def short_write_timeout(monkeypatch):
+    # Пул писателя журнала теста создается при первом запросе уже с этим
+    # таймаутом: ожидание писателя дольше него - ошибка, а не медленный тест
+    monkeypatch.setattr(settings, "write_pool_timeout", 5.0)
+
+
+def run_threads(targets) -> None:
+    barrier = threading.Barrier(len(targets))
+
+    def start(target):
+        barrier.wait()
+        target()
+
+    threads = [threading.Thread(target=start, args=(target,)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_parallel_writers_and_readers(short_write_timeout, client, db):
+    statuses = Counter()
+    errors = []
+    created_ids = []
+    stop_readers = threading.Event()
+
+    def send(method, path, **kwargs):
+        # Ошибка сервера в TestClient - исключение в потоке запроса
+        try:
+            response = client.request(method, path, **kwargs)
+        except Exception as error:
+            statuses[type(error).__name__] += 1
+            errors.append(repr(error))
+            return None
+        statuses[response.status_code] += 1
+        if response.status_code >= 400:
+            errors.append(response.text)
+        return response
+
+    def writer(seed):
+        rng = random.Random(seed)
+        own_ids = []
+        for _ in range(OPERATIONS_PER_WRITER):
+            action = rng.choice(("create", "create", "update", "delete")) if own_ids else "create"
+            body = random_transaction(rng, *RANGE).model_dump(mode="json")
+            if action == "create":
+                response = send("POST", "/api/transactions/", json=body)
+                if response is not None and response.status_code == 201:
+                    own_ids.append(response.json()["id"])
+            elif action == "update":
+                send("PUT", f"/api/transactions/{rng.choice(own_ids)}", json=body)
+            else:
+                send("DELETE", f"/api/transactions/{own_ids.pop()}")
+        created_ids.extend(own_ids)
+
+    def reader():
+        while not stop_readers.is_set():
+            send("GET", "/api/transactions/", params={"limit": 50})
+            send("GET", "/api/statistics/summary", params={"granularity": "month"})
+
+    readers = [threading.Thread(target=reader) for _ in range(READERS)]
+    for thread in readers:
+        thread.start()
+    try:
+        run_threads([lambda seed=seed: writer(seed) for seed in range(WRITERS)])
+    finally:
+        stop_readers.set()
+        for thread in readers:
+            thread.join()
+
+    assert not errors, (statuses, errors[:3])
+    listed = client.get("/api/transactions/", params={"limit": 1000}).json()
+    assert sorted(item["id"] for item in listed) == sorted(created_ids)
+    assert RollupRepository(db).verify() == []
@@ -0,0 +1,42 @@
+import asyncio
+
+from app.services.event_broker import event_broker
+
+
+def test_disconnect_before_first_event_releases_subscriber(client, ledger_id):
+    # Клиент ушел раньше, чем ответ начался: send падает на первом же
+    # сообщении, генератор событий не запускается ни разу
+    from app.main import app
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/events/",
+        "raw_path": b"/api/events/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"test"), (b"x-ledger-id", ledger_id.encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("test", 80),
+        "state": {},
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        raise OSError("connection reset by peer")
+
+    async def run():
+        try:
+            await app(scope, receive, send)
+        except Exception:
+            pass
+
+    clients = event_broker.stats()["clients"]
+    for _ in range(3):
+        asyncio.run(run())
+    assert event_broker.stats()["clients"] == clients
@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.config import settings
+
+CHUNK_SIZE = 2
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "import_chunk_size", CHUNK_SIZE)
+    monkeypatch.setattr(settings, "write_pool_timeout", 2.0)
+
+
+def ndjson_line(day: int, amount: float) -> bytes:
+    return (
+        f'{{"date": "2024-03-{day:02d}", "type": "income", "amount": {amount}, "category": "salary"}}\n'
+    ).encode()
+
+
+def test_import_does_not_hold_writer_between_chunks(small_chunks, client):
+    # TestClient читает тело запроса целиком, поэтому загрузка по кускам
+    # идет через ASGITransport: следующий кусок запрашивается только после
+    # того, как предыдущий пакет вставлен
+    from app.main import app
+
+    during_upload = {}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test", headers=dict(client.headers)
+        ) as http:
+            async def body():
+                yield ndjson_line(1, 10) + ndjson_line(2, 20)
+                # Первый пакет уже зафиксирован, а загрузка еще не закончена:
+                # изменения журнала и чтения не ждут импорта
+                during_upload["create"] = await http.post(
+                    "/api/transactions/",
+                    json={"date": "2024-03-05", "type": "expense", "amount": 5, "category": "food"},
+                )
+                during_upload["list"] = await http.get("/api/transactions/")
+                yield ndjson_line(3, 30) + b'{"date": "bad"}\n' + ndjson_line(4, 40)
+
+            return await http.post(
+                "/api/transactions/import",
+                content=body(),
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+
+    response = asyncio.run(run())
+
+    assert during_upload["create"].status_code == 201
+    assert sorted(row["amount"] for row in during_upload["list"].json()) == [5, 10, 20]
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["imported"], report["failed"]) == (4, 1)
+    assert report["errors"][0]["line"] == 4
+    amounts = sorted(row["amount"] for row in client.get("/api/transactions/").json())
+    assert amounts == [5, 10, 20, 30, 40]
@@ -0,0 +1,57 @@
+import random
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app.repositories.transaction_repository import TransactionRepository
+from tests.data import random_transactions
+
+
+def query_plans(db, list_page) -> list:
+    # Выполняет страницу списка и возвращает EXPLAIN QUERY PLAN каждого ее SELECT
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    connection = db.connection()
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        list_page()
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+    return [
+        [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        for statement, parameters in statements
+    ]
+
+
+@pytest.fixture
+def repository(db):
+    repository = TransactionRepository(db)
+    repository.create_many(random_transactions(random.Random(5), 2000))
+    db.commit()
+    return repository
+
+
+@pytest.mark.parametrize(
+    "filters, index",
+    [
+        ({"after": (date(2023, 6, 1), 1000)}, "ix_transactions_date_id"),
+        ({"after": (date(2023, 6, 1), 1000), "start_date": date(2023, 3, 1)}, "ix_transactions_date_id"),
+        ({"transaction_type": "income"}, "ix_transactions_type_date"),
+        ({"transaction_type": "expense", "after": (date(2023, 6, 1), 1000)}, "ix_transactions_type_date"),
+        (
+            {"transaction_type": "expense", "start_date": date(2023, 2, 1), "end_date": date(2023, 5, 1)},
+            "ix_transactions_type_date",
+        ),
+    ],
+)
+def test_list_pages_use_composite_indexes(db, repository, filters, index):
+    plans = query_plans(db, lambda: repository.get_rows(limit=100, **filters))
+    assert plans, "the page ran no SELECT"
+    for plan in plans:
+        assert any(f"USING INDEX {index}" in step for step in plan), plan
+        assert not any("USE TEMP B-TREE" in step for step in plan), plan
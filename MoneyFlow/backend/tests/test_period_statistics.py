@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionUpdate
+from app.services.statistics_service import StatisticsService
+from app.services.transaction_service import TransactionService
+from tests.data import random_period, random_transaction, random_transactions
+
+
+def python_loop_statistics(db, start_date, end_date) -> dict:
+    # Исходный расчет статистики периода: все транзакции периода загружаются
+    # и суммируются по дням в Python
+    transactions = (
+        db.query(Transaction)
+        .filter(Transaction.date >= start_date, Transaction.date <= end_date)
+        .order_by(Transaction.date)
+        .all()
+    )
+    daily_data = {}
+    total_income = 0.0
+    total_expense = 0.0
+    for transaction in transactions:
+        day = daily_data.setdefault(transaction.date, {"income": 0.0, "expense": 0.0})
+        if transaction.type == "income":
+            day["income"] += float(transaction.amount)
+            total_income += float(transaction.amount)
+        elif transaction.type == "expense":
+            day["expense"] += float(transaction.amount)
+            total_expense += float(transaction.amount)
+    return {
+        "total_income": total_income,
+        "total_expense": total_expense,
+        "balance": total_income - total_expense,
+        "daily_statistics": [
+            {
+                "date": trans_date,
+                "income": daily_data[trans_date]["income"],
+                "expense": daily_data[trans_date]["expense"],
+                "balance": daily_data[trans_date]["income"] - daily_data[trans_date]["expense"],
+            }
+            for trans_date in sorted(daily_data)
+        ],
+    }
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_period_statistics_match_python_loop(db, seed):
+    rng = random.Random(seed)
+    transactions = TransactionService(db)
+    transactions.repository.create_many(random_transactions(rng, 400))
+    db.commit()
+    # Поштучные изменения обновляют агрегаты инкрементально
+    created = [transactions.create_transaction(transaction) for transaction in random_transactions(rng, 30)]
+    for transaction in created[:10]:
+        replacement = random_transaction(rng, transaction.date, 40)
+        transactions.update_transaction(transaction.id, TransactionUpdate(**replacement.model_dump()))
+    for transaction in created[10:20]:
+        transactions.delete_transaction(transaction.id)
+
+    statistics = StatisticsService(db)
+    for _ in range(20):
+        start_date, end_date = random_period(rng)
+        expected = python_loop_statistics(db, start_date, end_date)
+        actual = statistics.get_statistics_by_period(start_date, end_date)
+
+        assert actual.total_income == pytest.approx(expected["total_income"])
+        assert actual.total_expense == pytest.approx(expected["total_expense"])
+        assert actual.balance == pytest.approx(expected["balance"])
+        assert [day.date for day in actual.daily_statistics] == [
+            day["date"] for day in expected["daily_statistics"]
+        ]
+        for day, expected_day in zip(actual.daily_statistics, expected["daily_statistics"]):
+            assert day.income == pytest.approx(expected_day["income"])
+            assert day.expense == pytest.approx(expected_day["expense"])
+            assert day.balance == pytest.approx(expected_day["balance"])
@@ -0,0 +1,22 @@
+import pytest
+
+from app import cli, server_lock
+
+
+def test_second_server_does_not_start(app_client):
+    # Кэш и ETag живут в памяти процесса: второй процесс с той же базой
+    # отдавал бы устаревшие ответы после записей первого
+    with pytest.raises(server_lock.DatabaseInUseError, match="run a single server process"):
+        server_lock.acquire_server()
+
+
+@pytest.mark.parametrize("command", [["rollup", "rebuild"], ["search", "rebuild"]])
+def test_rebuild_refuses_while_server_runs(app_client, capsys, command):
+    assert cli.main(command) == 1
+    assert "is in use by a running server" in capsys.readouterr().err
+
+
+def test_verify_runs_alongside_server(app_client, capsys):
+    # Проверка только читает базу
+    assert cli.main(["rollup", "verify"]) == 0
+    assert "consistent" in capsys.readouterr().out
@@ -0,0 +1,169 @@
+import threading
+import uuid
+
+import pytest
+
+from app import database, ledger
+from app.shards import LedgerNotFoundError, ShardRegistry, shard_registry
+
+
+@pytest.fixture
+def registry():
+    registry = ShardRegistry(max_open=2, idle_seconds=0)
+    yield registry
+    registry.close_all()
+
+
+def new_ledger_id() -> str:
+    return f"test-{uuid.uuid4().hex[:12]}"
+
+
+class FailingOpen:
+    # Слушатель открытия, который роняет первые failures открытий; до этого
+    # ждет release, чтобы параллельные запросы успели встать в очередь
+    def __init__(self, failures: int = 1):
+        self.failures = failures
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, shard):
+        self.started.set()
+        self.release.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("disk is full")
+
+
+def test_unknown_ledger_is_not_created(registry):
+    ledger_id = new_ledger_id()
+    with pytest.raises(LedgerNotFoundError):
+        registry.get(ledger_id)
+    assert registry._opening == {}
+
+    assert registry.create(ledger_id) is True
+    assert registry.create(ledger_id) is False
+    registry.close_all()
+    # Созданный журнал открывается и после закрытия
+    assert registry.get(ledger_id).ledger_id == ledger_id
+
+
+def test_ledger_api_creates_ledgers_explicitly(app_client):
+    ledger_id = new_ledger_id()
+    response = app_client.get(f"/api/ledgers/{ledger_id}/transactions/")
+    assert response.status_code == 404
+    assert response.json()["detail"] == f"Ledger {ledger_id} not found"
+    assert app_client.get("/api/transactions/", headers={"X-Ledger-Id": ledger_id}).status_code == 404
+
+    response = app_client.put(f"/api/ledgers/{ledger_id}")
+    assert response.status_code == 201
+    assert response.json() == {"id": ledger_id, "created": True}
+    assert app_client.put(f"/api/ledgers/{ledger_id}").status_code == 200
+    assert app_client.put("/api/ledgers/Bad.Id").status_code == 400
+
+    response = app_client.get(f"/api/ledgers/{ledger_id}/transactions/")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_failed_open_does_not_leak_opening_lock(registry):
+    registry.on_open(FailingOpen())
+    ledger_id = new_ledger_id()
+
+    with pytest.raises(RuntimeError):
+        registry.get(ledger_id, create=True)
+    assert registry._opening == {}
+
+    assert registry.get(ledger_id, create=True).ledger_id == ledger_id
+    assert registry._opening == {}
+    assert registry.stats()["opened"] == 1
+
+
+def test_requests_waiting_on_failed_open_retry(registry):
+    failing = FailingOpen()
+    failing.release.clear()
+    registry.on_open(failing)
+    ledger_id = new_ledger_id()
+    results = []
+
+    def get():
+        try:
+            results.append(registry.get(ledger_id, create=True))
+        except RuntimeError as e:
+            results.append(e)
+
+    first = threading.Thread(target=get)
+    first.start()
+    assert failing.started.wait(5)
+    # Остальные запросы ждут на блокировке открытия, пока первое падает
+    waiting = [threading.Thread(target=get) for _ in range(4)]
+    for thread in waiting:
+        thread.start()
+    failing.release.set()
+    for thread in [first] + waiting:
+        thread.join()
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    shards = {id(result) for result in results if not isinstance(result, Exception)}
+    assert len(errors) == 1
+    assert len(shards) == 1
+    assert registry.stats()["opened"] == 1
+    assert registry._opening == {}
+
+
+def test_close_listeners_run_before_engines_are_disposed(registry):
+    ledger_id = new_ledger_id()
+    shard = registry.get(ledger_id, create=True)
+    pool = shard.engine.pool
+    seen = []
+    # dispose() заменяет пул движка новым
+    registry.on_close(lambda closed_id: seen.append((closed_id, shard.engine.pool is pool)))
+
+    registry.close_all()
+    assert seen == [(ledger_id, True)]
+    assert shard.engine.pool is not pool
+
+
+def test_open_and_close_counters_under_eviction(registry):
+    ledger_ids = [new_ledger_id() for _ in range(6)]
+    for ledger_id in ledger_ids:
+        registry.create(ledger_id)
+
+    def churn(offset):
+        for index in range(30):
+            shard = registry.acquire(ledger_ids[(offset + index) % len(ledger_ids)])
+            registry.release(shard)
+
+    threads = [threading.Thread(target=churn, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    registry.close_all()
+    stats = registry.stats()
+    assert stats["open"] == 0
+    assert stats["opened"] == stats["closed"]
+    assert registry._opening == {}
+
+
+def test_closed_ledger_forgets_process_state(client, ledger_id, monkeypatch):
+    transaction = {"date": "2024-03-10", "type": "expense", "amount": 25.0}
+    assert client.post("/api/transactions/", json=transaction).status_code == 201
+    summary = client.get("/api/statistics/summary")
+    etag = summary.headers["ETag"]
+    assert ledger_id in ledger._versions
+
+    monkeypatch.setattr(shard_registry, "idle_seconds", 0)
+    shard_registry.close_idle()
+    assert ledger_id not in ledger._versions
+    assert ledger_id not in database._writer_locks
+    assert ledger_id not in database._async_writer_locks
+
+    # После повторного открытия версия продолжается, а не начинается с нуля:
+    # ETag прежнего открытия не совпадет с новыми данными
+    assert client.post("/api/transactions/", json=transaction).status_code == 201
+    response = client.get("/api/statistics/summary", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["total_expense"] == 50.0
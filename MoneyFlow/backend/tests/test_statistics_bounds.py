@@ -0,0 +1,72 @@
+from datetime import date
+
+
+def create(client, **fields):
+    response = client.post("/api/transactions/", json=dict({"type": "expense", "category": "еда"}, **fields))
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_period_from_first_calendar_day(client):
+    create(client, date="0001-01-01", type="income", amount=100)
+    create(client, date="0001-01-03", amount=30)
+
+    response = client.get("/api/statistics/period", params={"start_date": "0001-01-01", "end_date": "0001-12-31"})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["opening_balance"] == 0
+    assert body["closing_balance"] == 70
+
+    response = client.get("/api/statistics/daily", params={"date": "0001-01-01"})
+    assert response.status_code == 200, response.text
+    assert response.json()["total_income"] == 100
+
+    response = client.post(
+        "/api/statistics/batch",
+        json={"periods": [
+            {"name": "first", "start_date": "0001-01-01", "end_date": "0001-01-02"},
+            {"name": "rest", "start_date": "0001-01-02", "end_date": str(date(1, 1, 31))},
+        ]},
+    )
+    assert response.status_code == 200, response.text
+    periods = response.json()["periods"]
+    assert periods["first"]["opening_balance"] == 0
+    assert periods["rest"]["opening_balance"] == 100
+    assert periods["rest"]["closing_balance"] == 70
+
+    response = client.get(
+        "/api/statistics/series", params={"start_date": "0001-01-01", "end_date": "0001-03-31"}
+    )
+    assert response.status_code == 200, response.text
+    assert [point["balance"] for point in response.json()["points"]] == [70, 70, 70]
+
+
+def test_series_up_to_last_calendar_day(client):
+    create(client, date="9999-12-31", type="income", amount=100)
+
+    for granularity in ("day", "week", "month", "quarter", "year"):
+        response = client.get(
+            "/api/statistics/series",
+            params={"granularity": granularity, "start_date": "9999-12-01", "end_date": "9999-12-31"},
+        )
+        assert response.status_code == 200, response.text
+        points = response.json()["points"]
+        assert points[-1]["balance"] == 100
+        assert points[-1]["date"] <= "9999-12-31"
+
+
+def test_series_point_limit(client, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "series_max_points", 12)
+    params = {"granularity": "month", "start_date": "2024-01-01", "end_date": "2024-12-31"}
+    assert client.get("/api/statistics/series", params=params).status_code == 200
+
+    params["end_date"] = "2025-01-01"
+    response = client.get("/api/statistics/series", params=params)
+    assert response.status_code == 422
+    assert "13 month buckets" in response.json()["detail"]
+
+    # Без заполнения пропусков в ряду только интервалы с записями
+    response = client.get("/api/statistics/series", params=dict(params, fill_gaps="false"))
+    assert response.status_code == 200, response.text
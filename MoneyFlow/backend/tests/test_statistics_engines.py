@@ -0,0 +1,233 @@
+import random
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app import ledger
+from app.database import ReadSessionLocal, current_ledger_id
+from app.models.transaction import Transaction
+from app.schemas.period import StatisticsPeriod
+from app.schemas.transaction import TransactionUpdate
+from app.schemas.transaction_bulk import (
+    TransactionBulkRequest,
+    TransactionBulkUpdate,
+    TransactionFilter,
+    TransactionRecategorize,
+)
+from app.services import statistics_service
+from app.services.import_service import ImportService
+from app.services.statistics_cache import statistics_cache
+from app.services.statistics_service import StatisticsService
+from app.services.transaction_service import TransactionService
+from tests.data import CATEGORIES, random_period, random_transaction, random_transactions
+
+np = pytest.importorskip("numpy")
+from app.services.columnar_engine import ColumnarEngine, ColumnarSnapshot, columnar_engine  # noqa: E402
+
+GRANULARITIES = ("day", "week", "month", "quarter", "year")
+STEPS = 12
+
+
+def query_period_statistics(service, rng):
+    start_date, end_date = random_period(rng)
+    return service.get_statistics_by_period(start_date, end_date, rng.choice(GRANULARITIES))
+
+
+def query_all_time_statistics(service, rng):
+    return service.get_all_time_statistics(rng.choice(GRANULARITIES))
+
+
+def query_series(service, rng):
+    start_date, end_date = random_period(rng)
+    return service.get_series(
+        start_date, end_date, rng.choice(GRANULARITIES), rng.random() < 0.5, rng.choice((None, 1, 3))
+    )
+
+
+def query_categories(service, rng):
+    start_date, end_date = random_period(rng)
+    return service.get_category_statistics(
+        start_date, end_date, rng.choice(("income", "expense", "adjustment")),
+        rng.choice((None, 2)), rng.random() < 0.5,
+    )
+
+
+def query_balance(service, rng):
+    return service.get_balance(rng.choice((None, random_period(rng)[0])))
+
+
+def query_batch(service, rng):
+    periods = []
+    for index in range(rng.randrange(1, 6)):
+        start_date, end_date = random_period(rng)
+        periods.append(
+            StatisticsPeriod(
+                name=f"p{index}", start_date=start_date, end_date=end_date,
+                granularity=rng.choice(GRANULARITIES),
+            )
+        )
+    return service.get_statistics_batch(periods)
+
+
+QUERIES = {
+    "period": query_period_statistics,
+    "all_time": query_all_time_statistics,
+    "series": query_series,
+    "categories": query_categories,
+    "balance": query_balance,
+    "batch": query_batch,
+}
+
+
+def live_ids():
+    with ReadSessionLocal() as session:
+        return session.scalars(select(Transaction.id).order_by(Transaction.id)).all()
+
+
+def mutate(db, rng) -> str:
+    # Одно случайное изменение журнала тем же путем, что и у API
+    service = TransactionService(db)
+    ids = live_ids()
+    action = rng.choice(("create", "update", "delete", "import", "bulk"))
+    if action == "create" or not ids:
+        service.create_transaction(random_transaction(rng, date(2023, 1, 1), 500))
+    elif action == "update":
+        replacement = random_transaction(rng, date(2023, 1, 1), 500)
+        service.update_transaction(rng.choice(ids), TransactionUpdate(**replacement.model_dump()))
+    elif action == "delete":
+        service.delete_transaction(rng.choice(ids))
+    elif action == "import":
+        rows = [(line, row.model_dump(), None) for line, row in enumerate(random_transactions(rng, 40), 1)]
+        ImportService().import_chunk(rows)
+    else:
+        service.bulk(
+            TransactionBulkRequest(
+                creates=random_transactions(rng, 5),
+                updates=[
+                    TransactionBulkUpdate(id=transaction_id, **random_transaction(rng, date(2023, 1, 1), 500).model_dump())
+                    for transaction_id in rng.sample(ids, min(3, len(ids)))
+                ],
+                recategorize=[
+                    TransactionRecategorize(
+                        filter=TransactionFilter(type="expense", start_date=random_period(rng)[0]),
+                        category=rng.choice(CATEGORIES),
+                    )
+                ],
+                deletes=rng.sample(ids, min(2, len(ids))),
+            )
+        )
+    return action
+
+
+@contextmanager
+def delayed_snapshot_updates():
+    # Изменения доходят до колоночного движка не по порядку: первое
+    # задерживается, второе приходит с пропуском версии, и снимок сбрасывается
+    delayed = []
+    index = ledger._listeners.index(columnar_engine.apply)
+    ledger._listeners[index] = delayed.append
+    try:
+        yield
+    finally:
+        ledger._listeners[index] = columnar_engine.apply
+    for change in delayed[1:] + delayed[:1]:
+        columnar_engine.apply(change)
+    assert current_ledger_id() not in columnar_engine._snapshots
+
+
+def run_query(monkeypatch, ledger_id, engine, query, seed):
+    # Каждый движок считает без кэша, с одинаковыми параметрами запроса
+    monkeypatch.setattr(statistics_service, "columnar_engine", engine)
+    statistics_cache.drop(ledger_id)
+    with ReadSessionLocal() as session:
+        result = query(StatisticsService(session), random.Random(seed))
+    if isinstance(result, dict):
+        return {name: value.model_dump() for name, value in result.items()}
+    return result.model_dump()
+
+
+def assert_close(actual, expected, path="response"):
+    # Суммы numpy и SQLite складываются в разном порядке
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys(), path
+        for key in expected:
+            assert_close(actual[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected), path
+        for index, (left, right) in enumerate(zip(actual, expected)):
+            assert_close(left, right, f"{path}[{index}]")
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-9, abs=1e-6), path
+    else:
+        assert actual == expected, path
+
+
+@pytest.mark.parametrize("seed", range(2))
+@pytest.mark.parametrize("name", QUERIES)
+def test_numpy_engine_matches_sql(monkeypatch, db, ledger_id, name, seed):
+    rng = random.Random(f"{name}-{seed}")
+    ImportService().import_chunk(
+        [(line, row.model_dump(), None) for line, row in enumerate(random_transactions(rng, 300), 1)]
+    )
+    patches = columnar_engine.patches
+    for step in range(STEPS):
+        if step % 4 == 3:
+            with delayed_snapshot_updates():
+                mutate(db, rng)
+                mutate(db, rng)
+        else:
+            mutate(db, rng)
+        query_seed = rng.random()
+        expected = run_query(monkeypatch, ledger_id, None, QUERIES[name], query_seed)
+        actual = run_query(monkeypatch, ledger_id, columnar_engine, QUERIES[name], query_seed)
+        assert_close(actual, expected, f"step {step}")
+    # Изменения с известным составом накладывались на снимок, а не только
+    # перезагружали его
+    assert columnar_engine.patches > patches
+
+
+def snapshot_of(rows):
+    # rows: (id, день от 1970-01-01, сумма) в порядке (date, id)
+    ids, days, amounts = zip(*rows) if rows else ((), (), ())
+    return ColumnarSnapshot(
+        np.array(ids, dtype=np.int64),
+        np.array(days, dtype=np.int32),
+        np.array(amounts, dtype=np.float64),
+        np.zeros(len(rows), dtype=np.int8),
+        np.zeros(len(rows), dtype=np.int32),
+        [""],
+    )
+
+
+def test_patch_keeps_date_id_order():
+    snapshot = snapshot_of([(1, 10, 1.0), (5, 10, 5.0), (3, 11, 3.0), (9, 11, 9.0), (2, 12, 2.0)])
+    # Несколько строк одного дня вперемешку, перенос записи 5 на другой день
+    # и новая категория
+    rows = [
+        (7, date(1970, 1, 12), "expense", 7.0, "еда"),
+        (4, date(1970, 1, 11), "income", 4.0, None),
+        (5, date(1970, 1, 12), "income", 50.0, None),
+        (0, date(1970, 1, 11), "income", 0.5, None),
+        (8, date(1970, 1, 14), "income", 8.0, None),
+    ]
+    patched = snapshot.patched([5], rows)
+
+    assert list(zip(patched.days.tolist(), patched.ids.tolist())) == [
+        (10, 0), (10, 1), (10, 4), (11, 3), (11, 5), (11, 7), (11, 9), (12, 2), (13, 8),
+    ]
+    assert patched.amounts.tolist() == [0.5, 1.0, 4.0, 3.0, 50.0, 7.0, 9.0, 2.0, 8.0]
+    assert patched.category_names == ["", "еда"]
+    assert patched.categories.tolist()[5] == 1
+    # Исходный снимок не изменился
+    assert snapshot.ids.tolist() == [1, 5, 3, 9, 2]
+    assert snapshot.category_names == [""]
+
+
+def test_stats_cover_every_ledger():
+    engine = ColumnarEngine()
+    engine._snapshots[None] = (snapshot_of([(1, 10, 1.0)]), 4)
+    engine._snapshots["home"] = (snapshot_of([(1, 10, 1.0), (2, 11, 2.0)]), 7)
+    stats = engine.stats()
+    assert (stats["rows"], stats["ledgers"]) == (3, 2)
@@ -10,11 +10,11 @@ import {
   Legend,
   ResponsiveContainer,
 } from "recharts";
-import type { DailyStatistics } from "../types/transaction";
+import type { DailyStatistics, SeriesPoint } from "../types/transaction";
 import { formatDate, formatCurrency } from "../utils/dateUtils";
 
 interface StatisticsChartProps {
-  data: DailyStatistics[];
+  data: Array<DailyStatistics | SeriesPoint>;
   chartType?: "line" | "bar";
 }
 
@@ -1,9 +1,9 @@
-import { useState, useEffect, useRef, useMemo } from "react";
-import type { Transaction, TransactionCreate } from "../types/transaction";
+import { useState, useEffect, useRef } from "react";
+import type { BalanceResponse, TransactionCreate } from "../types/transaction";
 import { formatCurrency } from "../utils/dateUtils";
 
 interface TotalAmountProps {
-  transactions: Transaction[];
+  balance: BalanceResponse | null;
   onCreateTransaction?: (transaction: TransactionCreate) => Promise<void>;
 }
 
@@ -32,7 +32,7 @@ const evaluateExpression = (expression: string): number | null => {
   }
 };
 
-export const TotalAmount = ({ transactions, onCreateTransaction }: TotalAmountProps) => {
+export const TotalAmount = ({ balance, onCreateTransaction }: TotalAmountProps) => {
   const [inputValue, setInputValue] = useState<string>("");
   const [isEditing, setIsEditing] = useState(false);
   const inputRef = useRef<HTMLInputElement>(null);
@@ -45,22 +45,11 @@ export const TotalAmount = ({ transactions, onCreateTransaction }: TotalAmountPr
     }
   }, [isEditing]);
 
-  // Вычисляем итоговую сумму: доходы - расходы + корректировки
-  const totalAmount = useMemo(() => {
-    const income = transactions
-      .filter((t) => t.type === "income")
-      .reduce((sum, t) => sum + t.amount, 0);
-    
-    const expense = transactions
-      .filter((t) => t.type === "expense")
-      .reduce((sum, t) => sum + t.amount, 0);
-    
-    const adjustment = transactions
-      .filter((t) => t.type === "adjustment")
-      .reduce((sum, t) => sum + t.amount, 0);
-    
-    return income - expense + adjustment;
-  }, [transactions]);
+  // Итоговая сумма (доходы - расходы + корректировки) считается на сервере
+  const totalAmount = balance?.balance ?? 0;
+  const totalIncome = balance?.total_income ?? 0;
+  const totalExpense = balance?.total_expense ?? 0;
+  const totalAdjustment = balance?.total_adjustment ?? 0;
 
   const handleClick = () => {
     if (!isEditing) {
@@ -122,7 +111,7 @@ export const TotalAmount = ({ transactions, onCreateTransaction }: TotalAmountPr
           amount: adjustmentAmount, // Может быть положительным или отрицательным
           description: `Корректировка общей суммы`,
         });
-        // Состояние обновится автоматически через пропсы transactions
+        // Баланс обновится автоматически через пропс balance
       } catch (error) {
         console.error("Ошибка при создании корректировки:", error);
       }
@@ -161,42 +150,20 @@ export const TotalAmount = ({ transactions, onCreateTransaction }: TotalAmountPr
         </div>
         <div className="ml-6 text-right">
           <div className="text-xs text-gray-400 mb-2">Детализация</div>
-          {transactions.filter((t) => t.type === "income").length > 0 && (
+          {totalIncome !== 0 && (
             <div className="text-sm text-green-600 mb-1">
-              +{formatCurrency(
-                transactions
-                  .filter((t) => t.type === "income")
-                  .reduce((sum, t) => sum + t.amount, 0)
-              )}{" "}
-              (доходы)
+              +{formatCurrency(totalIncome)} (доходы)
             </div>
           )}
-          {transactions.filter((t) => t.type === "expense").length > 0 && (
+          {totalExpense !== 0 && (
             <div className="text-sm text-red-600 mb-1">
-              -{formatCurrency(
-                transactions
-                  .filter((t) => t.type === "expense")
-                  .reduce((sum, t) => sum + t.amount, 0)
-              )}{" "}
-              (расходы)
+              -{formatCurrency(totalExpense)} (расходы)
             </div>
           )}
-          {transactions.filter((t) => t.type === "adjustment").length > 0 && (
+          {totalAdjustment !== 0 && (
             <div className="text-sm text-gray-600 mb-1">
-              {(() => {
-                const adjustmentTotal = transactions
-                  .filter((t) => t.type === "adjustment")
-                  .reduce((sum, t) => sum + t.amount, 0);
-                return adjustmentTotal >= 0 ? "+" : "";
-              })()}
-              {formatCurrency(
-                Math.abs(
-                  transactions
-                    .filter((t) => t.type === "adjustment")
-                    .reduce((sum, t) => sum + t.amount, 0)
-                )
-              )}{" "}
-              (корректировки)
+              {totalAdjustment >= 0 ? "+" : ""}
+              {formatCurrency(Math.abs(totalAdjustment))} (корректировки)
             </div>
           )}
         </div>
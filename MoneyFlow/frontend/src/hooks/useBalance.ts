@@ -0,0 +1,29 @@
+import { useState, useEffect } from "react";
+import { balanceApi } from "../services/api";
+import type { BalanceResponse } from "../types/transaction";
+
+export const useBalance = (asOf?: string) => {
+  const [balance, setBalance] = useState<BalanceResponse | null>(null);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState<string | null>(null);
+
+  const fetchBalance = async () => {
+    try {
+      setLoading(true);
+      setError(null);
+      const data = await balanceApi.get(asOf);
+      setBalance(data);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Ошибка загрузки баланса");
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  useEffect(() => {
+    fetchBalance();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [asOf]);
+
+  return { balance, loading, error, refetch: fetchBalance };
+};
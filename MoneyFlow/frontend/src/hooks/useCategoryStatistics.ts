@@ -0,0 +1,41 @@
+import { useState, useEffect } from "react";
+import { statisticsApi } from "../services/api";
+import type {
+  CategoryStatisticsResponse,
+  TransactionType,
+} from "../types/transaction";
+
+export const useCategoryStatistics = (
+  startDate?: string,
+  endDate?: string,
+  type: TransactionType = "expense",
+  top?: number
+) => {
+  const [categories, setCategories] = useState<CategoryStatisticsResponse | null>(null);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState<string | null>(null);
+
+  useEffect(() => {
+    const fetchCategories = async () => {
+      try {
+        setLoading(true);
+        setError(null);
+        const data = await statisticsApi.getCategories({
+          ...(startDate && { start_date: startDate }),
+          ...(endDate && { end_date: endDate }),
+          type,
+          ...(top && { top }),
+        });
+        setCategories(data);
+      } catch (err) {
+        setError(err instanceof Error ? err.message : "Ошибка загрузки категорий");
+      } finally {
+        setLoading(false);
+      }
+    };
+
+    fetchCategories();
+  }, [startDate, endDate, type, top]);
+
+  return { categories, loading, error };
+};
@@ -0,0 +1,33 @@
+import { useState, useEffect } from "react";
+import { statisticsApi } from "../services/api";
+import type { Granularity, SeriesResponse } from "../types/transaction";
+
+export const useSeries = (
+  granularity: Granularity,
+  startDate?: string,
+  endDate?: string
+) => {
+  const [series, setSeries] = useState<SeriesResponse | null>(null);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState<string | null>(null);
+
+  useEffect(() => {
+    const fetchSeries = async () => {
+      try {
+        setLoading(true);
+        setError(null);
+        // Пустые интервалы сервер заполняет нулями, график получает готовый ряд
+        const data = await statisticsApi.getSeries(granularity, startDate, endDate);
+        setSeries(data);
+      } catch (err) {
+        setError(err instanceof Error ? err.message : "Ошибка загрузки графика");
+      } finally {
+        setLoading(false);
+      }
+    };
+
+    fetchSeries();
+  }, [granularity, startDate, endDate]);
+
+  return { series, loading, error };
+};
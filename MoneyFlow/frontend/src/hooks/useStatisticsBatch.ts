@@ -0,0 +1,38 @@
+import { useState, useEffect } from "react";
+import { statisticsApi } from "../services/api";
+import type { StatisticsPeriod, StatisticsResponse } from "../types/transaction";
+
+export const useStatisticsBatch = (periods: StatisticsPeriod[]) => {
+  const [statistics, setStatistics] = useState<Record<string, StatisticsResponse>>({});
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState<string | null>(null);
+
+  // Массив периодов обычно создается заново при каждом рендере,
+  // поэтому запрос повторяется только при изменении его содержимого
+  const periodsKey = JSON.stringify(periods);
+
+  useEffect(() => {
+    const fetchStatistics = async () => {
+      if (periods.length === 0) {
+        setStatistics({});
+        setLoading(false);
+        return;
+      }
+      try {
+        setLoading(true);
+        setError(null);
+        const data = await statisticsApi.getBatch(periods);
+        setStatistics(data.periods);
+      } catch (err) {
+        setError(err instanceof Error ? err.message : "Ошибка загрузки статистики");
+      } finally {
+        setLoading(false);
+      }
+    };
+
+    fetchStatistics();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [periodsKey]);
+
+  return { statistics, loading, error };
+};
@@ -1,21 +1,37 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { transactionsApi } from "../services/api";
 import type { Transaction, TransactionCreate, TransactionUpdate } from "../types/transaction";
 
-export const useTransactions = (params?: {
+type TransactionParams = {
   start_date?: string;
   end_date?: string;
   type?: "income" | "expense";
-}) => {
+};
+
+const matchesParams = (t: Transaction, params?: TransactionParams) => {
+  if (params?.start_date && t.date < params.start_date) return false;
+  if (params?.end_date && t.date > params.end_date) return false;
+  if (params?.type && t.type !== params.type) return false;
+  return true;
+};
+
+// Порядок как у сервера: по дате и id, новые сверху
+const compareTransactions = (a: Transaction, b: Transaction) =>
+  a.date === b.date ? b.id - a.id : a.date < b.date ? 1 : -1;
+
+export const useTransactions = (params?: TransactionParams) => {
   const [transactions, setTransactions] = useState<Transaction[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  // Версия журнала, до которой список актуален
+  const versionRef = useRef<number | null>(null);
 
   const fetchTransactions = async () => {
     try {
       setLoading(true);
       setError(null);
-      const data = await transactionsApi.getAll(params);
+      const { transactions: data, version } = await transactionsApi.getAllWithVersion(params);
+      versionRef.current = version;
       setTransactions(data);
     } catch (err) {
       setError(err instanceof Error ? err.message : "Ошибка загрузки транзакций");
@@ -24,15 +40,54 @@ export const useTransactions = (params?: {
     }
   };
 
+  // Догружаем только изменения после известной версии вместо всего списка
+  const syncTransactions = async () => {
+    const since = versionRef.current;
+    if (since === null) {
+      await fetchTransactions();
+      return;
+    }
+    try {
+      const { version, changes, deleted, reset } = await transactionsApi.getChanges(since);
+      if (reset) {
+        await fetchTransactions();
+        return;
+      }
+      if (versionRef.current !== since) return; // уже обновлено другим вызовом
+      versionRef.current = version;
+      if (changes.length === 0 && deleted.length === 0) return;
+      const removed = new Set([...deleted, ...changes.map((t) => t.id)]);
+      setTransactions((prev) =>
+        [
+          ...changes.filter((t) => matchesParams(t, params)),
+          ...prev.filter((t) => !removed.has(t.id)),
+        ].sort(compareTransactions)
+      );
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Ошибка синхронизации транзакций");
+    }
+  };
+
   useEffect(() => {
     fetchTransactions();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [params?.start_date, params?.end_date, params?.type]);
 
+  // Изменения из других вкладок и устройств подтягиваются при возврате на страницу
+  useEffect(() => {
+    const onFocus = () => {
+      syncTransactions();
+    };
+    window.addEventListener("focus", onFocus);
+    return () => window.removeEventListener("focus", onFocus);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [params?.start_date, params?.end_date, params?.type]);
+
   const createTransaction = async (transaction: TransactionCreate) => {
     try {
       const newTransaction = await transactionsApi.create(transaction);
       setTransactions((prev) => [newTransaction, ...prev]);
+      syncTransactions();
       return newTransaction;
     } catch (err) {
       throw err;
@@ -45,6 +100,7 @@ export const useTransactions = (params?: {
       setTransactions((prev) =>
         prev.map((t) => (t.id === id ? updated : t))
       );
+      syncTransactions();
       return updated;
     } catch (err) {
       throw err;
@@ -55,6 +111,7 @@ export const useTransactions = (params?: {
     try {
       await transactionsApi.delete(id);
       setTransactions((prev) => prev.filter((t) => t.id !== id));
+      syncTransactions();
     } catch (err) {
       throw err;
     }
@@ -65,11 +122,9 @@ export const useTransactions = (params?: {
     loading,
     error,
     refetch: fetchTransactions,
+    sync: syncTransactions,
     createTransaction,
     updateTransaction,
     deleteTransaction,
   };
 };
-
-
-
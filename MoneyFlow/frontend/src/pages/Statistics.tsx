@@ -1,9 +1,15 @@
 import { useState } from "react";
 import { useStatistics } from "../hooks/useStatistics";
+import { useSeries } from "../hooks/useSeries";
 import { PeriodSelector, PeriodType } from "../components/PeriodSelector";
 import { SummaryCard } from "../components/SummaryCard";
 import { StatisticsChart } from "../components/StatisticsChart";
-import { formatDateInput } from "../utils/dateUtils";
+import {
+  formatDateInput,
+  getWeekRange,
+  getMonthRange,
+  pickGranularity,
+} from "../utils/dateUtils";
 
 export const Statistics = () => {
   const [periodType, setPeriodType] = useState<PeriodType>("month");
@@ -44,6 +50,32 @@ export const Statistics = () => {
     periodType === "custom" ? endDate : undefined
   );
 
+  // Границы графика совпадают с периодом сводки; ряд приходит уже сгруппированным
+  const getSeriesRange = () => {
+    const date = new Date(startDate);
+    switch (periodType) {
+      case "week": {
+        const week = getWeekRange(date);
+        return { start: formatDateInput(week.start), end: formatDateInput(week.end) };
+      }
+      case "month": {
+        const month = getMonthRange(date);
+        return { start: formatDateInput(month.start), end: formatDateInput(month.end) };
+      }
+      case "custom":
+        return { start: startDate, end: endDate };
+      default:
+        return { start: startDate, end: startDate };
+    }
+  };
+
+  const seriesRange = getSeriesRange();
+  const { series } = useSeries(
+    pickGranularity(seriesRange.start, seriesRange.end),
+    seriesRange.start,
+    seriesRange.end
+  );
+
   if (loading) {
     return (
       <div className="text-center py-8 text-gray-500">Загрузка статистики...</div>
@@ -75,20 +107,20 @@ export const Statistics = () => {
         balance={statistics.balance}
       />
 
-      {statistics.daily_statistics.length > 0 && (
+      {series && statistics.daily_statistics.length > 0 && (
         <>
           <div className="bg-white rounded-lg shadow-md p-6">
             <h2 className="text-xl font-semibold text-gray-700 mb-4">
               График доходов и расходов (линейный)
             </h2>
-            <StatisticsChart data={statistics.daily_statistics} chartType="line" />
+            <StatisticsChart data={series.points} chartType="line" />
           </div>
 
           <div className="bg-white rounded-lg shadow-md p-6">
             <h2 className="text-xl font-semibold text-gray-700 mb-4">
               График доходов и расходов (столбчатый)
             </h2>
-            <StatisticsChart data={statistics.daily_statistics} chartType="bar" />
+            <StatisticsChart data={series.points} chartType="bar" />
           </div>
         </>
       )}
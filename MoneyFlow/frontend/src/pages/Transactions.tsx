@@ -1,5 +1,6 @@
 import { useState } from "react";
 import { useTransactions } from "../hooks/useTransactions";
+import { useBalance } from "../hooks/useBalance";
 import { TransactionForm } from "../components/TransactionForm";
 import { TransactionList } from "../components/TransactionList";
 import { TotalAmount } from "../components/TotalAmount";
@@ -24,6 +25,9 @@ export const Transactions = () => {
     deleteTransaction,
   } = useTransactions();
 
+  // Общий баланс считается на сервере по всей истории, а не по загруженной странице
+  const { balance, refetch: refetchBalance } = useBalance();
+
   // Фильтруем транзакции на клиенте
   const transactions = allTransactions.filter((t) => {
     if (filterStartDate && t.date < filterStartDate) return false;
@@ -34,17 +38,29 @@ export const Transactions = () => {
 
   const handleCreate = async (transaction: TransactionCreate) => {
     await createTransaction(transaction);
+    refetchBalance();
     setShowForm(false);
   };
 
   const handleUpdate = async (transaction: TransactionUpdate) => {
     if (editingTransaction) {
       await updateTransaction(editingTransaction.id, transaction);
+      refetchBalance();
       setEditingTransaction(null);
       setShowForm(false);
     }
   };
 
+  const handleDelete = async (id: number) => {
+    await deleteTransaction(id);
+    refetchBalance();
+  };
+
+  const handleCreateAdjustment = async (transaction: TransactionCreate) => {
+    await createTransaction(transaction);
+    refetchBalance();
+  };
+
   const handleEdit = (transaction: Transaction) => {
     setEditingTransaction(transaction);
     setShowForm(true);
@@ -98,9 +114,9 @@ export const Transactions = () => {
         />
       </Modal>
 
-      <TotalAmount 
-        transactions={allTransactions} 
-        onCreateTransaction={createTransaction}
+      <TotalAmount
+        balance={balance}
+        onCreateTransaction={handleCreateAdjustment}
       />
 
       <div className="bg-white rounded-lg shadow-md p-6">
@@ -168,7 +184,7 @@ export const Transactions = () => {
       <TransactionList
         transactions={transactions}
         onEdit={handleEdit}
-        onDelete={deleteTransaction}
+        onDelete={handleDelete}
         loading={loading}
       />
     </div>
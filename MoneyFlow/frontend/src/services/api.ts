@@ -1,9 +1,17 @@
 import axios from "axios";
 import type {
   Transaction,
+  TransactionChanges,
   TransactionCreate,
   TransactionUpdate,
   StatisticsResponse,
+  BalanceResponse,
+  Granularity,
+  SeriesResponse,
+  StatisticsPeriod,
+  BatchStatisticsResponse,
+  CategoryStatisticsResponse,
+  TransactionType,
 } from "../types/transaction";
 
 // Определяем базовый URL для API
@@ -43,6 +51,29 @@ export const transactionsApi = {
     return response.data;
   },
 
+  // Список вместе с версией журнала, с которой затем синхронизируется getChanges
+  getAllWithVersion: async (params?: {
+    skip?: number;
+    limit?: number;
+    start_date?: string;
+    end_date?: string;
+    type?: "income" | "expense";
+  }): Promise<{ transactions: Transaction[]; version: number | null }> => {
+    const response = await api.get<Transaction[]>("/transactions", { params });
+    const version = response.headers["x-ledger-version"];
+    return {
+      transactions: response.data,
+      version: version !== undefined ? Number(version) : null,
+    };
+  },
+
+  getChanges: async (since: number): Promise<TransactionChanges> => {
+    const response = await api.get<TransactionChanges>("/transactions/changes", {
+      params: { since },
+    });
+    return response.data;
+  },
+
   getById: async (id: number): Promise<Transaction> => {
     const response = await api.get<Transaction>(`/transactions/${id}`);
     return response.data;
@@ -104,15 +135,71 @@ export const statisticsApi = {
 
   getSummary: async (
     startDate?: string,
-    endDate?: string
+    endDate?: string,
+    granularity?: Granularity
   ): Promise<StatisticsResponse> => {
     const response = await api.get<StatisticsResponse>("/statistics/summary", {
       params: {
         ...(startDate && { start_date: startDate }),
         ...(endDate && { end_date: endDate }),
+        ...(granularity && { granularity }),
+      },
+    });
+    return response.data;
+  },
+
+  getSeries: async (
+    granularity: Granularity,
+    startDate?: string,
+    endDate?: string,
+    fillGaps: boolean = true
+  ): Promise<SeriesResponse> => {
+    const response = await api.get<SeriesResponse>("/statistics/series", {
+      params: {
+        granularity,
+        fill_gaps: fillGaps,
+        ...(startDate && { start_date: startDate }),
+        ...(endDate && { end_date: endDate }),
       },
     });
     return response.data;
   },
+
+  // Несколько периодов одним запросом (например, 12 месяцев года)
+  getBatch: async (
+    periods: StatisticsPeriod[]
+  ): Promise<BatchStatisticsResponse> => {
+    const response = await api.post<BatchStatisticsResponse>(
+      "/statistics/batch",
+      { periods }
+    );
+    return response.data;
+  },
+
+  getCategories: async (params?: {
+    start_date?: string;
+    end_date?: string;
+    type?: TransactionType;
+    top?: number;
+    pivot?: boolean;
+  }): Promise<CategoryStatisticsResponse> => {
+    const response = await api.get<CategoryStatisticsResponse>(
+      "/statistics/categories",
+      { params }
+    );
+    return response.data;
+  },
 };
 
+
+// Balance API
+export const balanceApi = {
+  get: async (asOf?: string): Promise<BalanceResponse> => {
+    const response = await api.get<BalanceResponse>("/balance", {
+      params: {
+        ...(asOf && { as_of: asOf }),
+      },
+    });
+    return response.data;
+  },
+};
@@ -10,6 +10,15 @@ export interface Transaction {
   created_at: string;
 }
 
+// Изменения журнала после версии since (GET /transactions/changes)
+export interface TransactionChanges {
+  version: number;
+  changes: Transaction[];
+  deleted: number[];
+  // true - изменений слишком много, список нужно загрузить заново
+  reset: boolean;
+}
+
 export interface TransactionCreate {
   date: string;
   type: TransactionType;
@@ -31,6 +40,7 @@ export interface DailyStatistics {
   income: number;
   expense: number;
   balance: number;
+  adjustment: number;
 }
 
 export interface StatisticsResponse {
@@ -40,6 +50,75 @@ export interface StatisticsResponse {
   total_expense: number;
   balance: number;
   daily_statistics: DailyStatistics[];
+  total_adjustment: number;
+  opening_balance: number;
+  closing_balance: number;
+}
+
+export interface BalanceResponse {
+  as_of: string | null;
+  total_income: number;
+  total_expense: number;
+  total_adjustment: number;
+  balance: number;
 }
 
 
+
+export type Granularity = "day" | "week" | "month" | "quarter" | "year";
+
+export interface SeriesPoint {
+  date: string;
+  income: number;
+  expense: number;
+  adjustment: number;
+  net: number;
+  count: number;
+  balance: number;
+}
+
+export interface SeriesResponse {
+  granularity: Granularity;
+  period_start: string;
+  period_end: string;
+  opening_balance: number;
+  closing_balance: number;
+  points: SeriesPoint[];
+}
+
+export interface StatisticsPeriod {
+  name: string;
+  start_date: string;
+  end_date: string;
+  granularity?: Granularity;
+}
+
+export interface BatchStatisticsResponse {
+  periods: Record<string, StatisticsResponse>;
+}
+
+export interface CategoryTotal {
+  category: string | null;
+  total: number;
+  count: number;
+  share: number;
+  is_other: boolean;
+}
+
+export interface CategoryMonthTotal {
+  month: string;
+  category: string | null;
+  total: number;
+  count: number;
+  is_other: boolean;
+}
+
+export interface CategoryStatisticsResponse {
+  period_start: string;
+  period_end: string;
+  type: TransactionType;
+  total: number;
+  count: number;
+  categories: CategoryTotal[];
+  months: CategoryMonthTotal[] | null;
+}
@@ -1,5 +1,13 @@
-import { format, startOfWeek, endOfWeek, startOfMonth, endOfMonth } from "date-fns";
+import {
+  format,
+  startOfWeek,
+  endOfWeek,
+  startOfMonth,
+  endOfMonth,
+  differenceInCalendarDays,
+} from "date-fns";
 import { ru } from "date-fns/locale";
+import type { Granularity } from "../types/transaction";
 
 export const formatDate = (date: string | Date): string => {
   const dateObj = typeof date === "string" ? new Date(date) : date;
@@ -25,6 +33,15 @@ export const getMonthRange = (date: Date = new Date()) => {
   };
 };
 
+// Шаг графика по длине периода: не больше нескольких сотен точек
+export const pickGranularity = (start: string, end: string): Granularity => {
+  const days = differenceInCalendarDays(new Date(end), new Date(start)) + 1;
+  if (days <= 93) return "day";
+  if (days <= 731) return "week";
+  if (days <= 366 * 10) return "month";
+  return "quarter";
+};
+
 export const formatCurrency = (amount: number): string => {
   return new Intl.NumberFormat("ru-RU", {
     style: "currency",